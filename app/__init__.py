@@ -9,8 +9,7 @@ from typing import Optional
 from flask import Flask, render_template
 from markupsafe import Markup, escape
 
-from app import commands
-from app.extensions import csrf, db, login_manager, migrate
+from app.extensions import csrf, db, login_manager
 
 # -------------------- Jinja2 过滤器 --------------------
 def nl2br_filter(value: Optional[str]) -> Markup:
@@ -41,17 +40,34 @@ def strftime_filter(value, format='%Y-%m-%d %H:%M:%S'):
 
 # -------------------- Flask 应用工厂 --------------------
 def create_app(config: object) -> Flask:
-    """Flask应用工厂函数"""
+    """
+    Flask应用工厂函数。
+    除扩展对象外，模型、蓝图、工具模块与命令行命令都在这里导入，import app 本身保持轻量；
+    config 可以是配置类或其导入路径（如 "config.DevelopmentConfig"）。
+    """
+    from app import commands
+    from app.utils import assets, audit, cache, db_routing, jobs, profiler, slow_query
+    from app.utils import live_events  # noqa: F401  导入即注册日报状态变更的实时事件监听
+    from app.utils.template_cache import configure_bytecode_cache
+
     app = Flask(__name__)
     app.config.from_object(config)
+    # 子进程（启动分析、月结进程池）按此路径重新加载同一配置
+    app.config["CONFIG_IMPORT_PATH"] = config if isinstance(config, str) else f"{config.__module__}.{config.__qualname__}"
 
     # 初始化扩展
     configure_logging(app)
     db.init_app(app)
+    db_routing.init_app(app)
     csrf.init_app(app)
-    migrate.init_app(app, db)
     login_manager.init_app(app)
     commands.init_app(app)
+    assets.init_app(app)
+    jobs.init_app(app)
+    audit.init_app(app)
+    profiler.init_app(app)
+    slow_query.init_app(app)
+    cache.init_app(app)
     login_manager.login_view = "user.login"
     app.url_map.strict_slashes = False
     validate_production_config(app)
@@ -61,6 +77,9 @@ def create_app(config: object) -> Flask:
     app.jinja_env.filters["nl2br"] = nl2br_filter
     app.jinja_env.filters["strftime"] = strftime_filter # 注册 strftime 过滤器
 
+    # 多个 worker 共享的模板字节码缓存
+    configure_bytecode_cache(app)
+
     # 注入当前时间到模板
     @app.context_processor
     def inject_now():
@@ -94,13 +113,15 @@ def configure_logging(app: Flask):
 
 # -------------------- 生产环境配置校验 --------------------
 def validate_production_config(app: Flask):
-    """生产环境下必须配置的关键参数校验"""
+    """生产环境下必须配置的关键参数校验；使用开发默认 SECRET_KEY 时记录警告"""
     REQUIRED_KEYS = ["SECRET_KEY", "SQLALCHEMY_DATABASE_URI"]
     if app.config.get('ENV') == "production":
         for key in REQUIRED_KEYS:
             if not app.config.get(key):
                 app.logger.error(f"生产环境必须配置 {key}")
                 raise ValueError(f"生产环境必须配置 {key}")
+    if app.config.get("SECRET_KEY") == "dev_secret_key_do_not_use_in_prod":
+        app.logger.warning("SECRET_KEY 未通过环境变量设置，正在使用开发默认值。请勿在生产中使用此默认值！")
 
 # -------------------- 蓝图注册 --------------------
 def register_blueprints(app: Flask):
@@ -110,12 +131,14 @@ def register_blueprints(app: Flask):
     from app.views.sales_views import sales_bp
     from app.views.user_views import user_bp
     from app.views.admin_user_views import admin_user_bp
+    from app.views.admin_ops_views import admin_ops_bp
 
     app.register_blueprint(root_bp)
     app.register_blueprint(user_bp, url_prefix="/user")
     app.register_blueprint(main_bp, url_prefix="/main")
     app.register_blueprint(sales_bp, url_prefix="/sales")
     app.register_blueprint(admin_user_bp)
+    app.register_blueprint(admin_ops_bp)
 
 # -------------------- 错误处理 --------------------
 def handle_app_error(app: Flask, error: Exception, code: int) -> tuple:
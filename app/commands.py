@@ -1,9 +1,40 @@
 # app/commands.py
 import click
 from flask import current_app
-from flask.cli import with_appcontext
+from flask.cli import ScriptInfo, with_appcontext
 
-from app.utils.fake_data import generate_fake_data, clean_daily_sales_duplicates
+# 注意：本模块在每个 worker 启动时都会被导入，Faker、Alembic 等只有命令行才用到的
+# 重量级依赖一律在命令函数内部导入，避免拖慢 gunicorn worker 启动、增加内存占用。
+
+
+class LazyMigrateGroup(click.Group):
+    """
+    flask db 命令组的延迟加载代理。
+    Flask-Migrate 会连带导入 Alembic（应用启动耗时的大头），而只有迁移命令才需要它，
+    因此只在首次执行 flask db ... 时才真正初始化 Flask-Migrate。
+    """
+
+    def _real_group(self, ctx):
+        from app.extensions import db
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_cli_group
+
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        if "migrate" not in app.extensions:
+            Migrate(app, db)
+        return db_cli_group
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # 交给真正的 flask_migrate 命令组解析参数（--directory、-x 等）并执行其回调
+        if parent is None:
+            return super().make_context(info_name, args, parent=parent, **extra)
+        return self._real_group(parent).make_context(info_name, args, parent=parent, **extra)
+
+    def list_commands(self, ctx):
+        return self._real_group(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, cmd_name):
+        return self._real_group(ctx).get_command(ctx, cmd_name)
 
 
 @click.command("fake-data")
@@ -12,6 +43,8 @@ def fake_data_command():
     """
     生成测试数据，并清理重复归档日报。
     """
+    from app.utils.fake_data import clean_daily_sales_duplicates, generate_fake_data
+
     click.echo("开始生成测试数据...")
     generate_fake_data()
     click.echo("测试数据生成完毕！")
@@ -20,8 +53,325 @@ def fake_data_command():
     click.echo("重复归档日报清理完毕！")
 
 
+@click.command("build-assets")
+@click.option("--clean", is_flag=True, help="构建前清空旧的 dist 目录")
+@with_appcontext
+def build_assets_command(clean):
+    """
+    静态资源指纹化：生成带内容哈希的文件名、gzip/brotli 预压缩版本及 manifest。
+    """
+    from app.utils.assets import brotli, build_assets
+
+    click.echo("开始构建静态资源...")
+    manifest = build_assets(current_app.static_folder, clean=clean)
+    for src, hashed in sorted(manifest.items()):
+        click.echo(f"  {src} -> {hashed}")
+    if brotli is None:
+        click.echo("提示：未安装 brotli，仅生成了 gzip 压缩版本。")
+    click.echo(f"静态资源构建完毕，共 {len(manifest)} 个文件！")
+
+
+@click.command("precompile-templates")
+@click.option("--measure", is_flag=True, help="对比无缓存与使用字节码缓存时模板首次加载的耗时")
+@with_appcontext
+def precompile_templates_command(measure):
+    """
+    预编译全部模板并写入 Jinja 字节码缓存，供部署时预热使用。
+    """
+    from app.utils.template_cache import measure_template_load, precompile_templates
+
+    if current_app.jinja_env.bytecode_cache is None:
+        click.echo("未配置 JINJA_BYTECODE_CACHE_DIR，无法预编译模板。")
+        return
+
+    compiled, failed = precompile_templates(current_app)
+    for name, error in failed.items():
+        click.echo(f"  ❌ {name}: {error}")
+    click.echo(f"模板预编译完毕：成功 {len(compiled)} 个，失败 {len(failed)} 个。")
+
+    if measure:
+        cold = measure_template_load(current_app, use_bytecode_cache=False)
+        warm = measure_template_load(current_app, use_bytecode_cache=True)
+        click.echo(f"{'模板':<36}{'无缓存(ms)':>12}{'字节码缓存(ms)':>16}")
+        for name in sorted(cold, key=cold.get, reverse=True):
+            click.echo(f"{name:<36}{cold[name] * 1000:>12.2f}{warm.get(name, 0) * 1000:>16.2f}")
+        click.echo(f"{'合计':<36}{sum(cold.values()) * 1000:>12.2f}{sum(warm.values()) * 1000:>16.2f}")
+
+
+@click.command("profile-startup")
+@click.option("--top", default=15, show_default=True, help="每个分项显示的条目数")
+@with_appcontext
+def profile_startup_command(top):
+    """
+    分析应用冷启动耗时：导入耗时（按包/模块）与应用工厂耗时。
+    """
+    import os
+
+    from app.utils.startup_profile import profile_startup
+
+    project_root = os.path.dirname(current_app.root_path)
+    config_path = current_app.config["CONFIG_IMPORT_PATH"]
+    click.echo(f"正在子进程中冷启动应用 (配置: {config_path})...")
+    try:
+        result = profile_startup(project_root, config_path)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    click.echo("\n== 启动阶段 ==")
+    for phase, seconds in result["phases"].items():
+        click.echo(f"  {phase:<16}{seconds * 1000:>10.1f} ms")
+    click.echo(f"  已加载模块 {result['modules']} 个，进程峰值内存 {result['max_rss_kb'] / 1024:.1f} MB")
+
+    click.echo(f"\n== 导入耗时（按顶层包，自身耗时）Top {top} ==")
+    for package, micros in list(result["packages"].items())[:top]:
+        click.echo(f"  {package:<32}{micros / 1000:>10.1f} ms")
+
+    click.echo(f"\n== 导入耗时（按模块，累计耗时）Top {top} ==")
+    imports = sorted(result["imports"], key=lambda r: r["cumulative_us"], reverse=True)
+    for record in imports[:top]:
+        click.echo(f"  {record['module']:<48}{record['cumulative_us'] / 1000:>10.1f} ms")
+
+    click.echo(f"\n== create_app() 耗时分解（项目内函数，累计耗时）Top {top} ==")
+    for func, seconds in result["factory"][:top]:
+        click.echo(f"  {func:<56}{seconds * 1000:>10.1f} ms")
+
+
+@click.command("archive-reports")
+@click.option("--older-than-months", default=6, show_default=True, type=click.IntRange(min=1),
+              help="热表中保留的自然月数，更早的已归档日报迁入历史表")
+@click.option("--batch-size", default=500, show_default=True, type=click.IntRange(min=1), help="每批迁移条数")
+@with_appcontext
+def archive_reports_command(older_than_months, batch_size):
+    """
+    将过期的已归档日报及其附件记录分批迁入历史表（建议由 cron 定期执行）。
+    """
+    from app.utils.archive_mover import move_archived_reports
+
+    click.echo(f"开始迁移 {older_than_months} 个月之前的已归档日报...")
+    total = move_archived_reports(
+        older_than_months=older_than_months,
+        batch_size=batch_size,
+        progress=lambda n, total: click.echo(f"  已迁移 {total} 条（本批 {n} 条）"),
+    )
+    click.echo(f"迁移完毕，共迁移 {total} 条日报！")
+
+
+@click.command("archive-attachments")
+@click.option("--older-than", "older_than_months", default=3, show_default=True, type=click.IntRange(min=1),
+              help="上传目录中保留的自然月数，更早的已归档日报的附件打包进冷存储")
+@click.option("--batch-size", default=200, show_default=True, type=click.IntRange(min=1), help="每批处理的附件条数")
+@with_appcontext
+def archive_attachments_command(older_than_months, batch_size):
+    """
+    将旧附件按月打包为压缩归档（冷存储），读取时仍按 file_path 透明访问（建议由 cron 定期执行）。
+    """
+    from app.utils.attachment_store import archive_attachments, cold_folder
+
+    click.echo(f"开始归档 {older_than_months} 个月之前的附件到 {cold_folder()} ...")
+    total = archive_attachments(
+        older_than_months=older_than_months,
+        batch_size=batch_size,
+        progress=lambda n, total: click.echo(f"  已归档 {total} 个附件（本批 {n} 个）"),
+    )
+    click.echo(f"归档完毕，共归档 {total} 个附件！")
+
+
+@click.command("recompute-derived")
+@click.option("--from", "date_from", required=True, type=click.DateTime(formats=["%Y-%m-%d"]),
+              help="营业日期起（含），格式 YYYY-MM-DD")
+@click.option("--to", "date_to", required=True, type=click.DateTime(formats=["%Y-%m-%d"]),
+              help="营业日期止（含），格式 YYYY-MM-DD")
+@click.option("--chunk-size", default=500, show_default=True, type=click.IntRange(min=1),
+              help="每次提交覆盖的 report_id 区间宽度")
+@with_appcontext
+def recompute_derived_command(date_from, date_to, chunk_size):
+    """
+    按规则重算历史日报的 POS 总收入与实际营业额（分块提交，可重复执行）。
+    """
+    from app.utils.derived_fields import recompute_derived
+
+    if date_from > date_to:
+        raise click.BadParameter("起始日期不能晚于截止日期", param_hint="--from")
+    click.echo(f"开始重算 {date_from:%Y-%m-%d} 至 {date_to:%Y-%m-%d} 的历史日报...")
+    changed = recompute_derived(
+        date_from.date(),
+        date_to.date(),
+        chunk_size=chunk_size,
+        progress=lambda n, total, last_id: click.echo(f"  已处理到 report_id {last_id}，本块改写 {n} 条"),
+    )
+    click.echo(f"重算完毕，共改写 {changed} 条日报！")
+
+
+@click.command("month-close")
+@click.option("--month", required=True, help="月结月份，格式 YYYY-MM")
+@click.option("--workers", default=4, show_default=True, type=click.IntRange(min=0),
+              help="并行计算的进程数，0 表示在当前进程内顺序执行")
+@click.option("--group-size", default=50, show_default=True, type=click.IntRange(min=1), help="每个任务包含的门店数")
+@with_appcontext
+def month_close_command(month, workers, group_size):
+    """
+    月结：按门店分组并行计算当月汇总，写入不可修改的月结快照（可中断后续跑）。
+    """
+    import time
+
+    from app.utils.month_close import parse_month, run_month_close
+
+    try:
+        parse_month(month)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--month")
+
+    started = time.perf_counter()
+    click.echo(f"开始 {month} 月结（进程数 {workers}，每组 {group_size} 个门店）...")
+    created = run_month_close(
+        month,
+        config_path=current_app.config["CONFIG_IMPORT_PATH"],
+        workers=workers,
+        group_size=group_size,
+        progress=lambda done, total, n: click.echo(f"  [{done}/{total}] 完成 {n} 个门店"),
+    )
+    elapsed = time.perf_counter() - started
+    if created == 0:
+        click.echo(f"{month} 所有门店均已有月结快照，无需重复生成。")
+    else:
+        click.echo(f"{month} 月结完毕，新生成 {created} 条快照，耗时 {elapsed:.1f} 秒！")
+
+
+@click.command("import-users")
+@click.argument("csv_file", type=click.File("rb"))
+@click.option("--output", "-o", type=click.Path(dir_okay=False, writable=True),
+              help="逐行结果 CSV 的保存路径，默认为 <输入文件名>.result.csv")
+@click.option("--workers", default=4, show_default=True, type=click.IntRange(min=0),
+              help="计算密码哈希的进程数，0 表示在当前进程内顺序计算")
+@click.option("--batch-size", default=200, show_default=True, type=click.IntRange(min=1), help="每批插入的用户数")
+@with_appcontext
+def import_users_command(csv_file, output, workers, batch_size):
+    """
+    从 CSV 批量创建用户（表头：username,password,role[,store_id,real_name,phone,email]）。
+    """
+    import os
+    import time
+
+    from app.utils.user_import import ImportFileError, import_users, write_results
+
+    started = time.perf_counter()
+    try:
+        results = import_users(
+            csv_file,
+            workers=workers,
+            batch_size=batch_size,
+            progress=lambda done, total: click.echo(f"  已插入 {done}/{total}"),
+        )
+    except ImportFileError as e:
+        raise click.BadParameter(str(e), param_hint="CSV_FILE")
+
+    output = output or f"{os.path.splitext(csv_file.name)[0]}.result.csv"
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        write_results(results, f)
+    created = sum(1 for r in results if r["status"] == "created")
+    click.echo(f"导入完毕：成功 {created} 个，失败 {len(results) - created} 个，"
+               f"耗时 {time.perf_counter() - started:.1f} 秒。逐行结果已写入 {output}")
+
+
+@click.command("worker")
+@click.option("--threads", default=2, show_default=True, type=click.IntRange(min=1), help="工作线程数")
+@click.option("--poll-interval", default=None, type=click.FloatRange(min=0.1), help="无任务时的轮询间隔（秒）")
+@with_appcontext
+def worker_command(threads, poll_interval):
+    """
+    在前台运行后台任务工作线程（Ctrl+C 退出），可与随应用启动的工作线程同时使用。
+    """
+    import time
+
+    from app.utils.jobs import JobWorker, load_handlers
+
+    worker = JobWorker(current_app._get_current_object(), threads=threads, poll_interval=poll_interval)
+    click.echo(f"后台任务工作线程启动（{threads} 个），已注册任务: {', '.join(sorted(load_handlers()))}")
+    worker.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        click.echo("正在停止，等待当前任务完成...")
+        worker.stop()
+
+
+@click.command("load-sim")
+@click.option("--users", default=20, show_default=True, type=click.IntRange(min=1), help="模拟门店（虚拟用户）数")
+@click.option("--concurrency", default=10, show_default=True, type=click.IntRange(min=1), help="同时上报的虚拟用户数")
+@click.option("--image-kb", default=200, show_default=True, type=click.IntRange(min=1), help="每张上传图片的大小（KB）")
+@click.option("--report-date", default=None, type=click.DateTime(formats=["%Y-%m-%d"]), help="上报日期，默认今天")
+@click.option("--base-url", default=None, help="压测已运行的实例（如 http://127.0.0.1:8000）；不指定则在本机启动 gunicorn")
+@click.option("--port", default=8765, show_default=True, help="本机启动 gunicorn 时监听的端口")
+@click.option("--workers", default=3, show_default=True, help="本机启动 gunicorn 的 worker 数")
+@click.option("--threads", default=1, show_default=True, help="本机启动 gunicorn 每个 worker 的线程数")
+@click.option("--password", default="LoadSim#2024", show_default=True, help="模拟账号的密码")
+@click.option("--keep-data", is_flag=True, help="结束后保留模拟门店、账号、日报与上传文件")
+@with_appcontext
+def load_sim_command(users, concurrency, image_kb, report_date, base_url, port, workers, threads, password, keep_data):
+    """
+    收档高峰压测：N 个模拟门店并发登录并走完 POS/外卖/银行/最终提交的完整上报流程，
+    按步骤输出吞吐量、错误率与耗时分位数。请勿对生产库执行。
+    """
+    import importlib.util
+    import os
+
+    from app.extensions import db
+    from app.utils import load_sim
+
+    if current_app.config.get("ENV") == "production":
+        raise click.ClickException("压测会写入模拟门店与日报数据，禁止在生产环境执行。")
+    # 在写入模拟数据之前检查，避免 gunicorn 启动失败后留下压测账号
+    if base_url is None and importlib.util.find_spec("gunicorn") is None:
+        raise click.ClickException("未安装 gunicorn（pip install -r requirements.txt），"
+                                   "或用 --base-url 压测已运行的实例。")
+
+    accounts = load_sim.prepare_users(users, password)
+    # 释放本进程的数据库连接，避免 SQLite 等数据库在压测期间被本进程锁住
+    db.session.remove()
+
+    process = None
+    if base_url is None:
+        project_root = os.path.dirname(current_app.root_path)
+        click.echo(f"启动 gunicorn（{workers} worker × {threads} 线程，端口 {port}）...")
+        process = load_sim.start_gunicorn(project_root, port, workers=workers, threads=threads)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        click.echo(f"开始压测 {base_url}：{users} 个门店，并发 {concurrency}，图片 {image_kb} KB ...")
+        result = load_sim.run_load(base_url, accounts, password, concurrency=concurrency,
+                                   report_date=report_date.date() if report_date else None, image_kb=image_kb)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    click.echo(f"\n总耗时 {result['elapsed']:.1f} 秒，请求 {result['requests']} 个，吞吐量 {result['throughput']:.1f} 请求/秒")
+    click.echo(f"{'步骤':<10}{'请求数':>8}{'错误率':>9}{'p50':>10}{'p90':>10}{'p99':>10}{'最大':>10}  (ms)")
+    for step, s in result["steps"].items():
+        click.echo(f"{step:<10}{s['count']:>8}{s['error_rate']:>9.1%}{s['p50']:>10.1f}{s['p90']:>10.1f}"
+                   f"{s['p99']:>10.1f}{s['max']:>10.1f}")
+        if s["sample_error"]:
+            click.echo(f"{'':<10}错误示例: {s['sample_error']}")
+
+    if not keep_data:
+        removed = load_sim.cleanup(accounts)
+        click.echo(f"已清理模拟数据（日报 {removed} 条）。")
+
+
 def register_commands(app):
     app.cli.add_command(fake_data_command)
+    app.cli.add_command(build_assets_command)
+    app.cli.add_command(precompile_templates_command)
+    app.cli.add_command(profile_startup_command)
+    app.cli.add_command(archive_reports_command)
+    app.cli.add_command(archive_attachments_command)
+    app.cli.add_command(recompute_derived_command)
+    app.cli.add_command(month_close_command)
+    app.cli.add_command(worker_command)
+    app.cli.add_command(load_sim_command)
+    app.cli.add_command(import_users_command)
+    app.cli.add_command(LazyMigrateGroup("db", help="Perform database migrations."))
 
 
 # 兼容旧用法，提供init_app别名
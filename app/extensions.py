@@ -1,10 +1,11 @@
 # app/extensions.py
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf.csrf import CSRFProtect
 
-db = SQLAlchemy()
-migrate = Migrate()
+from app.utils.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # 支持只读副本路由的 Session
+# Flask-Migrate 仅在执行 flask db 命令时才初始化，见 app/commands.py 中的 LazyMigrateGroup
 csrf = CSRFProtect()  # 初始化 CSRF 保护
 login_manager = LoginManager()  # 初始化 LoginManager
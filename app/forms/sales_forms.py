@@ -21,6 +21,7 @@ class SalesForm(FlaskForm):
     store_id = SelectField("选择店铺", validators=[DataRequired()]) # 设置为 DataRequired
     report_date = DateField("上报日期", validators=[DataRequired()], format='%Y-%m-%d', default=date.today) # 设置为 DataRequired
     report_id = HiddenField()
+    version = HiddenField()  # 打开页面时日报的版本号，提交时用于检测他人的并发修改
     #report_date_sync = HiddenField() # 移除 report_date_sync 字段
 
     # --- 第一步: POS机信息字段 ---
@@ -45,4 +46,17 @@ class SalesForm(FlaskForm):
         FileAllowed(['jpg', 'png', 'jpeg', 'gif', 'pdf'], '只允许上传图片和PDF文件')])
 
     # --- 隐藏字段：用于前端判断是否为初次加载，防止模板渲染报错 ---
-    initial_load = HiddenField()
\ No newline at end of file
+    initial_load = HiddenField()
+
+    # --- 分片上传完成后由前端回填的上传 ID（见 app/utils/chunked_upload.py），有值时表单不再携带文件本身 ---
+    sales_slip_upload_id = HiddenField()
+    takeaway_receipt_upload_id = HiddenField()
+    bank_receipt_upload_id = HiddenField()
+
+
+# 凭证文件字段 -> 对应的上传 ID 隐藏字段
+UPLOAD_ID_FIELDS = {
+    'sales_slip_image': 'sales_slip_upload_id',
+    'takeaway_platform_receipt': 'takeaway_receipt_upload_id',
+    'bank_receipt_image': 'bank_receipt_upload_id',
+}
\ No newline at end of file
@@ -2,8 +2,13 @@
 
 # 从 enums.py 中导出所有的枚举类，方便其他地方统一调用
 from .attachment import DailySalesAttachments
+from .calendar import CalendarDay
 from .daily_sales import DailySales
-from .enums import AttachmentType, FinancialCheckStatus, RoleType
+from .daily_sales_audit import DailySalesAudit
+from .daily_sales_history import DailySalesAttachmentsHistory, DailySalesHistory, union_all_sales
+from .enums import AttachmentType, FinancialCheckStatus, JobStatus, RoleType
+from .job import Job
+from .monthly_close import MonthlyCloseSnapshot
 from .store import Store
 
 # 从各个模型文件中导出核心的模型类
@@ -25,6 +25,12 @@ class DailySalesAttachments(db.Model):
         current_app.logger.info(f"[附件模型] 查询凭证: id={self.attachment_id}, 类型={self.attachment_type}")
         return f"<DailySalesAttachments {self.attachment_type}>"
 
+    def open_file(self):
+        """以二进制只读方式打开附件文件；已转入冷存储（cold:// 路径）的附件从月度归档中读取"""
+        from app.utils.attachment_store import open_attachment
+
+        return open_attachment(self.file_path)
+
     def to_dict(self):
         """
         转换为字典，便于API返回和前端展示
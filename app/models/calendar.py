@@ -0,0 +1,17 @@
+# app/models/calendar.py
+from app.extensions import db
+
+
+class CalendarDay(db.Model):
+    """
+    日历表：每个自然日一行。
+    缺报检查用门店 × 日历生成应有日报的 (门店, 日期) 组合，再与日报表做反连接；
+    MySQL 5.7 不支持递归 CTE，无法在查询中临时生成日期序列。
+    缺少的日期由 app.utils.missing_reports.ensure_calendar 按需补齐。
+    """
+    __tablename__ = 'calendar_days'
+
+    day = db.Column(db.Date, primary_key=True, autoincrement=False, comment='日期')
+
+    def __repr__(self):
+        return f'<CalendarDay {self.day}>'
@@ -15,6 +15,16 @@ class DailySales(db.Model):
     适配泰国本地业务，外卖收入统一为第三方平台，无美团/饿了么字段
     """
     __tablename__ = 'daily_sales'
+    __table_args__ = (
+        # 同一门店同一天只能有一条未归档（进行中）的日报；已归档记录 live_marker 为 NULL，不受约束
+        db.UniqueConstraint('store_id', 'report_date', 'live_marker', name='uq_daily_sales_live'),
+        # 覆盖索引：按门店、月份汇总实际营业额时只扫描索引，不回表
+        db.Index('ix_daily_sales_month_sum', 'store_id', 'archived', 'report_date', 'actual_sales'),
+        # 日报检索：按核对状态筛选/分组计数，并按日期排序
+        db.Index('ix_daily_sales_status_date', 'financial_check_status', 'report_date'),
+        # 备注全文检索：MySQL 上为 ngram 分词的 FULLTEXT 索引（支持中文、泰文），其它数据库为普通索引
+        db.Index('ft_daily_sales_remark', 'remark', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+    )
 
     # --- 模型字段定义 (与上一版一致) ---
     report_id = db.Column(db.Integer, primary_key=True, comment='日报主键')
@@ -26,7 +36,10 @@ class DailySales(db.Model):
     cash_income = db.Column(db.Float, comment='POS现金收入(C)')
     pos_income = db.Column(db.Float, comment='POS电子支付收入(P)')
     day_pass_income = db.Column(db.Float, comment='POS系统中记录的外卖收入(D)')
-    pos_total = db.Column(db.Float, comment='POS机小票总收入(T)，=现金+电子支付+POS外卖')
+    # 数据库生成列（STORED）：由数据库按公式计算，应用代码不再赋值；COALESCE 保证任一项未填时不为 NULL
+    pos_total = db.Column(db.Float, db.Computed(
+        'COALESCE(cash_income, 0) + COALESCE(pos_income, 0) + COALESCE(day_pass_income, 0)', persisted=True),
+        comment='POS机小票总收入(T)，=现金+电子支付+POS外卖（生成列）')
     # --- 新增：误差字段 ---
     cash_difference = db.Column(db.Float, comment='POS现金收入误差(A)')
     electronic_difference = db.Column(db.Float, comment='POS电子支付误差(B)')
@@ -36,11 +49,13 @@ class DailySales(db.Model):
     # 银行相关
     bank_receipt_amount = db.Column(db.Float, comment='银行存入的现金金额')
     bank_fee = db.Column(db.Float, comment='银行存款手续费')
-    bank_deposit = db.Column(db.Float, comment='财务填写的实际到账金额')
+    # active_history=True：修改前先加载原值，变更审计才能记录"从什么改为什么"（见 app/utils/audit.py）
+    bank_deposit = db.column_property(db.Column(db.Float, comment='财务填写的实际到账金额'), active_history=True)
 
     # 其它
-    voucher_amount = db.Column(db.Float, comment='财务填写的代金券金额')
-    actual_sales = db.Column(db.Float, comment='店铺实际营业额（财务核对后）')
+    voucher_amount = db.column_property(db.Column(db.Float, comment='财务填写的代金券金额'), active_history=True)
+    actual_sales = db.Column(db.Float, db.Computed('COALESCE(bank_deposit, 0) + COALESCE(voucher_amount, 0)', persisted=True),
+                             comment='店铺实际营业额，=实际到账金额+代金券金额（生成列）')
     remark = db.Column(db.String(255), comment='备注')
 
     # 步骤与状态
@@ -48,10 +63,17 @@ class DailySales(db.Model):
     takeaway_info_completed = db.Column(db.Boolean, default=False, nullable=False, comment='第二步(外卖)是否完成')
     bank_info_completed = db.Column(db.Boolean, default=False, nullable=False, comment='第三步(银行)是否完成')
     is_submitted = db.Column(db.Boolean, default=False, nullable=False, comment='是否已最终提交给财务')
-    financial_check_status = db.Column(db.Enum(FinancialCheckStatus), default=FinancialCheckStatus.PENDING,
-                                       nullable=False, comment='财务核对状态')
+    financial_check_status = db.column_property(
+        db.Column(db.Enum(FinancialCheckStatus), default=FinancialCheckStatus.PENDING, nullable=False, comment='财务核对状态'),
+        active_history=True
+    )
     archived = db.Column(db.Boolean, default=False, nullable=False, comment='是否已归档')
+    # 数据库生成列：未归档为 1，已归档为 NULL（MySQL 5.7 不支持部分索引，用它配合唯一约束实现"仅限未归档"）
+    live_marker = db.Column(db.Integer, db.Computed('CASE WHEN archived THEN NULL ELSE 1 END', persisted=True),
+                            comment='未归档标记（生成列）')
 
+    # 乐观并发控制：每次状态转换 version + 1，条件 UPDATE 以此判断期间是否被他人修改（见 app/utils/report_transitions.py）
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0', comment='版本号')
     created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment='更新时间')
 
@@ -94,6 +116,7 @@ class DailySales(db.Model):
             "is_submitted": self.is_submitted,
             "financial_check_status": self.financial_check_status.value if self.financial_check_status else None,
             "archived": self.archived,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "attachments": [attachment.to_dict() for attachment in self.attachments]
@@ -0,0 +1,58 @@
+# app/models/daily_sales_audit.py
+from datetime import datetime
+
+from app.extensions import db
+from sqlalchemy import event
+
+
+class DailySalesAudit(db.Model):
+    """
+    日报变更审计模型（只追加）
+    记录关键字段的每一次修改：谁、何时、从什么值改为什么值。
+    由 app/utils/audit.py 在事务提交后批量写入，写入后不可修改或删除。
+    """
+    __tablename__ = 'daily_sales_audit'
+    __table_args__ = (
+        db.Index('ix_daily_sales_audit_report_changed', 'report_id', 'changed_at'),
+    )
+
+    audit_id = db.Column(db.Integer, primary_key=True, autoincrement=True, comment='审计记录ID')
+    # 不加外键：日报迁入历史表后审计记录仍需保留
+    report_id = db.Column(db.Integer, nullable=False, comment='日报ID')
+    store_id = db.Column(db.String(32), nullable=True, index=True, comment='门店ID')
+    report_date = db.Column(db.Date, nullable=True, comment='营业日期')
+    field_name = db.Column(db.String(64), nullable=False, comment='变更字段')
+    old_value = db.Column(db.String(255), nullable=True, comment='原值')
+    new_value = db.Column(db.String(255), nullable=True, comment='新值')
+    user_id = db.Column(db.Integer, nullable=True, comment='操作人ID（命令行等非请求场景为空）')
+    username = db.Column(db.String(64), nullable=True, comment='操作人用户名')
+    source = db.Column(db.String(128), nullable=True, comment='来源（请求端点或命令）')
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, comment='变更时间')
+
+    def __repr__(self):
+        return f'<DailySalesAudit {self.report_id} {self.field_name}>'
+
+    def to_dict(self):
+        return {
+            "audit_id": self.audit_id,
+            "report_id": self.report_id,
+            "store_id": self.store_id,
+            "report_date": self.report_date.isoformat() if self.report_date else None,
+            "field_name": self.field_name,
+            "old_value": self.old_value,
+            "new_value": self.new_value,
+            "user_id": self.user_id,
+            "username": self.username,
+            "source": self.source,
+            "changed_at": self.changed_at.isoformat() if self.changed_at else None,
+        }
+
+
+@event.listens_for(DailySalesAudit, 'before_update')
+def _forbid_audit_update(mapper, connection, target):
+    raise ValueError(f"审计记录只能追加，不可修改: {target.audit_id}")
+
+
+@event.listens_for(DailySalesAudit, 'before_delete')
+def _forbid_audit_delete(mapper, connection, target):
+    raise ValueError(f"审计记录只能追加，不可删除: {target.audit_id}")
@@ -0,0 +1,98 @@
+# app/models/daily_sales_history.py
+from datetime import datetime
+
+import sqlalchemy as sa
+from app.extensions import db
+
+from .daily_sales import DailySales
+from .enums import AttachmentType, FinancialCheckStatus
+
+
+class DailySalesHistory(db.Model):
+    """
+    已归档营业日报的历史表（冷数据）
+    归档记录按规定不可再修改，超过保留期后由 flask archive-reports 从 daily_sales 批量迁入，
+    使热表只保留近期数据。字段与 daily_sales 保持一致，report_id 沿用原值。
+    """
+    __tablename__ = 'daily_sales_history'
+    __table_args__ = (
+        db.Index('ix_daily_sales_history_store_date', 'store_id', 'report_date'),
+        # 与热表 ix_daily_sales_month_sum 相同的覆盖索引，UNION ALL 的两个分支都只扫描索引
+        db.Index('ix_daily_sales_history_month_sum', 'store_id', 'archived', 'report_date', 'actual_sales'),
+    )
+
+    report_id = db.Column(db.Integer, primary_key=True, autoincrement=False, comment='日报主键（沿用热表ID）')
+    store_id = db.Column(db.String(32), db.ForeignKey('stores.store_id'), nullable=False, comment='门店ID')
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False, comment='上报人ID')
+    report_date = db.Column(db.Date, nullable=False, index=True, comment='营业日期')
+    cash_income = db.Column(db.Float, comment='POS现金收入(C)')
+    pos_income = db.Column(db.Float, comment='POS电子支付收入(P)')
+    day_pass_income = db.Column(db.Float, comment='POS系统中记录的外卖收入(D)')
+    pos_total = db.Column(db.Float, comment='POS机小票总收入(T)')
+    cash_difference = db.Column(db.Float, comment='POS现金收入误差(A)')
+    electronic_difference = db.Column(db.Float, comment='POS电子支付误差(B)')
+    takeaway_amount = db.Column(db.Float, comment='第三方外卖平台收入')
+    bank_receipt_amount = db.Column(db.Float, comment='银行存入的现金金额')
+    bank_fee = db.Column(db.Float, comment='银行存款手续费')
+    bank_deposit = db.Column(db.Float, comment='财务填写的实际到账金额')
+    voucher_amount = db.Column(db.Float, comment='财务填写的代金券金额')
+    actual_sales = db.Column(db.Float, comment='店铺实际营业额（财务核对后）')
+    remark = db.Column(db.String(255), comment='备注')
+    pos_info_completed = db.Column(db.Boolean, nullable=False, comment='第一步(POS)是否完成')
+    takeaway_info_completed = db.Column(db.Boolean, nullable=False, comment='第二步(外卖)是否完成')
+    bank_info_completed = db.Column(db.Boolean, nullable=False, comment='第三步(银行)是否完成')
+    is_submitted = db.Column(db.Boolean, nullable=False, comment='是否已最终提交给财务')
+    financial_check_status = db.Column(db.Enum(FinancialCheckStatus), nullable=False, comment='财务核对状态')
+    archived = db.Column(db.Boolean, nullable=False, comment='是否已归档（历史表中恒为是）')
+    created_at = db.Column(db.DateTime, comment='创建时间')
+    updated_at = db.Column(db.DateTime, comment='更新时间')
+    moved_at = db.Column(db.DateTime, default=datetime.utcnow, comment='迁入历史表的时间')
+
+    attachments = db.relationship('DailySalesAttachmentsHistory', backref='daily_sale', lazy='dynamic')
+
+    def __repr__(self):
+        return f'<DailySalesHistory {self.report_id} for Store {self.store_id} on {self.report_date}>'
+
+
+class DailySalesAttachmentsHistory(db.Model):
+    """已迁入历史表的日报所对应的附件记录"""
+    __tablename__ = 'daily_sales_attachments_history'
+
+    attachment_id = db.Column(db.Integer, primary_key=True, autoincrement=False, comment='凭证ID（沿用热表ID）')
+    report_id = db.Column(db.Integer, db.ForeignKey('daily_sales_history.report_id', ondelete='CASCADE'),
+                          nullable=False, index=True, comment='日报ID')
+    file_path = db.Column(db.String(255), nullable=True, comment='文件路径')
+    attachment_type = db.Column(db.Enum(AttachmentType), nullable=False, comment='附件类型')
+    created_at = db.Column(db.DateTime, comment='创建时间')
+
+    def __repr__(self):
+        return f'<DailySalesAttachmentsHistory {self.attachment_type}>'
+
+    def open_file(self):
+        """以二进制只读方式打开附件文件（见 DailySalesAttachments.open_file）"""
+        from app.utils.attachment_store import open_attachment
+
+        return open_attachment(self.file_path)
+
+
+def union_all_sales(columns, criteria=None):
+    """
+    功能：热表 daily_sales 与历史表 daily_sales_history 的 UNION ALL 子查询，供看板/导出等读路径使用。
+    参数：
+        columns (list[str]): 需要的列名，两张表中都必须存在。
+        criteria (callable): 接收表对象、返回过滤条件列表的函数。
+            过滤条件分别下推到两个分支内部，保证各自能用上索引
+            （MySQL 5.7 不会把外层 WHERE 下推进 UNION 派生表）。
+    返回：
+        Subquery: 列名与 columns 一致的子查询，可用 .c.<列名> 访问。
+    用法：
+        sales = union_all_sales(['store_id', 'actual_sales'], lambda t: [t.c.store_id == '190'])
+        db.session.query(func.sum(sales.c.actual_sales)).scalar()
+    """
+    selects = []
+    for table in (DailySales.__table__, DailySalesHistory.__table__):
+        stmt = sa.select(*[table.c[name] for name in columns])
+        if criteria is not None:
+            stmt = stmt.where(*criteria(table))
+        selects.append(stmt)
+    return sa.union_all(*selects).subquery('daily_sales_all')
@@ -32,4 +32,13 @@ class FinancialCheckStatus(enum.Enum):
     TAKEEAWAY_RECEIVED = 'TAKEEAWAY_RECEIVED' # 外卖收入已到账
     AMOUNT_VERIFIED = 'AMOUNT_VERIFIED' # 金额已核实
     REQUIRES_REMEDIATION = 'REQUIRES_REMEDIATION' # 需要补交
-    CHECKED = 'CHECKED'                 # 审核通过
\ No newline at end of file
+    CHECKED = 'CHECKED'                 # 审核通过
+
+class JobStatus(enum.Enum):
+    """
+    后台任务状态枚举
+    """
+    QUEUED = 'QUEUED'           # 排队中（含等待重试）
+    RUNNING = 'RUNNING'         # 执行中
+    SUCCEEDED = 'SUCCEEDED'     # 执行成功
+    FAILED = 'FAILED'           # 重试次数用尽，最终失败
@@ -0,0 +1,58 @@
+# app/models/job.py
+import json
+from datetime import datetime
+
+from app.extensions import db
+
+from .enums import JobStatus
+
+
+class Job(db.Model):
+    """
+    后台任务模型（持久化任务队列）
+    由 app/utils/jobs.py 中的 enqueue() 在业务事务提交后写入，
+    由 flask worker 或随应用启动的工作线程领取执行。
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # 工作线程按 状态 + 可执行时间 领取任务
+        db.Index('ix_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    job_id = db.Column(db.Integer, primary_key=True, autoincrement=True, comment='任务ID')
+    name = db.Column(db.String(64), nullable=False, index=True, comment='任务名称（处理函数注册名）')
+    payload = db.Column(db.Text, nullable=True, comment='任务参数（JSON）')
+    status = db.Column(db.Enum(JobStatus), nullable=False, default=JobStatus.QUEUED, comment='任务状态')
+    dedup_key = db.Column(db.String(128), nullable=True, index=True, comment='去重键')
+    # 仅在排队/执行中时等于 dedup_key，结束后置空；唯一索引保证同一去重键同时只有一个活动任务
+    active_dedup_key = db.Column(db.String(128), nullable=True, unique=True, comment='活动任务去重键')
+    attempts = db.Column(db.Integer, nullable=False, default=0, comment='已执行次数')
+    max_attempts = db.Column(db.Integer, nullable=False, default=3, comment='最大执行次数')
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, comment='最早可执行时间')
+    locked_by = db.Column(db.String(64), nullable=True, comment='领取该任务的工作线程')
+    locked_at = db.Column(db.DateTime, nullable=True, comment='领取时间')
+    last_error = db.Column(db.Text, nullable=True, comment='最近一次错误信息')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='创建时间')
+    finished_at = db.Column(db.DateTime, nullable=True, comment='结束时间')
+
+    def __repr__(self):
+        return f'<Job {self.job_id} {self.name} {self.status.value if self.status else None}>'
+
+    @property
+    def payload_data(self):
+        return json.loads(self.payload) if self.payload else {}
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "name": self.name,
+            "payload": self.payload_data,
+            "status": self.status.value if self.status else None,
+            "dedup_key": self.dedup_key,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "run_after": self.run_after.isoformat() if self.run_after else None,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
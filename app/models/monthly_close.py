@@ -0,0 +1,59 @@
+# app/models/monthly_close.py
+from datetime import datetime
+
+from app.extensions import db
+from sqlalchemy import event
+
+
+class MonthlyCloseSnapshot(db.Model):
+    """
+    月结快照模型
+    flask month-close 为每个门店每月生成一条汇总记录，生成后不可修改（只能新增）。
+    """
+    __tablename__ = 'monthly_close_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('month', 'store_id', name='uq_monthly_close_month_store'),
+    )
+
+    snapshot_id = db.Column(db.Integer, primary_key=True, autoincrement=True, comment='快照ID')
+    month = db.Column(db.String(7), nullable=False, index=True, comment='月份（YYYY-MM）')
+    store_id = db.Column(db.String(32), db.ForeignKey('stores.store_id'), nullable=False, comment='门店ID')
+    report_count = db.Column(db.Integer, nullable=False, default=0, comment='已提交日报数')
+    unarchived_count = db.Column(db.Integer, nullable=False, default=0, comment='其中尚未归档的日报数')
+    pos_total = db.Column(db.Float, nullable=False, default=0, comment='POS机小票总收入合计')
+    takeaway_amount = db.Column(db.Float, nullable=False, default=0, comment='第三方外卖收入合计')
+    bank_receipt_amount = db.Column(db.Float, nullable=False, default=0, comment='银行存入现金合计')
+    bank_deposit = db.Column(db.Float, nullable=False, default=0, comment='实际到账金额合计')
+    bank_fee = db.Column(db.Float, nullable=False, default=0, comment='银行手续费合计')
+    voucher_amount = db.Column(db.Float, nullable=False, default=0, comment='代金券金额合计')
+    cash_difference = db.Column(db.Float, nullable=False, default=0, comment='POS现金误差合计')
+    electronic_difference = db.Column(db.Float, nullable=False, default=0, comment='POS电子支付误差合计')
+    actual_sales = db.Column(db.Float, nullable=False, default=0, comment='实际营业额合计（实际到账 + 代金券）')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, comment='生成时间')
+
+    def __repr__(self):
+        return f'<MonthlyCloseSnapshot {self.month} Store {self.store_id}>'
+
+    def to_dict(self):
+        return {
+            "snapshot_id": self.snapshot_id,
+            "month": self.month,
+            "store_id": self.store_id,
+            "report_count": self.report_count,
+            "unarchived_count": self.unarchived_count,
+            "pos_total": self.pos_total,
+            "takeaway_amount": self.takeaway_amount,
+            "bank_receipt_amount": self.bank_receipt_amount,
+            "bank_deposit": self.bank_deposit,
+            "bank_fee": self.bank_fee,
+            "voucher_amount": self.voucher_amount,
+            "cash_difference": self.cash_difference,
+            "electronic_difference": self.electronic_difference,
+            "actual_sales": self.actual_sales,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+@event.listens_for(MonthlyCloseSnapshot, 'before_update')
+def _forbid_snapshot_update(mapper, connection, target):
+    raise ValueError(f"月结快照不可修改: {target.month} 门店 {target.store_id}")
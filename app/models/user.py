@@ -15,6 +15,10 @@ class User(UserMixin, db.Model):
     系统用户模型（已合并员工档案信息）
     """
     __tablename__ = "users"
+    __table_args__ = (
+        # 管理端用户列表按角色 + 状态筛选
+        db.Index("ix_users_role_status", "role", "user_status"),
+    )
 
     # --- 原有 User 字段 ---
     user_id = db.Column(db.Integer, primary_key=True, autoincrement=True, comment="用户主键，自增 ID")
@@ -31,16 +35,16 @@ class User(UserMixin, db.Model):
     # 【核心修正】: 关联的店铺ID，nullable=True 意味着该字段可以为空。
     # 这完美地满足了“管理组”用户（如ADMIN, FINANCE）不隶属于任何单个店铺的需求。
     # 只有“门店组”用户（如BRANCH_MANAGER, EMPLOYEE）才需要赋予这个字段一个具体的店铺ID。
-    store_id = db.Column(db.String(32), db.ForeignKey("stores.store_id"), nullable=True,
+    store_id = db.Column(db.String(32), db.ForeignKey("stores.store_id"), nullable=True, index=True,
                          comment="关联店铺ID (门店组用户专属)")
 
     # 员工的个人详细信息，这些字段都允许为空（nullable=True），方便分阶段录入
-    real_name = db.Column(db.String(100), nullable=True, comment="真实姓名")
+    real_name = db.Column(db.String(100), nullable=True, index=True, comment="真实姓名")
     id_card_number = db.Column(db.String(100), nullable=True, comment="身份证号")
     bank_name = db.Column(db.String(100), nullable=True, comment="银行名称")
     bank_account_number = db.Column(db.String(100), nullable=True, comment="银行账号")
     is_primary_contact = db.Column(db.Boolean, default=False, comment="是否为店铺主要联系人")
-    phone = db.Column(db.String(50), nullable=True, comment="联系电话")
+    phone = db.Column(db.String(50), nullable=True, index=True, comment="联系电话")
     line_id = db.Column(db.String(100), nullable=True, comment="LINE ID")
     email = db.Column(db.String(100), nullable=True, comment="电子邮箱")
     start_date = db.Column(db.Date, nullable=True, comment="入职日期")
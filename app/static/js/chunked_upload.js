@@ -0,0 +1,162 @@
+// app/static/js/chunked_upload.js
+
+/**
+ * 凭证照片分片上传（断点续传）
+ * 功能：提交日报步骤前，把带 data-upload-field 的文件框中的照片分片上传到 /sales/uploads，
+ *      手机网络中断时查询服务端已接收的偏移量并从断点继续，不必重新上传整张照片；
+ *      全部完成后把上传 ID 写入同一表单的隐藏字段，表单提交时不再携带文件本身。
+ *      浏览器不支持 fetch / Blob.slice 时不做处理，仍按原方式随表单整体提交。
+ */
+
+(function() {
+    const script = document.currentScript;
+    const uploadUrl = script && script.dataset.uploadUrl;
+    const MAX_RETRIES = 8;
+
+    if (!uploadUrl || !window.fetch || !window.Blob || !Blob.prototype.slice) {
+        return;
+    }
+
+    // CRC32 校验表（分片校验；crypto.subtle 只在 HTTPS 下可用，不能依赖）
+    const CRC_TABLE = (function() {
+        const table = new Uint32Array(256);
+        for (let n = 0; n < 256; n++) {
+            let c = n;
+            for (let k = 0; k < 8; k++) {
+                c = c & 1 ? 0xEDB88320 ^ (c >>> 1) : c >>> 1;
+            }
+            table[n] = c >>> 0;
+        }
+        return table;
+    })();
+
+    function crc32(bytes) {
+        let crc = 0xFFFFFFFF;
+        for (let i = 0; i < bytes.length; i++) {
+            crc = CRC_TABLE[(crc ^ bytes[i]) & 0xFF] ^ (crc >>> 8);
+        }
+        return ((crc ^ 0xFFFFFFFF) >>> 0).toString(16).padStart(8, '0');
+    }
+
+    async function sha256(file) {
+        if (!window.crypto || !crypto.subtle) {
+            return null;
+        }
+        const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+        return Array.from(new Uint8Array(digest)).map(function(b) {
+            return b.toString(16).padStart(2, '0');
+        }).join('');
+    }
+
+    function sleep(ms) {
+        return new Promise(function(resolve) { setTimeout(resolve, ms); });
+    }
+
+    async function request(method, url, csrfToken, body, headers) {
+        const response = await fetch(url, {
+            method: method,
+            body: body,
+            credentials: 'same-origin',
+            headers: Object.assign({ 'X-CSRFToken': csrfToken }, headers || {})
+        });
+        const data = await response.json().catch(function() { return {}; });
+        if (!response.ok) {
+            const error = new Error(data.error || ('HTTP ' + response.status));
+            error.status = response.status;
+            error.offset = data.offset;
+            throw error;
+        }
+        return data;
+    }
+
+    async function uploadFile(file, csrfToken, onProgress) {
+        const info = await request('POST', uploadUrl, csrfToken, JSON.stringify({
+            filename: file.name, size: file.size, sha256: await sha256(file)
+        }), { 'Content-Type': 'application/json' });
+        const base = uploadUrl + '/' + info.upload_id;
+        let offset = info.offset;
+        let failures = 0;
+
+        while (offset < file.size) {
+            const chunk = new Uint8Array(await file.slice(offset, offset + info.chunk_size).arrayBuffer());
+            try {
+                const status = await request('PATCH', base, csrfToken, chunk, {
+                    'Content-Type': 'application/octet-stream',
+                    'Upload-Offset': String(offset),
+                    'X-Chunk-CRC32': crc32(chunk)
+                });
+                offset = status.offset;
+                failures = 0;
+            } catch (error) {
+                if (error.status === 409 && typeof error.offset === 'number') {
+                    // 上次的分片其实已写入（只是响应丢失），以服务端偏移量为准继续
+                    offset = error.offset;
+                    continue;
+                }
+                if (error.status && error.status < 500) {
+                    throw error;
+                }
+                if (++failures > MAX_RETRIES) {
+                    throw error;
+                }
+                // 网络中断或服务端错误：退避后查询断点再继续
+                await sleep(Math.min(30000, 1000 * Math.pow(2, failures)));
+                try {
+                    offset = (await request('GET', base, csrfToken)).offset;
+                } catch (ignored) {
+                    // 仍未恢复，下一轮重试
+                }
+            }
+            onProgress(offset / file.size);
+        }
+        await request('POST', base + '/complete', csrfToken, '{}', { 'Content-Type': 'application/json' });
+        return info.upload_id;
+    }
+
+    document.addEventListener('DOMContentLoaded', function() {
+        document.querySelectorAll('input[type="file"][data-upload-field]').forEach(function(input) {
+            const form = input.form;
+            if (!form || form.dataset.chunkedUpload) {
+                return;
+            }
+            form.dataset.chunkedUpload = '1';
+
+            form.addEventListener('submit', async function(event) {
+                const pending = Array.from(form.querySelectorAll('input[type="file"][data-upload-field]'))
+                    .filter(function(el) { return el.files && el.files.length && !el.disabled; });
+                if (!pending.length) {
+                    return;
+                }
+                event.preventDefault();
+                const csrfInput = form.querySelector('input[name="csrf_token"]');
+                const csrfToken = csrfInput ? csrfInput.value : '';
+                const button = form.querySelector('button[type="submit"]');
+                const buttonText = button ? button.textContent : '';
+                if (button) {
+                    button.disabled = true;
+                }
+
+                try {
+                    for (const el of pending) {
+                        const target = form.querySelector('input[name="' + el.dataset.uploadField + '"]');
+                        target.value = await uploadFile(el.files[0], csrfToken, function(ratio) {
+                            if (button) {
+                                button.textContent = '上传中 ' + Math.floor(ratio * 100) + '%';
+                            }
+                        });
+                        // 文件已上传，表单只提交上传 ID
+                        el.required = false;
+                        el.disabled = true;
+                    }
+                    form.submit();
+                } catch (error) {
+                    alert('凭证上传失败：' + error.message + '，请检查网络后重新保存。');
+                    if (button) {
+                        button.disabled = false;
+                        button.textContent = buttonText;
+                    }
+                }
+            });
+        });
+    });
+})();
@@ -0,0 +1,103 @@
+// app/static/js/heatmap.js
+
+/**
+ * 月度上报热力图
+ * 功能：从 /main/heatmap/data 取回所有门店当月的进度位图（每个门店每天一个字节，base64 编码），
+ *      在浏览器中解码并绘制门店 × 日期表格；不为每个单元格单独请求数据。
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    const table = document.getElementById('heatmap');
+    if (!table) {
+        return;
+    }
+    const statusLabel = document.getElementById('heatmap-status');
+    const STEP_BITS = ['pos_info_completed', 'takeaway_info_completed', 'bank_info_completed'];
+    const LABELS = {
+        pos_info_completed: 'POS', takeaway_info_completed: '外卖', bank_info_completed: '银行',
+        is_submitted: '已提交', archived: '已归档'
+    };
+
+    function decode(text) {
+        const raw = atob(text);
+        const bytes = new Uint8Array(raw.length);
+        for (let i = 0; i < raw.length; i++) {
+            bytes[i] = raw.charCodeAt(i);
+        }
+        return bytes;
+    }
+
+    function describe(mask, bits) {
+        if (!(mask & bits.reported)) {
+            return '没有日报';
+        }
+        return Object.keys(LABELS).map(function(name) {
+            return LABELS[name] + (mask & bits[name] ? '✔' : '✘');
+        }).join(' ');
+    }
+
+    function fillCell(cell, mask, bits) {
+        if (!(mask & bits.reported)) {
+            cell.className = 'table-danger';
+            cell.textContent = '✕';
+        } else if (mask & bits.archived) {
+            cell.className = 'table-success';
+        } else if (mask & bits.is_submitted) {
+            cell.className = 'table-info';
+        } else {
+            const steps = STEP_BITS.filter(function(name) { return mask & bits[name]; }).length;
+            cell.className = 'table-warning';
+            cell.textContent = steps + '/3';
+        }
+    }
+
+    function render(data) {
+        const masks = decode(data.masks);
+        const bits = data.bits;
+        const fragment = document.createDocumentFragment();
+
+        const head = document.createElement('thead');
+        const headRow = head.insertRow();
+        headRow.appendChild(document.createElement('th')).textContent = '门店';
+        for (let day = 1; day <= data.days; day++) {
+            headRow.appendChild(document.createElement('th')).textContent = day;
+        }
+        fragment.appendChild(head);
+
+        // 今天之后的日期不着色
+        const today = table.dataset.today;
+        const body = document.createElement('tbody');
+        data.stores.forEach(function(store, index) {
+            const row = body.insertRow();
+            const name = row.insertCell();
+            name.className = 'text-start text-nowrap';
+            name.textContent = store[0] + ' ' + store[1];
+            for (let day = 1; day <= data.days; day++) {
+                const cell = row.insertCell();
+                const iso = data.month + '-' + String(day).padStart(2, '0');
+                if (iso > today) {
+                    continue;
+                }
+                const mask = masks[index * data.days + day - 1];
+                fillCell(cell, mask, bits);
+                cell.title = iso + ' ' + describe(mask, bits);
+            }
+        });
+        fragment.appendChild(body);
+
+        table.replaceChildren(fragment);
+        statusLabel.textContent = data.month + '，共 ' + data.stores.length + ' 个门店';
+    }
+
+    fetch(table.dataset.url, { credentials: 'same-origin' })
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status);
+            }
+            return response.json();
+        })
+        .then(render)
+        .catch(function(error) {
+            statusLabel.textContent = '加载失败：' + error.message;
+        });
+});
@@ -0,0 +1,55 @@
+// app/static/js/live_feed.js
+
+/**
+ * 首页"今日上报进度"实时更新
+ * 功能：订阅 /main/live 的 Server-Sent Events，门店完成步骤、最终提交或归档时只更新对应单元格，
+ *      不再需要整页刷新。断线后由 EventSource 自动重连（带 Last-Event-ID，不会漏事件）。
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    const table = document.getElementById('live-progress');
+    if (!table || !window.EventSource) {
+        return;
+    }
+    const reportDate = table.dataset.reportDate;
+    const feed = document.getElementById('live-feed');
+    const statusLabel = document.getElementById('live-status');
+    const labels = { pos: 'POS', takeaway: '外卖', bank: '银行' };
+
+    function markCell(storeId, field) {
+        const row = table.querySelector('tr[data-store-id="' + CSS.escape(storeId) + '"]');
+        const cell = row && row.querySelector('td[data-field="' + field + '"]');
+        if (cell) {
+            cell.textContent = '✔';
+            cell.classList.add('table-success');
+        }
+    }
+
+    function addFeedItem(text) {
+        const item = document.createElement('li');
+        item.textContent = new Date().toLocaleTimeString() + '  ' + text;
+        feed.prepend(item);
+        while (feed.children.length > 20) {
+            feed.removeChild(feed.lastChild);
+        }
+    }
+
+    function handle(type, field, describe) {
+        source.addEventListener(type, function(e) {
+            const data = JSON.parse(e.data);
+            // 其它日期的补报只记入动态列表，不改动今日进度表
+            if (data.report_date === reportDate) {
+                markCell(data.store_id, field(data));
+            }
+            addFeedItem('店铺 ' + data.store_id + '（' + data.report_date + '）' + describe(data));
+        });
+    }
+
+    const source = new EventSource(table.dataset.streamUrl);
+    handle('step_completed', function(d) { return d.step; }, function(d) { return '完成' + (labels[d.step] || d.step) + '信息'; });
+    handle('submitted', function() { return 'submitted'; }, function() { return '已最终提交'; });
+    handle('archived', function() { return 'archived'; }, function() { return '已归档'; });
+
+    source.onopen = function() { statusLabel.textContent = '实时更新'; };
+    source.onerror = function() { statusLabel.textContent = '连接中断，正在重连…'; };
+});
@@ -0,0 +1,88 @@
+# app/utils/archive_mover.py
+
+from datetime import date, datetime
+
+import sqlalchemy as sa
+from app.extensions import db
+from app.models import (
+    DailySales,
+    DailySalesAttachments,
+    DailySalesAttachmentsHistory,
+    DailySalesHistory,
+)
+from app.utils.cache import invalidate_on_commit
+from app.utils.jobs import job
+
+
+def months_ago(today, months):
+    """返回 today 所在月往前推 months 个月的月初日期"""
+    index = today.year * 12 + (today.month - 1) - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _shared_columns(source, target, exclude=()):
+    """源表与目标表同名的列（目标表中的额外列如 moved_at 单独赋值）"""
+    return [c.name for c in target.columns if c.name in source.c and c.name not in exclude]
+
+
+def move_archived_reports(older_than_months=6, batch_size=500, today=None, progress=None):
+    """
+    功能：将 report_date 早于保留期的已归档日报（连同附件记录）分批迁入历史表。
+    说明：
+        每批在一个事务中完成"复制到历史表 → 删除热表记录"，批与批之间提交，
+        避免长事务长时间锁表；中途中断后重新执行即可从剩余记录继续。
+    参数：
+        older_than_months (int): 保留在热表中的月数（按自然月计算）。
+        batch_size (int): 每批迁移的日报条数。
+        today (date): 计算截止日期的基准日，默认今天。
+        progress (callable): 每批完成后回调 progress(本批条数, 累计条数)。
+    返回：
+        int: 迁移的日报总条数。
+    """
+    cutoff = months_ago(today or date.today(), older_than_months)
+    hot, hot_att = DailySales.__table__, DailySalesAttachments.__table__
+    cold, cold_att = DailySalesHistory.__table__, DailySalesAttachmentsHistory.__table__
+    report_cols = _shared_columns(hot, cold, exclude=("moved_at",))
+    attachment_cols = _shared_columns(hot_att, cold_att)
+
+    total = 0
+    while True:
+        report_ids = db.session.execute(
+            sa.select(hot.c.report_id)
+            .where(hot.c.archived == sa.true(), hot.c.report_date < cutoff)
+            .order_by(hot.c.report_id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not report_ids:
+            break
+
+        try:
+            moved_at = datetime.utcnow()
+            db.session.execute(cold.insert().from_select(
+                report_cols + ["moved_at"],
+                sa.select(*[hot.c[name] for name in report_cols], sa.literal(moved_at, sa.DateTime))
+                .where(hot.c.report_id.in_(report_ids))
+            ))
+            db.session.execute(cold_att.insert().from_select(
+                attachment_cols,
+                sa.select(*[hot_att.c[name] for name in attachment_cols])
+                .where(hot_att.c.report_id.in_(report_ids))
+            ))
+            db.session.execute(hot_att.delete().where(hot_att.c.report_id.in_(report_ids)))
+            db.session.execute(hot.delete().where(hot.c.report_id.in_(report_ids)))
+            invalidate_on_commit(db.session, "report_facets")
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        total += len(report_ids)
+        if progress is not None:
+            progress(len(report_ids), total)
+    return total
+
+
+@job("archive_reports", max_attempts=2)
+def archive_reports_job(older_than_months=6, batch_size=500):
+    """后台任务版本：由管理页面触发，避免在请求内执行长时间的迁移"""
+    move_archived_reports(older_than_months=older_than_months, batch_size=batch_size)
@@ -0,0 +1,118 @@
+# app/utils/assets.py
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+from flask import current_app, url_for
+
+try:  # brotli 为可选依赖，未安装时只生成 gzip 版本
+    import brotli
+except ImportError:  # pragma: no cover - 取决于部署环境
+    brotli = None
+
+# 指纹化后的文件统一输出到 static/dist 目录，便于 nginx 对其设置长期缓存
+BUILD_SUBDIR = "dist"
+MANIFEST_NAME = "manifest.json"
+
+# 只对文本类资源做预压缩，图片等已压缩格式再压缩没有收益
+COMPRESSIBLE_EXTENSIONS = {".js", ".css", ".svg", ".json", ".html", ".txt", ".map"}
+
+
+def _file_digest(path, length=10):
+    """计算文件内容的 sha256 摘要，取前 length 位作为指纹"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()[:length]
+
+
+def _write_compressed(path):
+    """
+    功能：为指纹化后的文件写出 .gz（以及可用时的 .br）预压缩版本。
+    返回：
+        list[str]: 生成的压缩文件扩展名列表。
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    written = []
+    # mtime=0 保证同样内容的构建结果字节一致
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(".gz")
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+        written.append(".br")
+    return written
+
+
+def build_assets(static_folder, clean=False):
+    """
+    功能：对 static 目录下的源文件做内容指纹化，写出预压缩版本和 manifest。
+    参数：
+        static_folder (str): 静态文件根目录（通常是 app.static_folder）。
+        clean (bool): 是否在构建前清空旧的 dist 目录。
+            默认保留旧文件，避免发布过程中仍在使用旧页面的客户端 404。
+    返回：
+        dict: manifest，键为源文件相对路径，值为指纹化后的相对路径。
+    """
+    build_dir = os.path.join(static_folder, BUILD_SUBDIR)
+    if clean and os.path.isdir(build_dir):
+        shutil.rmtree(build_dir)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        # 跳过构建输出目录本身
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != build_dir]
+        for name in sorted(files):
+            if name.endswith((".gz", ".br")):
+                continue
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, static_folder).replace(os.sep, "/")
+            stem, ext = os.path.splitext(rel)
+            hashed_rel = f"{BUILD_SUBDIR}/{stem}.{_file_digest(src)}{ext}"
+            dest = os.path.join(static_folder, hashed_rel)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if not os.path.exists(dest):
+                shutil.copy2(src, dest)
+                if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+                    _write_compressed(dest)
+            manifest[rel] = hashed_rel
+
+    os.makedirs(build_dir, exist_ok=True)
+    with open(os.path.join(build_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(app):
+    """读取 dist/manifest.json；未执行过 build-assets 时返回空字典"""
+    path = os.path.join(app.static_folder, BUILD_SUBDIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        app.logger.warning(f"静态资源 manifest 读取失败，将使用未指纹化的地址: {e}")
+        return {}
+
+
+def static_url(filename):
+    """
+    模板辅助函数：返回静态文件的地址。
+    已构建时返回指纹化后的不可变地址，否则回退到普通的 static 地址。
+    用法：{{ static_url('js/script.js') }}
+    """
+    manifest = current_app.extensions.get("asset_manifest", {})
+    return url_for("static", filename=manifest.get(filename, filename))
+
+
+def init_app(app):
+    """在应用工厂中加载 manifest 并注册 static_url 模板函数"""
+    app.extensions["asset_manifest"] = {} if app.debug else load_manifest(app)
+    app.jinja_env.globals["static_url"] = static_url
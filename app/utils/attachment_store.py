@@ -0,0 +1,203 @@
+# app/utils/attachment_store.py
+
+import logging
+import os
+import zipfile
+from collections import defaultdict
+from datetime import date
+
+import sqlalchemy as sa
+from flask import current_app
+
+from app.extensions import db
+from app.models import DailySales, DailySalesAttachments, DailySalesAttachmentsHistory, DailySalesHistory
+from app.utils.archive_mover import months_ago
+from app.utils.jobs import job
+
+logger = logging.getLogger(__name__)
+
+# 冷存储中的附件 file_path 形如 cold://2024-05.3.zip/<attachment_id>/<原文件名>（每批一个归档，写成后不再修改）
+COLD_PREFIX = "cold://"
+# 本身已压缩的格式原样存入归档，再次 deflate 几乎没有收益，只浪费 CPU
+STORED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".zip", ".gz"}
+
+
+def cold_folder():
+    """冷存储目录：默认为 <UPLOAD_FOLDER>/.cold，多台服务器部署时需放在共享目录"""
+    return current_app.config.get("ATTACHMENT_COLD_DIR") or os.path.join(
+        current_app.config.get("UPLOAD_FOLDER", "uploads"), ".cold"
+    )
+
+
+def is_cold(file_path):
+    return bool(file_path) and file_path.startswith(COLD_PREFIX)
+
+
+def _locate(file_path):
+    """cold:// 路径 -> (归档文件的本地路径, 归档内的成员名)"""
+    archive, _, member = file_path[len(COLD_PREFIX):].partition("/")
+    if not archive.endswith(".zip") or os.path.basename(archive) != archive or not member:
+        raise FileNotFoundError(f"无效的冷存储路径: {file_path}")
+    return os.path.join(cold_folder(), archive), member
+
+
+def attachment_name(file_path):
+    """附件的原始文件名（下载时使用），热存储与冷存储一致"""
+    return os.path.basename(file_path or "")
+
+
+def open_attachment(file_path):
+    """
+    功能：以二进制只读方式打开附件，调用方无需关心文件在热存储还是冷存储。
+    说明：
+        冷存储的附件通过 ZIP 中央目录定位到成员的偏移量后只解压该成员，不展开整个归档。
+    返回：
+        二进制文件对象（用完需关闭）。
+    异常：
+        FileNotFoundError: 文件或归档成员不存在。
+    """
+    if not file_path:
+        raise FileNotFoundError("附件没有文件路径")
+    if not is_cold(file_path):
+        return open(file_path, "rb")
+    archive, member = _locate(file_path)
+    # 返回的成员文件对象持有归档文件句柄，ZipFile 关闭后仍可读取，关闭成员时才真正关闭归档
+    with zipfile.ZipFile(archive) as zf:
+        try:
+            return zf.open(member)
+        except KeyError:
+            raise FileNotFoundError(f"归档 {os.path.basename(archive)} 中没有 {member}")
+
+
+def _reserve_archive_name(folder, month):
+    """占用一个新的归档文件名 YYYY-MM.<n>.zip：以 O_EXCL 创建占位文件，多个进程同时归档也不会重名"""
+    n = 1
+    while True:
+        name = f"{month}.{n}.zip"
+        try:
+            os.close(os.open(os.path.join(folder, name), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return name
+        except FileExistsError:
+            n += 1
+
+
+def _fsync_dir(folder):
+    """同步目录项，保证 os.replace 后的文件名在断电后仍然存在（Windows 无法打开目录，跳过）"""
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_archive(folder, month, items):
+    """
+    把 [(attachment_id, 热存储路径)] 写入一个新的月度归档，返回 {attachment_id: cold:// 路径}。
+    已被数据库引用的归档从不修改：先写临时文件并落盘，再原子替换为正式文件名并同步目录，之后才提交数据库。
+    中途中断最多留下未被引用的临时文件或归档，重新执行时这些附件写入另一个新归档。
+    """
+    name = _reserve_archive_name(folder, month)
+    path = os.path.join(folder, name)
+    tmp_path = path + ".tmp"
+    paths = {}
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for attachment_id, file_path in items:
+            member = f"{attachment_id}/{os.path.basename(file_path)}"
+            stored = os.path.splitext(file_path)[1].lower() in STORED_EXTENSIONS
+            zf.write(file_path, member, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+            paths[attachment_id] = f"{COLD_PREFIX}{name}/{member}"
+    with open(tmp_path, "ab") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(folder)
+    return paths
+
+
+def _archive_batch(table, rows):
+    """归档一批附件：写入新的月度归档并落盘 → 更新 file_path 并提交 → 删除原文件。返回归档的附件数"""
+    by_month = defaultdict(list)
+    for attachment_id, file_path, report_date in rows:
+        if os.path.isfile(file_path):
+            by_month[report_date.strftime("%Y-%m")].append((attachment_id, file_path))
+        else:
+            logger.warning(f"附件 {attachment_id} 的文件不存在，跳过冷存储: {file_path}")
+    if not by_month:
+        return 0
+
+    folder = cold_folder()
+    os.makedirs(folder, exist_ok=True)
+    hot_paths = {attachment_id: file_path for items in by_month.values() for attachment_id, file_path in items}
+    cold_paths = {}
+    for month, items in sorted(by_month.items()):
+        cold_paths.update(_write_archive(folder, month, items))
+
+    try:
+        db.session.execute(
+            table.update().where(table.c.attachment_id == sa.bindparam("b_id"))
+            .values(file_path=sa.bindparam("b_path")),
+            [{"b_id": attachment_id, "b_path": path} for attachment_id, path in cold_paths.items()],
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    for attachment_id in cold_paths:
+        try:
+            os.remove(hot_paths[attachment_id])
+        except OSError:
+            pass
+    return len(cold_paths)
+
+
+def archive_attachments(older_than_months=3, batch_size=200, today=None, progress=None):
+    """
+    功能：把营业日期早于保留期的已归档日报的附件打包进按月划分的压缩归档（<冷存储目录>/YYYY-MM.<n>.zip），
+         file_path 改写为 cold:// 路径，并删除上传目录中的原文件。
+    说明：
+        热表与历史表的附件都会处理；每批写入新的归档并落盘后才提交数据库、最后删除原文件，
+        已提交的归档不再修改，中途中断不会损坏已归档的附件，重新执行即可继续。
+        读取附件统一使用 open_attachment()，冷存储的附件只解压所需的单个成员。
+    参数：
+        older_than_months (int): 保留在上传目录中的月数（按自然月计算）。
+        batch_size (int): 每批处理的附件条数。
+        today (date): 计算截止日期的基准日，默认今天。
+        progress (callable): 每批完成后回调 progress(本批归档数, 累计归档数)。
+    返回：
+        int: 归档的附件总数。
+    """
+    cutoff = months_ago(today or date.today(), older_than_months)
+    total = 0
+    for attachment_model, report_model in ((DailySalesAttachments, DailySales),
+                                           (DailySalesAttachmentsHistory, DailySalesHistory)):
+        attachments, reports = attachment_model.__table__, report_model.__table__
+        last_id = 0
+        while True:
+            # 按主键递增分页：文件缺失而跳过的附件不会被反复选中
+            rows = db.session.execute(
+                sa.select(attachments.c.attachment_id, attachments.c.file_path, reports.c.report_date)
+                .join(reports, reports.c.report_id == attachments.c.report_id)
+                .where(attachments.c.attachment_id > last_id,
+                       reports.c.archived == sa.true(), reports.c.report_date < cutoff,
+                       attachments.c.file_path.is_not(None),
+                       sa.not_(attachments.c.file_path.startswith(COLD_PREFIX)))
+                .order_by(attachments.c.attachment_id)
+                .limit(batch_size)
+            ).all()
+            db.session.commit()
+            if not rows:
+                break
+            last_id = rows[-1].attachment_id
+            count = _archive_batch(attachments, rows)
+            total += count
+            if progress is not None:
+                progress(count, total)
+    return total
+
+
+@job("archive_attachments", max_attempts=2)
+def archive_attachments_job(older_than_months=3, batch_size=200):
+    """后台任务版本：由管理页面触发"""
+    archive_attachments(older_than_months=older_than_months, batch_size=batch_size)
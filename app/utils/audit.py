@@ -0,0 +1,184 @@
+# app/utils/audit.py
+
+import atexit
+import enum
+import os
+import threading
+from datetime import datetime
+
+from flask import has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event, inspect
+
+from app.extensions import db
+from app.models import DailySales, DailySalesAudit
+from app.utils.db_routing import RoutingSession
+
+# 需要审计的 DailySales 字段；实际营业额是生成列（到账金额 + 代金券），审计其两个来源字段即可
+AUDITED_FIELDS = ("bank_deposit", "voucher_amount", "financial_check_status")
+
+
+def _format(value):
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{value:.2f}"  # 金额统一两位小数，避免 100 与 100.0 被当成不同的值
+    return str(value)[:255]
+
+
+def _actor():
+    """当前操作人与来源；命令行、后台任务等没有登录用户的场景只记录来源"""
+    if has_request_context():
+        source = f"{request.method} {request.endpoint or request.path}"
+        if current_user and current_user.is_authenticated:
+            return current_user.user_id, current_user.username, source
+        return None, None, source
+    return None, None, "cli"
+
+
+class AuditBuffer:
+    """
+    审计记录的进程内缓冲区（write-behind）。
+    业务事务提交后只把记录放进内存，由后台线程每 AUDIT_FLUSH_INTERVAL 秒
+    或积累到 AUDIT_BATCH_SIZE 条时批量写入 daily_sales_audit；进程退出时再写一次。
+    """
+
+    def __init__(self):
+        self.app = None
+        self._records = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        if self.app is None:
+            atexit.register(self._flush_at_exit)
+        self.app = app
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            self.app.logger.exception(f"进程退出时审计记录写入失败，丢失 {self.pending()} 条")
+
+    def add(self, records):
+        with self._lock:
+            self._records.extend(records)
+            size = len(self._records)
+        if self.app is None or not self.app.config.get("AUDIT_WRITE_BEHIND", True):
+            self.flush()
+            return
+        self._ensure_thread()
+        if size >= self.app.config.get("AUDIT_BATCH_SIZE", 200):
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        # gunicorn fork 出的 worker 不继承父进程的线程，按进程号判断是否需要重新启动
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = self.app.config.get("AUDIT_FLUSH_INTERVAL", 5)
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("审计记录批量写入失败，将在下次重试")
+
+    def flush(self):
+        """将缓冲区中的记录一次性写入数据库；写入失败时放回缓冲区"""
+        if self.app is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                records, self._records = self._records, []
+            if not records:
+                return 0
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        conn.execute(DailySalesAudit.__table__.insert(), records)
+            except Exception:
+                with self._lock:
+                    self._records[:0] = records
+                raise
+            return len(records)
+
+    def pending(self):
+        with self._lock:
+            return len(self._records)
+
+
+buffer = AuditBuffer()
+
+
+def queue_change(session, report, field_name, old, new):
+    """
+    登记一条日报字段变更，事务提交后进入缓冲区（回滚则丢弃）。
+    ORM 修改由 before_flush 自动登记；不经过 flush 的条件 UPDATE（见 report_transitions）需显式调用。
+    """
+    if _format(old) == _format(new):
+        return
+    user_id, username, source = _actor()
+    session.info.setdefault("pending_audit", []).append({
+        "obj": report,
+        "store_id": report.store_id,
+        "report_date": report.report_date,
+        "field_name": field_name,
+        "old_value": _format(old),
+        "new_value": _format(new),
+        "user_id": user_id,
+        "username": username,
+        "source": source,
+        "changed_at": datetime.utcnow(),
+    })
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _capture_changes(session, flush_context, instances):
+    """flush 前比对 DailySales 审计字段的新旧值，暂存到会话中，事务提交后再进入缓冲区"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, DailySales):
+            continue
+        state = inspect(obj)
+        for name in AUDITED_FIELDS:
+            history = state.attrs[name].history
+            if history.added:
+                queue_change(session, obj, name, history.deleted[0] if history.deleted else None, history.added[0])
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _enqueue_audit(session):
+    pending = session.info.pop("pending_audit", None)
+    if not pending:
+        return
+    records = []
+    for change in pending:
+        # 新建的日报在 before_flush 时还没有主键；提交后属性已过期，主键从 identity 读取，避免再次查询
+        identity = inspect(change.pop("obj")).identity
+        if identity is None:
+            continue
+        records.append({"report_id": identity[0], **change})
+    if records:
+        buffer.add(records)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_audit(session):
+    session.info.pop("pending_audit", None)
+
+
+def init_app(app):
+    buffer.init_app(app)
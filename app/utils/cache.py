@@ -0,0 +1,391 @@
+# app/utils/cache.py
+
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from app.models import DailySales, Store
+from app.utils.db_routing import RoutingSession
+
+try:  # redis 为可选依赖，只有 CACHE_SHARED_BACKEND=redis 时才需要
+    import redis
+except ImportError:  # pragma: no cover - 取决于部署环境
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# 已使用的命名空间及说明（管理页面据此列出可手动失效的缓存）
+NAMESPACES = {
+    "stores": "门店列表",
+    "dashboard": "首页营业额汇总",
+    "report_facets": "日报检索分面计数",
+}
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """进程内缓存层：按最近使用淘汰，条目数不超过 max_items，每个条目有各自的过期时间"""
+
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return _MISSING
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._items if k.startswith(prefix)]:
+                del self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class MemoryBackend:
+    """共享层的进程内替身：接口与其它共享层一致，用于测试与单进程开发环境"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._items = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+        if item is None or item[0] < time.time():
+            return None
+        return item[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._items[key] = (time.time() + ttl, value)
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            return self._generations[namespace]
+
+
+class SQLiteBackend:
+    """
+    共享层：本机 SQLite 文件（WAL 模式），同一台服务器上的所有 gunicorn worker 共用。
+    每个线程使用各自的连接；fork 出的 worker 按进程号重新连接。
+    """
+
+    name = "sqlite"
+    # 每写入多少次清理一次过期条目
+    PRUNE_EVERY = 500
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_entries "
+                     "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_generations "
+                     "(namespace TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                     (key, value, now + ttl))
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+
+    def generation(self, namespace):
+        row = self._connect().execute(
+            "SELECT value FROM cache_generations WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self, namespace):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT INTO cache_generations (namespace, value) VALUES (?, 1) "
+                         "ON CONFLICT(namespace) DO UPDATE SET value = value + 1", (namespace,))
+            value = conn.execute("SELECT value FROM cache_generations WHERE namespace = ?",
+                                 (namespace,)).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+
+class RedisBackend:
+    """共享层：Redis，适用于多台服务器共用缓存"""
+
+    name = "redis"
+
+    def __init__(self, url, prefix="mxbi:cache:"):
+        if redis is None:
+            raise RuntimeError("CACHE_SHARED_BACKEND=redis 需要安装 redis 包")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    def generation(self, namespace):
+        return int(self.client.get(f"{self.prefix}gen:{namespace}") or 0)
+
+    def bump_generation(self, namespace):
+        return int(self.client.incr(f"{self.prefix}gen:{namespace}"))
+
+
+def create_backend(app):
+    """按 CACHE_SHARED_BACKEND 创建共享层：sqlite（默认）、redis、memory（测试替身）"""
+    kind = app.config.get("CACHE_SHARED_BACKEND", "sqlite")
+    if kind == "sqlite":
+        return SQLiteBackend(app.config["CACHE_SQLITE_PATH"])
+    if kind == "redis":
+        return RedisBackend(app.config["CACHE_REDIS_URL"])
+    if kind == "memory":
+        return MemoryBackend()
+    raise ValueError(f"未知的 CACHE_SHARED_BACKEND: {kind}")
+
+
+class TwoTierCache:
+    """
+    两级缓存：进程内 LRU 在前，多个 worker 共用的共享层在后。
+    说明：
+        - 读取先查本进程，未命中再查共享层，共享层命中后回填本进程；都未命中才调用 factory 计算；
+        - 按命名空间失效：每个命名空间有一个保存在共享层的版本号，失效即版本号加一，
+          旧版本的键自然不再被读到（随 TTL 过期）；其它 worker 最多在 CACHE_SYNC_SECONDS 内察觉；
+        - 共享层出错时只计数并直接计算，不影响请求。
+    值用 pickle 序列化，共享层必须是受信任的存储。
+    """
+
+    def __init__(self):
+        self.app = None
+        self.local = LocalLRU(1024)
+        self.shared = None
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def init_app(self, app):
+        self.app = app
+        self.local = LocalLRU(app.config.get("CACHE_LOCAL_MAX_ITEMS", 1024))
+        # CACHE_SHARED_BACKEND=none 表示只用进程内缓存
+        self.shared = None if app.config.get("CACHE_SHARED_BACKEND") == "none" else create_backend(app)
+        self._generations = {}
+        self.reset_stats()
+        app.extensions["two_tier_cache"] = self
+
+    def reset_stats(self):
+        self._stats = {
+            "local": {"hits": 0, "misses": 0, "sets": 0},
+            "shared": {"hits": 0, "misses": 0, "sets": 0, "errors": 0},
+            "loads": 0,
+            "invalidations": 0,
+        }
+
+    def _config(self, name, default):
+        return self.app.config.get(name, default) if self.app is not None else default
+
+    def _shared_call(self, method, *args):
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception as e:
+            self._stats["shared"]["errors"] += 1
+            logger.warning(f"共享缓存 {self.shared.name}.{method} 失败: {e}")
+            return None
+
+    def _generation(self, namespace):
+        now = time.monotonic()
+        cached = self._generations.get(namespace)
+        if cached is not None and now - cached[1] < self._config("CACHE_SYNC_SECONDS", 1.0):
+            return cached[0]
+        generation = cached[0] if cached else 0
+        if self.shared is not None:
+            value = self._shared_call("generation", namespace)
+            if value is not None:
+                generation = value
+        self._generations[namespace] = (generation, now)
+        return generation
+
+    def _full_key(self, namespace, key):
+        raw = "|".join(str(p) for p in key) if isinstance(key, (tuple, list)) else str(key)
+        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+        return f"{namespace}:{self._generation(namespace)}:{digest}"
+
+    def get(self, namespace, key, default=None):
+        return self._get(self._full_key(namespace, key), default)
+
+    def _get(self, full_key, default):
+        value = self.local.get(full_key)
+        if value is not _MISSING:
+            self._stats["local"]["hits"] += 1
+            return value
+        self._stats["local"]["misses"] += 1
+        if self.shared is None:
+            return default
+        raw = self._shared_call("get", full_key)
+        if raw is None:
+            self._stats["shared"]["misses"] += 1
+            return default
+        self._stats["shared"]["hits"] += 1
+        value = pickle.loads(raw)
+        self.local.set(full_key, value, self._config("CACHE_LOCAL_TTL", 30))
+        return value
+
+    def set(self, namespace, key, value, ttl=None):
+        self._set(self._full_key(namespace, key), value, ttl)
+
+    def _set(self, full_key, value, ttl):
+        ttl = ttl or self._config("CACHE_DEFAULT_TTL", 300)
+        self.local.set(full_key, value, min(ttl, self._config("CACHE_LOCAL_TTL", 30)))
+        self._stats["local"]["sets"] += 1
+        if self.shared is not None:
+            self._shared_call("set", full_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ttl)
+            self._stats["shared"]["sets"] += 1
+
+    def get_or_set(self, namespace, key, factory, ttl=None):
+        """
+        功能：读取缓存，两级都未命中时调用 factory() 计算并写入两级缓存。
+        参数：
+            namespace (str): 命名空间，失效以命名空间为单位。
+            key: 字符串或由可转为字符串的元素组成的元组。
+            ttl (int): 共享层过期秒数，默认 CACHE_DEFAULT_TTL；进程内层不超过 CACHE_LOCAL_TTL。
+        说明：
+            写入计算前读取时的版本号下：计算期间命名空间被失效时，结果只会写进旧版本的键，不会被后续读取。
+        """
+        full_key = self._full_key(namespace, key)
+        value = self._get(full_key, _MISSING)
+        if value is _MISSING:
+            self._stats["loads"] += 1
+            value = factory()
+            self._set(full_key, value, ttl)
+        return value
+
+    def invalidate(self, namespace):
+        """立即使命名空间下的全部缓存失效（本进程立即生效，其它 worker 在 CACHE_SYNC_SECONDS 内生效）"""
+        with self._lock:
+            generation = self._generations.get(namespace, (0, 0))[0] + 1
+            if self.shared is not None:
+                value = self._shared_call("bump_generation", namespace)
+                if value is not None:
+                    generation = value
+            self._generations[namespace] = (generation, time.monotonic())
+        self.local.delete_prefix(f"{namespace}:")
+        self._stats["invalidations"] += 1
+
+    def stats(self):
+        """本进程的分级统计：各层命中/未命中/写入次数与命中率，进程内层的条目数与淘汰数"""
+        result = {
+            "local": {**self._stats["local"], "size": len(self.local), "max_items": self.local.max_items,
+                      "evictions": self.local.evictions},
+            "shared": {**self._stats["shared"], "backend": self.shared.name if self.shared else "none"},
+            "loads": self._stats["loads"],
+            "invalidations": self._stats["invalidations"],
+        }
+        for tier in ("local", "shared"):
+            lookups = result[tier]["hits"] + result[tier]["misses"]
+            result[tier]["hit_rate"] = round(result[tier]["hits"] / lookups, 3) if lookups else None
+        return result
+
+
+cache = TwoTierCache()
+
+
+def invalidate_on_commit(session, *namespaces):
+    """登记在当前事务提交后失效的命名空间（回滚则不失效），供写入路径调用"""
+    session.info.setdefault("cache_invalidate", set()).update(namespaces)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _invalidate_after_commit(session):
+    for namespace in session.info.pop("cache_invalidate", ()):
+        cache.invalidate(namespace)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("cache_invalidate", None)
+
+
+# 通过 ORM 修改这些模型时，提交后失效对应的命名空间
+# （apply_transition 等直接执行 UPDATE 的路径自行调用 invalidate_on_commit）
+_MODEL_NAMESPACES = ((Store, ("stores",)), (DailySales, ("dashboard", "report_facets")))
+
+
+def _register_model_invalidation(model, namespaces):
+    def queue(mapper, connection, target):
+        session = RoutingSession.object_session(target)
+        if session is not None:
+            invalidate_on_commit(session, *namespaces)
+
+    for name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, name, queue)
+
+
+for _model, _namespaces in _MODEL_NAMESPACES:
+    _register_model_invalidation(_model, _namespaces)
+
+
+def init_app(app):
+    cache.init_app(app)
+    return app
@@ -0,0 +1,272 @@
+# app/utils/chunked_upload.py
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+import zlib
+
+from flask import current_app
+from sqlalchemy import event
+from werkzeug.utils import secure_filename
+
+try:
+    import fcntl  # 仅 Linux/macOS；Windows 本地开发时退化为不加锁
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from app.utils.db_routing import RoutingSession
+
+# 与 SalesForm 中凭证字段的 FileAllowed 保持一致
+ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "pdf"}
+
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    """分片上传请求无效；status 为应返回的 HTTP 状态码，offset 为服务端已接收的字节数（客户端据此续传）"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def _partial_dir():
+    folder = current_app.config.get("UPLOAD_PARTIAL_DIR") or os.path.join(
+        current_app.config.get("UPLOAD_FOLDER", "uploads"), ".partial"
+    )
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _paths(upload_id):
+    if not _UPLOAD_ID_RE.match(upload_id or ""):
+        raise UploadError("上传 ID 无效", 404)
+    folder = _partial_dir()
+    return os.path.join(folder, upload_id + ".json"), os.path.join(folder, upload_id + ".part")
+
+
+def _write_meta(meta_path, meta):
+    # 先写临时文件再替换，其它 worker 不会读到写了一半的元数据
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+
+
+def _load(upload_id, user_id):
+    meta_path, part_path = _paths(upload_id)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise UploadError("上传不存在或已过期", 404)
+    if meta["user_id"] != user_id:
+        raise UploadError("上传不存在或已过期", 404)
+    return meta, meta_path, part_path
+
+
+def _received(part_path):
+    """暂存文件已接收的字节数；文件已被移入正式目录（正在随日报提交）时视为不存在"""
+    try:
+        return os.path.getsize(part_path)
+    except FileNotFoundError:
+        raise UploadError("上传不存在或已过期", 404)
+
+
+def _status(meta, offset):
+    return {
+        "upload_id": meta["upload_id"],
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "offset": offset,
+        "completed": meta["completed"],
+        "chunk_size": current_app.config["UPLOAD_CHUNK_BYTES"],
+    }
+
+
+def purge_expired():
+    """删除超过 UPLOAD_EXPIRE_HOURS 未更新的上传（包括已完成但未随日报提交的）；返回删除的个数"""
+    folder = _partial_dir()
+    deadline = time.time() - current_app.config["UPLOAD_EXPIRE_HOURS"] * 3600
+    removed = 0
+    for name in os.listdir(folder):
+        if not name.endswith(".json"):
+            continue
+        meta_path = os.path.join(folder, name)
+        try:
+            if os.path.getmtime(meta_path) >= deadline:
+                continue
+            os.remove(meta_path)
+        except FileNotFoundError:
+            continue
+        try:
+            os.remove(meta_path[:-len(".json")] + ".part")
+        except FileNotFoundError:
+            pass
+        removed += 1
+    return removed
+
+
+def create_upload(user_id, filename, size, sha256=None):
+    """
+    功能：开始一次分片上传，在暂存目录中创建空文件与元数据。
+    参数：
+        filename (str): 原始文件名（只用于校验扩展名和生成最终文件名）。
+        size (int): 文件总字节数。
+        sha256 (str): 整个文件的 SHA-256（十六进制），可选；提供时完成上传前会校验。
+    返回：
+        dict: 上传状态（upload_id、offset、chunk_size 等）。
+    """
+    filename = secure_filename(filename or "")
+    if "." not in filename or filename.rsplit(".", 1)[1].lower() not in ALLOWED_EXTENSIONS:
+        raise UploadError("只允许上传图片和PDF文件")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("文件大小无效")
+    max_bytes = current_app.config["UPLOAD_MAX_BYTES"]
+    if size <= 0:
+        raise UploadError("文件大小无效")
+    if size > max_bytes:
+        raise UploadError(f"文件不能超过 {max_bytes // (1024 * 1024)} MB", 413)
+    if sha256 is not None:
+        sha256 = str(sha256).lower()
+        if not _SHA256_RE.match(sha256):
+            raise UploadError("SHA-256 格式无效")
+
+    purge_expired()
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _paths(upload_id)
+    open(part_path, "wb").close()
+    meta = {
+        "upload_id": upload_id,
+        "user_id": user_id,
+        "filename": filename,
+        "size": size,
+        "sha256": sha256,
+        "completed": False,
+        "created_at": time.time(),
+    }
+    _write_meta(meta_path, meta)
+    return _status(meta, 0)
+
+
+def get_status(upload_id, user_id):
+    """查询已接收的字节数；断线重连后客户端从返回的 offset 继续上传"""
+    meta, _, part_path = _load(upload_id, user_id)
+    return _status(meta, _received(part_path))
+
+
+def append_chunk(upload_id, user_id, offset, data, crc32=None):
+    """
+    功能：把一个分片追加到暂存文件末尾并落盘。
+    说明：
+        offset 必须等于服务端已接收的字节数，否则返回 409 及当前 offset（重复发送的分片不会重复写入）。
+        同一上传的并发请求由文件锁串行化，多个 worker 之间同样有效。
+    参数：
+        data (bytes): 分片内容，不超过 UPLOAD_CHUNK_BYTES。
+        crc32 (str): 分片的 CRC32（8 位十六进制），可选；不一致时拒绝写入。
+    返回：
+        dict: 追加后的上传状态。
+    """
+    meta, _, part_path = _load(upload_id, user_id)
+    if meta["completed"]:
+        raise UploadError("上传已完成", 409, meta["size"])
+    if len(data) > current_app.config["UPLOAD_CHUNK_BYTES"]:
+        raise UploadError("分片过大", 413)
+    try:
+        offset = int(offset)
+    except (TypeError, ValueError):
+        raise UploadError("缺少有效的 Upload-Offset")
+
+    with open(part_path, "ab") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        current = os.fstat(f.fileno()).st_size
+        if offset != current:
+            raise UploadError("偏移量与服务端不一致", 409, current)
+        if current + len(data) > meta["size"]:
+            raise UploadError("数据超出声明的文件大小", 400, current)
+        if crc32 is not None and f"{zlib.crc32(data) & 0xFFFFFFFF:08x}" != str(crc32).lower():
+            raise UploadError("分片校验失败", 400, current)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        received = current + len(data)
+    return _status(meta, received)
+
+
+def complete_upload(upload_id, user_id):
+    """
+    功能：确认所有分片已到达，校验大小（及声明的 SHA-256），之后该上传 ID 可在日报步骤中引用。
+    返回：
+        dict: 上传状态，附带服务端计算的 sha256。
+    """
+    meta, meta_path, part_path = _load(upload_id, user_id)
+    received = _received(part_path)
+    if received != meta["size"]:
+        raise UploadError("文件尚未上传完整", 409, received)
+
+    sha = hashlib.sha256()
+    with open(part_path, "rb") as f:
+        for block in iter(lambda: f.read(64 * 1024), b""):
+            sha.update(block)
+    digest = sha.hexdigest()
+    if meta["sha256"] and digest != meta["sha256"]:
+        # 内容已损坏，续传也无法修复：删除后由客户端重新上传
+        os.remove(meta_path)
+        os.remove(part_path)
+        raise UploadError("文件校验失败，请重新上传", 422)
+
+    if not meta["completed"]:
+        meta["completed"] = True
+        meta["sha256"] = digest
+        _write_meta(meta_path, meta)
+    return {**_status(meta, received), "sha256": digest}
+
+
+def consume_upload(upload_id, user_id, dest_folder, session):
+    """
+    功能：把已完成的上传移入正式上传目录（每个上传 ID 只能使用一次）。
+    说明：
+        文件在写入附件记录之前就位，session 提交后才删除暂存元数据；
+        事务回滚时文件移回暂存目录，客户端可用同一上传 ID 重新提交。
+    返回：
+        str: 文件的最终路径（写入 DailySalesAttachments.file_path）。
+    """
+    meta, meta_path, part_path = _load(upload_id, user_id)
+    if not meta["completed"]:
+        raise UploadError("文件尚未上传完成", 409, _received(part_path))
+    os.makedirs(dest_folder, exist_ok=True)
+    save_path = os.path.join(dest_folder, f"{upload_id}_{meta['filename']}")
+    try:
+        shutil.move(part_path, save_path)
+    except FileNotFoundError:
+        # 同一上传 ID 正被另一个尚未提交的请求使用
+        raise UploadError("上传已被使用", 409)
+    session.info.setdefault("consumed_uploads", []).append((meta_path, part_path, save_path))
+    return save_path
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _drop_consumed_meta(session):
+    for meta_path, _, _ in session.info.pop("consumed_uploads", ()):
+        try:
+            os.remove(meta_path)
+        except FileNotFoundError:
+            pass
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _restore_consumed_uploads(session):
+    for _, part_path, save_path in session.info.pop("consumed_uploads", ()):
+        try:
+            shutil.move(save_path, part_path)
+        except OSError:
+            current_app.logger.warning(f"回滚后无法将上传文件移回暂存目录: {save_path}")
@@ -0,0 +1,74 @@
+# app/utils/completion_heatmap.py
+
+import base64
+
+import sqlalchemy as sa
+from app.extensions import db
+from app.models import union_all_sales
+from app.utils.helpers import parse_month
+
+# 每个 (门店, 日期) 用一个字节表示日报进度，各位含义如下（没有日报时为 0）
+REPORTED = 1
+FLAG_BITS = {
+    "pos_info_completed": 2,
+    "takeaway_info_completed": 4,
+    "bank_info_completed": 8,
+    "is_submitted": 16,
+    "archived": 32,
+}
+
+
+def _mask_expr(sales):
+    """在数据库中把五个布尔列合成为一个整数，查询结果每行只需三列"""
+    expr = sa.literal(REPORTED)
+    for name, bit in FLAG_BITS.items():
+        expr = expr + sa.case((sales.c[name] == sa.true(), bit), else_=0)
+    return expr
+
+
+def month_masks(month, store_ids):
+    """
+    功能：一次查询取出若干门店一个月内每天的日报进度，按位压缩为字节数组。
+    说明：
+        热表与历史表合并；同一天有多份日报（已归档 + 重新上报）时按位或合并。
+        只取三列标量结果，不创建 ORM 对象。
+    参数：
+        month (str): YYYY-MM。
+        store_ids (list[str]): 门店顺序即结果中各行的顺序。
+    返回：
+        tuple: (当月天数, bytearray)，第 i 个门店第 d 天（从 1 开始）位于下标 i * 天数 + d - 1。
+    """
+    first, next_first = parse_month(month)
+    days = (next_first - first).days
+    masks = bytearray(len(store_ids) * days)
+    if not store_ids:
+        return days, masks
+
+    sales = union_all_sales(
+        ['store_id', 'report_date', *FLAG_BITS],
+        lambda t: [t.c.store_id.in_(store_ids), t.c.report_date >= first, t.c.report_date < next_first],
+    )
+    rows = db.session.execute(sa.select(sales.c.store_id, sales.c.report_date, _mask_expr(sales)))
+    offsets = {store_id: index * days for index, store_id in enumerate(store_ids)}
+    for store_id, report_date, mask in rows:
+        masks[offsets[store_id] + report_date.day - 1] |= mask
+    return days, masks
+
+
+def heatmap_payload(month, stores):
+    """
+    功能：生成热力图接口的 JSON 数据。
+    参数：
+        stores (list[tuple]): [(store_id, store_name), ...]。
+    返回：
+        dict: masks 为所有门店逐日进度字节的 base64 编码（500 个门店一个月约 20 KB），
+              bits 为各位含义，前端按 stores 顺序每 days 个字节切分为一行。
+    """
+    days, masks = month_masks(month, [store_id for store_id, _ in stores])
+    return {
+        "month": month,
+        "days": days,
+        "bits": {"reported": REPORTED, **{name: bit for name, bit in FLAG_BITS.items()}},
+        "stores": [[store_id, name] for store_id, name in stores],
+        "masks": base64.b64encode(bytes(masks)).decode("ascii"),
+    }
@@ -0,0 +1,80 @@
+# app/utils/daily_reports.py
+
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import DailySales, FinancialCheckStatus
+from app.utils.cache import invalidate_on_commit
+
+# uq_daily_sales_live 约束包含的列（ON CONFLICT 的冲突目标）
+LIVE_KEY = ("store_id", "report_date", "live_marker")
+
+
+def _new_report_values(store_id, report_date, user_id):
+    now = datetime.utcnow()
+    return {
+        "store_id": store_id,
+        "report_date": report_date,
+        "user_id": user_id,
+        "pos_info_completed": False,
+        "takeaway_info_completed": False,
+        "bank_info_completed": False,
+        "is_submitted": False,
+        "financial_check_status": FinancialCheckStatus.PENDING,
+        "archived": False,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def upsert_live_report(store_id, report_date, user_id):
+    """
+    功能：取得门店某天未归档的日报 ID，不存在则创建。
+    说明：
+        由唯一约束 uq_daily_sales_live 保证同一门店同一天最多一条未归档日报，
+        并用一条 INSERT ... ON DUPLICATE KEY / ON CONFLICT 语句完成"查找或创建"，
+        两名店员同时提交不同步骤时不会产生重复日报。已存在的日报不做任何修改。
+    返回：
+        int: 日报 report_id（在当前事务中，提交前对其它连接不可见）。
+    """
+    table = DailySales.__table__
+    values = _new_report_values(store_id, report_date, user_id)
+    # 核心 INSERT 不触发 ORM 事件，新日报计入日报检索的分面计数，提交后失效缓存
+    invalidate_on_commit(db.session, "report_facets")
+    dialect = db.session.get_bind(mapper=DailySales.__mapper__, clause=table.insert()).dialect.name
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        # LAST_INSERT_ID(expr) 让冲突时 lastrowid 返回已有记录的主键，且不修改该记录
+        stmt = insert(table).values(**values).on_duplicate_key_update(
+            report_id=sa.func.last_insert_id(table.c.report_id)
+        )
+        return db.session.execute(stmt).lastrowid
+
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        # 冲突时执行无实际变化的 UPDATE，只为让 RETURNING 返回已有记录的主键
+        stmt = insert(table).values(**values).on_conflict_do_update(
+            index_elements=list(LIVE_KEY), set_={"report_id": table.c.report_id}
+        ).returning(table.c.report_id)
+        return db.session.execute(stmt).scalar_one()
+
+    # 其它数据库：插入失败（唯一约束冲突）时回退到查询
+    try:
+        with db.session.begin_nested():
+            return db.session.execute(table.insert().values(**values)).inserted_primary_key[0]
+    except IntegrityError:
+        return db.session.execute(
+            sa.select(table.c.report_id).where(
+                table.c.store_id == store_id, table.c.report_date == report_date, table.c.archived == sa.false()
+            )
+        ).scalar_one()
+
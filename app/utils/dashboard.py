@@ -0,0 +1,91 @@
+# app/utils/dashboard.py
+
+from datetime import date
+
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models import DailySales, DailySalesHistory, Store, union_all_sales
+from app.utils import jobs
+from app.utils.cache import cache
+from app.utils.jobs import job
+
+# 归档后延迟多少秒再预热首页汇总：连续归档多份日报时只刷新一次，且让缓存失效先生效
+REFRESH_DELAY_SECONDS = 5
+
+
+def store_rows():
+    """全部门店 [(store_id, store_name), ...]，按门店编号排序（两级缓存，门店变更时失效）"""
+    return cache.get_or_set("stores", "all", lambda: [
+        tuple(row) for row in db.session.query(Store.store_id, Store.store_name).order_by(Store.store_id)
+    ])
+
+
+def archived_sales_summary(store_ids, first_day_of_month):
+    """
+    各门店最近一次归档的营业额，以及本月已归档日报的累计营业额。
+    返回：
+        tuple: ({store_id: {"report_date", "actual_sales"} 或 None}, {store_id: 累计营业额})
+    """
+    last_archived_sales = {}
+    cumulative_sales = {}
+    for store_id in store_ids:
+        latest_sale = DailySales.query.filter(
+            DailySales.store_id == store_id,
+            DailySales.archived == True
+        ).order_by(DailySales.report_date.desc()).first()
+        if latest_sale is None:
+            # 热表中没有归档记录时（长期未归档的门店），再到历史表中查找
+            latest_sale = DailySalesHistory.query.filter(
+                DailySalesHistory.store_id == store_id
+            ).order_by(DailySalesHistory.report_date.desc()).first()
+
+        if latest_sale:
+            last_archived_sales[store_id] = {
+                "report_date": latest_sale.report_date,
+                "actual_sales": latest_sale.actual_sales or 0
+            }
+        else:
+            last_archived_sales[store_id] = None
+
+        # 热表与历史表合并统计，过滤条件下推到各自分支；两个分支都由 (store_id, archived, report_date, actual_sales)
+        # 覆盖索引完成，无需回表
+        sales = union_all_sales(
+            ['actual_sales'],
+            lambda t: [
+                t.c.store_id == store_id,
+                t.c.report_date >= first_day_of_month,
+                t.c.archived == True
+            ]
+        )
+        total = db.session.query(func.sum(sales.c.actual_sales)).scalar()
+        cumulative_sales[store_id] = total or 0
+    return last_archived_sales, cumulative_sales
+
+
+def cached_summary(store_ids, first_day_of_month):
+    """
+    首页汇总的缓存版本：只随归档变化，多个 worker 共用（归档、修改日报时失效）。
+    缓存键只由门店列表和月份决定，看全部门店的角色共用同一份。
+    """
+    store_ids = tuple(store_ids)
+    return cache.get_or_set(
+        "dashboard", ("index", store_ids, first_day_of_month),
+        lambda: archived_sales_summary(store_ids, first_day_of_month)
+    )
+
+
+def queue_refresh():
+    """登记一次首页汇总预热任务，随当前事务提交后生效（归档等使首页营业额变化的写入路径调用）"""
+    jobs.enqueue("refresh_dashboard", dedup_key="refresh_dashboard", delay=REFRESH_DELAY_SECONDS)
+
+
+@job("refresh_dashboard", max_attempts=1)
+def refresh_dashboard_job():
+    """
+    在后台重新计算全部门店视图（管理员、总店长、财务）的本月汇总并写入缓存。
+    该视图逐门店查询，门店多时最慢；归档使缓存失效后，首页请求不再需要同步重算。
+    """
+    today = date.today()
+    store_ids = [store_id for store_id, _ in store_rows()]
+    cached_summary(store_ids, date(today.year, today.month, 1))
@@ -0,0 +1,103 @@
+# app/utils/db_routing.py
+
+from contextlib import contextmanager
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# SQLALCHEMY_BINDS 中只读副本使用的 bind key
+REPLICA_BIND_KEY = "replica"
+
+
+class RoutingSession(Session):
+    """
+    支持只读副本的 Session。
+    满足以下全部条件时，SELECT 语句路由到只读副本，其余一律走主库：
+        - 配置了 SQLALCHEMY_BINDS['replica']；
+        - 当前请求已开启副本读取（见 use_replica / READ_REPLICA_ENDPOINTS）；
+        - 不在 flush 过程中，且本次会话尚未写入过数据（保证读己之写）。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._should_use_replica(clause):
+            return self._db.engines[REPLICA_BIND_KEY]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _should_use_replica(self, clause):
+        if not has_app_context() or not g.get("_db_use_replica"):
+            return False
+        if self._flushing or self.info.get("_db_wrote"):
+            return False
+        if clause is not None and not isinstance(clause, sa.Select):
+            return False
+        if getattr(clause, "_for_update_arg", None) is not None:
+            # SELECT ... FOR UPDATE 要在主库上加锁；随后的写入依赖锁定的数据，本会话之后的读取也固定走主库
+            self.info["_db_wrote"] = True
+            return False
+        return REPLICA_BIND_KEY in self._db.engines
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_wrote(session, flush_context):
+    """会话一旦写入，后续读取固定走主库，直到请求结束会话被回收"""
+    session.info["_db_wrote"] = True
+
+
+def use_replica(view):
+    """视图装饰器：该视图中的只读查询走只读副本"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not getattr(g, "_db_force_primary", False):
+            g._db_use_replica = True
+        return view(*args, **kwargs)
+    wrapper._db_use_replica = True
+    return wrapper
+
+
+def use_primary(view):
+    """
+    视图装饰器：显式声明该视图只读主库。
+    用于"先写后读"的流程（如 report_sales 提交后立即重定向回本页），
+    即使该端点被误配置进 READ_REPLICA_ENDPOINTS 也不会读到延迟的副本数据。
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g._db_force_primary = True
+        g._db_use_replica = False
+        return view(*args, **kwargs)
+    wrapper._db_use_primary = True
+    return wrapper
+
+
+@contextmanager
+def primary():
+    """上下文管理器：在 use_replica 视图内部临时改为读取主库"""
+    previous = g.get("_db_use_replica", False)
+    g._db_use_replica = False
+    try:
+        yield
+    finally:
+        g._db_use_replica = previous
+
+
+def init_app(app):
+    """
+    注册请求钩子：READ_REPLICA_ENDPOINTS 中列出的端点自动读取只读副本。
+    未配置副本时这些设置不生效，所有查询照常走主库。
+    """
+    replica_endpoints = set(app.config.get("READ_REPLICA_ENDPOINTS", ()))
+
+    @app.before_request
+    def _route_reads_to_replica():
+        if request.method not in ("GET", "HEAD") or request.endpoint not in replica_endpoints:
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if view is not None and getattr(view, "_db_use_primary", False):
+            return
+        g._db_use_replica = True
+
+    if REPLICA_BIND_KEY in (app.config.get("SQLALCHEMY_BINDS") or {}):
+        app.logger.info(f"已启用只读副本，自动路由端点: {sorted(replica_endpoints)}")
@@ -0,0 +1,62 @@
+# app/utils/derived_fields.py
+
+import sqlalchemy as sa
+from app.extensions import db
+from app.models import DailySalesHistory
+
+
+def _derived_values(table):
+    """派生金额的计算式，与热表 daily_sales 中生成列的定义一致（空值按 0 计）"""
+    c = table.c
+    return {
+        "pos_total": sa.func.coalesce(c.cash_income, 0) + sa.func.coalesce(c.pos_income, 0)
+        + sa.func.coalesce(c.day_pass_income, 0),
+        "actual_sales": sa.func.coalesce(c.bank_deposit, 0) + sa.func.coalesce(c.voucher_amount, 0),
+    }
+
+
+def recompute_derived(date_from, date_to, chunk_size=500, progress=None):
+    """
+    功能：按规则重算历史表中营业日期在 [date_from, date_to] 内日报的 pos_total 与 actual_sales。
+    说明：
+        热表 daily_sales 中这两列是数据库生成列，始终与规则一致，无需重算；
+        历史表中早于规则、或由 fake-data 生成的记录可能不一致。
+        按主键区间分块执行集合式 UPDATE，只改写值不一致的行，块与块之间提交，避免长时间锁表。
+    参数：
+        date_from (date): 营业日期起（含）。
+        date_to (date): 营业日期止（含）。
+        chunk_size (int): 每块覆盖的 report_id 区间宽度。
+        progress (callable): 每块完成后回调 progress(本块改写行数, 累计改写行数, 已处理到的 report_id)。
+    返回：
+        int: 被改写的行数。
+    """
+    table = DailySalesHistory.__table__
+    in_range = table.c.report_date.between(date_from, date_to)
+    low, high = db.session.execute(
+        sa.select(sa.func.min(table.c.report_id), sa.func.max(table.c.report_id)).where(in_range)
+    ).one()
+    db.session.commit()
+    if low is None:
+        return 0
+
+    values = _derived_values(table)
+    stale = sa.or_(*[
+        sa.or_(table.c[name].is_(None), table.c[name] != expr) for name, expr in values.items()
+    ])
+    total = 0
+    for start in range(low, high + 1, chunk_size):
+        end = min(start + chunk_size - 1, high)
+        try:
+            changed = db.session.execute(
+                table.update()
+                .where(table.c.report_id.between(start, end), in_range, stale)
+                .values(**values)
+            ).rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        total += changed
+        if progress is not None:
+            progress(changed, total, end)
+    return total
@@ -125,7 +125,6 @@ def generate_fake_data():
                     cash_income = round(random.uniform(500, 2000), 2)
                     pos_income = round(random.uniform(500, 3000), 2)
                     day_pass_income = round(random.uniform(100, 800), 2)
-                    pos_total = cash_income + pos_income + day_pass_income
                     sales = DailySales(
                         store_id=store.store_id,
                         user_id=admin.user_id,
@@ -133,7 +132,6 @@ def generate_fake_data():
                         cash_income=cash_income,
                         pos_income=pos_income,
                         day_pass_income=day_pass_income,
-                        pos_total=pos_total,
                         cash_difference=round(random.uniform(-10, 10), 2),
                         electronic_difference=round(random.uniform(-10, 10), 2),
                         takeaway_amount=round(random.uniform(100, 800), 2),
@@ -141,7 +139,6 @@ def generate_fake_data():
                         bank_fee=round(random.uniform(0, 20), 2),
                         bank_deposit=round(random.uniform(500, 2000), 2),
                         voucher_amount=round(random.uniform(0, 100), 2),
-                        actual_sales=round(random.uniform(1000, 5000), 2),
                         remark=fake.sentence(),
                         pos_info_completed=True,
                         takeaway_info_completed=True,
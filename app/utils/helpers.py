@@ -1,6 +1,8 @@
 # MXStoreBI/app/utils/helpers.py
 
 import os
+import re
+from datetime import date
 
 from flask import current_app
 from flask_login import current_user
@@ -72,4 +74,20 @@ def save_upload_file(file, report_id, attachment_type):
             return None
 
     # 如果文件对象不存在或文件名不合法，也返回 None
-    return None
\ No newline at end of file
+    return None
+
+
+def parse_month(month):
+    """
+    功能：解析 YYYY-MM 格式的月份。
+    返回：
+        tuple: (当月第一天, 下月第一天)
+    异常：
+        ValueError: 格式不正确时抛出。
+    """
+    if not re.fullmatch(r"\d{4}-\d{2}", month or ""):
+        raise ValueError(f"月份格式应为 YYYY-MM: {month}")
+    year, mon = int(month[:4]), int(month[5:])
+    first = date(year, mon, 1)
+    next_first = date(year + 1, 1, 1) if mon == 12 else date(year, mon + 1, 1)
+    return first, next_first
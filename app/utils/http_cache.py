@@ -0,0 +1,91 @@
+# app/utils/http_cache.py
+
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from flask import current_app, request, session
+from flask_login import current_user
+
+
+def build_etag(*parts) -> str:
+    """
+    功能：根据若干版本要素生成 ETag。
+    参数：
+        *parts: 任意可转为字符串的版本要素（如 updated_at、角色、用户ID 等）。
+    返回：
+        str: 固定长度的十六进制摘要。
+    """
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def viewer_scope() -> tuple:
+    """
+    功能：返回与当前访问者相关的 ETag 要素。
+    说明：
+        - 页面按角色/用户渲染（导航栏、可见店铺不同），因此 ETag 必须按用户区分；
+        - 页面中嵌有 CSRF 令牌，令牌有效期有限，这里按有效期的一半分桶，
+          保证 304 复用的页面提交时令牌仍然有效。
+    """
+    role = current_user.role.value if getattr(current_user, "role", None) else None
+    user_id = getattr(current_user, "user_id", None)
+    csrf_limit = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600) or 3600
+    csrf_bucket = int(time.time() // max(csrf_limit // 2, 1))
+    return role, user_id, session.get("csrf_token"), csrf_bucket
+
+
+def _as_utc(value):
+    """将数据库中的 naive UTC 时间转换为带时区的时间，并去掉微秒（HTTP 日期精度为秒）"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def not_modified(etag: str, last_modified: datetime = None):
+    """
+    功能：判断客户端缓存是否仍然有效。
+    参数：
+        etag (str): 当前页面版本的 ETag。
+        last_modified (datetime): 当前页面数据的最后修改时间（UTC）。
+    返回：
+        Response: 客户端缓存有效时返回 304 响应（不渲染模板）。
+        None: 需要正常渲染页面。
+    """
+    if not current_app.config.get("CONDITIONAL_GET_ENABLED", True):
+        return None
+    if request.method not in ("GET", "HEAD"):
+        return None
+    # 有待显示的 flash 消息时必须重新渲染，否则消息会被"吞掉"
+    if session.get("_flashes"):
+        return None
+
+    matched = False
+    if request.if_none_match:
+        matched = request.if_none_match.contains(etag)
+    elif last_modified is not None and request.if_modified_since is not None:
+        matched = _as_utc(last_modified) <= request.if_modified_since
+
+    if not matched:
+        return None
+
+    response = current_app.response_class(status=304)
+    return apply_cache_headers(response, etag, last_modified)
+
+
+def apply_cache_headers(response, etag: str, last_modified: datetime = None):
+    """
+    功能：为响应设置条件 GET 所需的缓存头。
+    说明：页面属于用户私有数据，只允许浏览器缓存，且每次使用前都必须重新验证。
+    """
+    if not current_app.config.get("CONDITIONAL_GET_ENABLED", True):
+        return response
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Cookie")
+    return response
@@ -0,0 +1,286 @@
+# app/utils/jobs.py
+
+import importlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import Job
+from app.models.enums import JobStatus
+from app.utils.db_routing import RoutingSession
+
+logger = logging.getLogger(__name__)
+
+# 定义了 @job 处理函数的模块，工作线程启动前统一导入以完成注册
+HANDLER_MODULES = (
+    "app.utils.archive_mover",
+    "app.utils.attachment_store",
+    "app.utils.dashboard",
+    "app.utils.missing_reports",
+)
+
+# 任务名 -> (处理函数, 最大执行次数)
+_handlers = {}
+
+
+def job(name, max_attempts=3):
+    """
+    装饰器：将函数注册为后台任务处理函数。
+    处理函数以 enqueue() 传入的 payload 作为关键字参数调用，在独立的应用上下文中执行；
+    抛出异常即视为失败，按指数退避重试，直到达到 max_attempts。
+    """
+    def decorator(func):
+        _handlers[name] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def load_handlers():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    return _handlers
+
+
+def enqueue(name, payload=None, dedup_key=None, delay=0):
+    """
+    功能：登记一个后台任务，在当前数据库事务提交后才真正写入 jobs 表。
+    说明：
+        - 事务回滚则任务一并丢弃，不会出现"数据没保存、任务却已执行"的情况；
+        - dedup_key 相同且仍在排队/执行中的任务只保留一个，重复登记会被忽略；
+        - 调用方必须随后执行 db.session.commit()（即使本次没有其它改动）。
+    参数：
+        name (str): 任务名，需已通过 @job 注册。
+        payload (dict): 处理函数的关键字参数，必须可 JSON 序列化。
+        dedup_key (str): 去重键，可选。
+        delay (int): 延迟执行的秒数。
+    """
+    handlers = load_handlers()
+    if name not in handlers:
+        raise ValueError(f"未注册的后台任务: {name}")
+    db.session.info.setdefault("pending_jobs", []).append({
+        "name": name,
+        "payload": json.dumps(payload or {}, ensure_ascii=False, default=str),
+        "dedup_key": dedup_key,
+        "max_attempts": handlers[name][1],
+        "delay": delay,
+    })
+
+
+def _insert_jobs(engine, pending):
+    table = Job.__table__
+    now = datetime.utcnow()
+    for item in pending:
+        values = {
+            "name": item["name"],
+            "payload": item["payload"],
+            "status": JobStatus.QUEUED,
+            "dedup_key": item["dedup_key"],
+            "active_dedup_key": item["dedup_key"],
+            "attempts": 0,
+            "max_attempts": item["max_attempts"],
+            "run_after": now + timedelta(seconds=item["delay"]),
+            "created_at": now,
+        }
+        try:
+            # 每个任务单独一个事务：去重冲突只影响自己
+            with engine.begin() as conn:
+                conn.execute(table.insert().values(**values))
+        except IntegrityError:
+            logger.info(f"后台任务 {item['name']} 已在队列中（去重键 {item['dedup_key']}），忽略重复登记")
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _flush_pending_jobs(session):
+    pending = session.info.pop("pending_jobs", None)
+    if pending:
+        # 任务表始终写主库
+        _insert_jobs(db.engine, pending)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_pending_jobs(session):
+    session.info.pop("pending_jobs", None)
+
+
+def _claim(conn, job_id, worker_id):
+    """条件 UPDATE 抢占任务：只有仍处于排队状态时才能领取，多进程/多线程并发领取也只会成功一个"""
+    table = Job.__table__
+    result = conn.execute(
+        table.update()
+        .where(table.c.job_id == job_id, table.c.status == JobStatus.QUEUED)
+        .values(status=JobStatus.RUNNING, locked_by=worker_id, locked_at=datetime.utcnow(),
+                attempts=table.c.attempts + 1)
+    )
+    return result.rowcount == 1
+
+
+def retry_delay(attempts, base_seconds):
+    """第 n 次失败后的重试间隔：base, 2*base, 4*base ...（最长 1 小时）"""
+    return min(base_seconds * (2 ** max(attempts - 1, 0)), 3600)
+
+
+class JobWorker:
+    """
+    后台任务工作线程组。
+    可随应用在每个 gunicorn worker 内启动（JOB_WORKER_THREADS > 0），也可用 flask worker 单独运行；
+    多个进程同时轮询同一张 jobs 表是安全的。
+    """
+
+    def __init__(self, app, threads=1, poll_interval=None):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval or app.config.get("JOB_POLL_INTERVAL", 2)
+        self.retry_base = app.config.get("JOB_RETRY_BASE_SECONDS", 30)
+        self.stale_seconds = app.config.get("JOB_STALE_SECONDS", 1800)
+        self.stale_check_interval = app.config.get("JOB_STALE_CHECK_SECONDS", 60)
+        self._next_stale_check = 0.0
+        self._stale_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        with self.app.app_context():
+            load_handlers()
+            self.requeue_stale_if_due()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for index in range(self.threads):
+            thread = threading.Thread(target=self._loop, args=(f"{prefix}:{index}",),
+                                      name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.app.logger.info(f"后台任务工作线程已启动（{self.threads} 个，进程 {os.getpid()}）")
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _loop(self, worker_id):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    # 长期运行的进程也要定期回收其它进程遗留的任务，而不只在启动时检查一次
+                    self.requeue_stale_if_due()
+                    ran = self.run_once(worker_id)
+            except Exception:
+                self.app.logger.exception("后台任务轮询出错")
+                ran = False
+            if not ran:
+                self._stop.wait(self.poll_interval)
+
+    def run_once(self, worker_id="inline"):
+        """领取并执行一个到期任务，没有可执行的任务时返回 False（需在应用上下文中调用）"""
+        table = Job.__table__
+        with db.engine.begin() as conn:
+            candidates = conn.execute(
+                sa.select(table.c.job_id)
+                .where(table.c.status == JobStatus.QUEUED, table.c.run_after <= datetime.utcnow())
+                .order_by(table.c.run_after, table.c.job_id)
+                .limit(10)
+            ).scalars().all()
+        for job_id in candidates:
+            with db.engine.begin() as conn:
+                if not _claim(conn, job_id, worker_id):
+                    continue
+                row = conn.execute(sa.select(table).where(table.c.job_id == job_id)).mappings().one()
+            self._execute(row)
+            return True
+        return False
+
+    def _execute(self, row):
+        table = Job.__table__
+        handler = _handlers.get(row["name"])
+        error = None
+        try:
+            if handler is None:
+                raise LookupError(f"未注册的后台任务: {row['name']}")
+            with self.app.app_context():
+                handler[0](**json.loads(row["payload"] or "{}"))
+        except Exception:
+            error = traceback.format_exc(limit=5)
+            self.app.logger.error(f"后台任务 {row['name']}#{row['job_id']} 第 {row['attempts']} 次执行失败\n{error}")
+
+        now = datetime.utcnow()
+        if error is None:
+            values = {"status": JobStatus.SUCCEEDED, "finished_at": now, "active_dedup_key": None, "last_error": None}
+        elif row["attempts"] >= row["max_attempts"]:
+            values = {"status": JobStatus.FAILED, "finished_at": now, "active_dedup_key": None, "last_error": error}
+        else:
+            values = {"status": JobStatus.QUEUED, "last_error": error,
+                      "run_after": now + timedelta(seconds=retry_delay(row["attempts"], self.retry_base))}
+        with db.engine.begin() as conn:
+            conn.execute(table.update().where(table.c.job_id == row["job_id"])
+                         .values(locked_by=None, locked_at=None, **values))
+
+    def requeue_stale_if_due(self):
+        """距上次检查超过 JOB_STALE_CHECK_SECONDS 时执行 requeue_stale（同一进程的多个线程中只有一个执行）"""
+        now = time.monotonic()
+        with self._stale_lock:
+            if now < self._next_stale_check:
+                return 0
+            self._next_stale_check = now + self.stale_check_interval
+        return self.requeue_stale()
+
+    def requeue_stale(self):
+        """执行中超过 JOB_STALE_SECONDS 的任务（所在进程已退出或被杀）重新放回队列"""
+        table = Job.__table__
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                table.update()
+                .where(table.c.status == JobStatus.RUNNING, table.c.locked_at < cutoff)
+                .values(status=JobStatus.QUEUED, locked_by=None, locked_at=None)
+            )
+        if result.rowcount:
+            self.app.logger.warning(f"已将 {result.rowcount} 个超时未完成的后台任务放回队列")
+        return result.rowcount
+
+
+def retry_job(job_id):
+    """将最终失败的任务重新放回队列（重置执行次数）；同一去重键已有活动任务时返回 False"""
+    table = Job.__table__
+    try:
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                table.update()
+                .where(table.c.job_id == job_id, table.c.status == JobStatus.FAILED)
+                .values(status=JobStatus.QUEUED, attempts=0, run_after=datetime.utcnow(),
+                        finished_at=None, active_dedup_key=table.c.dedup_key)
+            )
+    except IntegrityError:
+        return False
+    return result.rowcount == 1
+
+
+def init_app(app):
+    """
+    JOB_WORKER_THREADS > 0 时，在每个进程处理第一个请求时启动后台工作线程。
+    （不在导入时启动：gunicorn --preload 等场景下 fork 之后线程不会被继承。）
+    """
+    threads = app.config.get("JOB_WORKER_THREADS", 0)
+    if threads <= 0:
+        return
+    lock = threading.Lock()
+    state = {"worker": None, "pid": None}
+
+    @app.before_request
+    def _start_job_worker():
+        if state["pid"] == os.getpid() or request.endpoint == "static":
+            return
+        with lock:
+            if state["pid"] != os.getpid():
+                state["worker"] = JobWorker(app, threads=threads)
+                state["worker"].start()
+                state["pid"] = os.getpid()
@@ -0,0 +1,216 @@
+# app/utils/live_events.py
+
+import json
+import os
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event, inspect
+
+from app.models import DailySales
+from app.utils.db_routing import RoutingSession
+
+try:
+    import fcntl  # 仅 Linux/macOS；Windows 本地开发时退化为不加锁的追加写
+except ImportError:
+    fcntl = None
+
+# DailySales 中由 False 变为 True 时推送事件的字段 -> 事件类型
+TRACKED_FLAGS = {
+    "pos_info_completed": "step_completed",
+    "takeaway_info_completed": "step_completed",
+    "bank_info_completed": "step_completed",
+    "is_submitted": "submitted",
+    "archived": "archived",
+}
+STEP_NAMES = {
+    "pos_info_completed": "pos",
+    "takeaway_info_completed": "takeaway",
+    "bank_info_completed": "bank",
+}
+
+
+def _log_path():
+    return current_app.config["LIVE_EVENTS_FILE"]
+
+
+def _read_generation(f):
+    """
+    读取日志文件首行的代号头 {"generation": ...}，返回 (代号, 头部字节数)。
+    文件每次清空重写都会换一个新代号；没有头部的文件（旧格式或尚未写入）视为代号 "0"。
+    """
+    f.seek(0)
+    first = f.readline()
+    if first.endswith(b"\n"):
+        try:
+            header = json.loads(first)
+        except ValueError:
+            header = None
+        if isinstance(header, dict) and "generation" in header:
+            return str(header["generation"]), len(first)
+    return "0", 0
+
+
+def _next_generation(previous):
+    """新代号：毫秒时间戳（十六进制），且保证大于上一个代号（同一毫秒内多次清空时也不重复）"""
+    try:
+        previous = int(previous, 16)
+    except ValueError:
+        previous = 0
+    return format(max(time.time_ns() // 1_000_000, previous + 1), "x")
+
+
+def _event_id(generation, offset):
+    return f"{generation}-{offset}"
+
+
+def publish(events):
+    """
+    功能：将事件追加写入事件日志文件（所有 gunicorn worker 共享同一文件）。
+    说明：每个事件占一行 JSON；新文件或超过 LIVE_EVENTS_MAX_BYTES 时清空重写，
+        首行写入新的代号，事件 id 由代号与偏移量组成，清空前的偏移量不会被误用。
+    """
+    if not events:
+        return
+    path = _log_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = "".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in events).encode("utf-8")
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0 or size > current_app.config.get("LIVE_EVENTS_MAX_BYTES", 1024 * 1024):
+                generation = _next_generation(_read_generation(f)[0])
+                f.truncate(0)
+                f.write(json.dumps({"generation": generation}).encode("utf-8") + b"\n")
+            f.write(data)
+            f.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _flag_turned_on(state, name):
+    history = state.attrs[name].history
+    return bool(history.added) and history.added[0] is True and not (history.deleted and history.deleted[0])
+
+
+def queue_event(session, report, event_type, step=None):
+    """登记一个日报事件，随当前事务提交后发布（回滚则丢弃）"""
+    session.info.setdefault("pending_live_events", []).append({
+        "type": event_type,
+        "step": step,
+        "report_id": report.report_id,
+        "store_id": report.store_id,
+        "report_date": report.report_date.isoformat() if report.report_date else None,
+        "at": datetime.utcnow().isoformat(timespec="seconds"),
+    })
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _collect_daily_sales_events(session, flush_context):
+    """flush 时比对 DailySales 状态字段的变更，事务提交后再统一发布"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, DailySales):
+            continue
+        state = inspect(obj)
+        for name, event_type in TRACKED_FLAGS.items():
+            if _flag_turned_on(state, name):
+                queue_event(session, obj, event_type, STEP_NAMES.get(name))
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _publish_pending_events(session):
+    pending = session.info.pop("pending_live_events", None)
+    if pending:
+        try:
+            publish(pending)
+        except OSError as e:
+            # 实时推送只是提示，写入失败不影响已提交的业务数据
+            current_app.logger.warning(f"实时事件写入失败: {e}")
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_pending_events(session):
+    session.info.pop("pending_live_events", None)
+
+
+def _resume_offset(last_event_id, generation, start, size):
+    """
+    浏览器带回的 Last-Event-ID 属于当前代号且在文件范围内时从该处续读；
+    否则（文件已清空重写、格式不对）从当前末尾开始，只推送此后的新事件，不会从半行处读取或重复推送。
+    """
+    claimed, _, offset = (last_event_id or "").rpartition("-")
+    if claimed == generation and offset.isdigit() and start <= int(offset) <= size:
+        return int(offset)
+    return size
+
+
+def _read_from(path, generation, offset):
+    """
+    读取 offset 之后新增的内容，返回 (代号, 新的起始偏移量, 新增内容)。
+    文件代号与 generation 不同（已清空重写）时从新文件的头部之后读起；文件不存在时视为空文件。
+    """
+    try:
+        with open(path, "rb") as f:
+            current, start = _read_generation(f)
+            if current != generation:
+                offset = start
+            size = os.fstat(f.fileno()).st_size
+            if size <= offset:
+                return current, offset, b""
+            f.seek(offset)
+            return current, offset, f.read(size - offset)
+    except FileNotFoundError:
+        return "0", 0, b""
+
+
+def stream(last_event_id=None, store_ids=None):
+    """
+    功能：SSE 事件流生成器，轮询事件日志文件并推送新增事件。
+    参数：
+        last_event_id (str): 浏览器断线重连时带回的 Last-Event-ID（"代号-偏移量"）。
+        store_ids (set): 只推送这些门店的事件，None 表示全部。
+    说明：
+        事件 id 为"日志代号-该事件在文件中的结束偏移量"；连接保持 LIVE_EVENTS_STREAM_SECONDS 秒后主动结束，
+        由浏览器 EventSource 自动重连，避免长期占用 worker。
+    """
+    config = current_app.config
+    path = _log_path()
+    poll_interval = config.get("LIVE_EVENTS_POLL_INTERVAL", 1.0)
+    deadline = time.monotonic() + config.get("LIVE_EVENTS_STREAM_SECONDS", 300)
+    heartbeat_every = 15
+    try:
+        with open(path, "rb") as f:
+            generation, start = _read_generation(f)
+            size = os.fstat(f.fileno()).st_size
+    except FileNotFoundError:
+        generation, start, size = "0", 0, 0
+    offset = _resume_offset(last_event_id, generation, start, size)
+
+    # 只有 id 没有 data 的消息不会触发浏览器事件，但会更新 Last-Event-ID，断线重连时不漏事件
+    yield f"retry: 3000\nid: {_event_id(generation, offset)}\n\n"
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline:
+        # 连接期间文件被清空重写时，新文件中的事件都发生在本连接建立之后，从头部之后全部推送
+        generation, offset, chunk = _read_from(path, generation, offset)
+        if chunk:
+            # 只处理完整的行，未写完的半行留到下次
+            complete = chunk[:chunk.rfind(b"\n") + 1]
+            for line in complete.splitlines(keepends=True):
+                offset += len(line)
+                try:
+                    payload = json.loads(line)
+                except ValueError:
+                    continue
+                if store_ids is not None and payload.get("store_id") not in store_ids:
+                    continue
+                yield (f"id: {_event_id(generation, offset)}\nevent: {payload['type']}\n"
+                       f"data: {json.dumps(payload, ensure_ascii=False)}\n\n")
+                last_sent = time.monotonic()
+        if time.monotonic() - last_sent >= heartbeat_every:
+            yield f"id: {_event_id(generation, offset)}\n: keep-alive\n\n"
+            last_sent = time.monotonic()
+        time.sleep(poll_interval)
@@ -0,0 +1,286 @@
+# app/utils/load_sim.py
+
+import http.cookiejar
+import os
+import random
+import re
+import socket
+import struct
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from app.extensions import db
+from app.models import DailySales, DailySalesAttachments, RoleType, Store, User
+
+# 模拟门店与用户的前缀（编号中另带每次运行的随机标记，见 prepare_users）
+STORE_PREFIX = "LS"
+USER_PREFIX = "loadsim"
+# 上报流程中计时的步骤（按执行顺序）
+STEPS = ("login", "view", "pos", "takeaway", "bank", "submit")
+
+_CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"|value="([^"]+)"[^>]*name="csrf_token"')
+
+
+def receipt_png(size_kb=200, seed=None):
+    """
+    生成一张模拟小票照片（PNG）。
+    像素为随机噪声，几乎无法压缩，文件大小约等于 size_kb，接近手机拍照上传的体积。
+    """
+    rnd = random.Random(seed)
+    width = 256
+    height = max(1, size_kb * 1024 // (width * 3))
+    raw = b"".join(b"\x00" + rnd.randbytes(width * 3) for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b""))
+
+
+def prepare_users(count, password):
+    """
+    功能：创建 count 个模拟门店及对应的分店长账号。
+    说明：
+        编号带本次运行的随机标记（如 LS-3f9a1c2e-0001、loadsim-3f9a1c2e-0001），
+        不会与真实门店、账号或其它压测运行重名；只新建、不复用已有记录，清理时只删除这些记录。
+    返回：
+        list[tuple]: [(username, store_id), ...]，即 cleanup() 的参数。
+    """
+    run_tag = uuid.uuid4().hex[:8]
+    accounts = []
+    for i in range(1, count + 1):
+        store_id = f"{STORE_PREFIX}-{run_tag}-{i:04d}"
+        username = f"{USER_PREFIX}-{run_tag}-{i:04d}"
+        db.session.add(Store(store_id=store_id, store_name=f"压测门店 {run_tag} {i:04d}"))
+        user = User(username=username, role=RoleType.BRANCH_MANAGER, store_id=store_id)
+        db.session.add(user)
+        user.set_password(password)
+        user.user_status = 1
+        accounts.append((username, store_id))
+    db.session.commit()
+    return accounts
+
+
+def cleanup(accounts):
+    """删除 prepare_users() 本次创建的门店、账号及这些门店的日报、附件（记录与文件）；返回删除的日报条数"""
+    if not accounts:
+        return 0
+    usernames = [username for username, _ in accounts]
+    store_ids = [store_id for _, store_id in accounts]
+    report_ids = db.session.query(DailySales.report_id).filter(DailySales.store_id.in_(store_ids))
+    attachments = DailySalesAttachments.query.filter(DailySalesAttachments.report_id.in_(report_ids)).all()
+    for attachment in attachments:
+        if os.path.basename(attachment.file_path).startswith(USER_PREFIX):
+            try:
+                os.remove(attachment.file_path)
+            except OSError:
+                pass
+        db.session.delete(attachment)
+    deleted = DailySales.query.filter(DailySales.store_id.in_(store_ids)).delete(synchronize_session=False)
+    User.query.filter(User.username.in_(usernames)).delete(synchronize_session=False)
+    Store.query.filter(Store.store_id.in_(store_ids)).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """不自动跟随重定向：表单提交成功以 302 为准，重定向后的页面作为下一步的 view 单独计时"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: image/png\r\n\r\n'.encode() + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class VirtualStoreUser:
+    """一个模拟的门店用户：独立的 Cookie 会话，依次完成登录与日报的三个步骤和最终提交"""
+
+    def __init__(self, base_url, username, password, store_id, report_date, image_kb, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.store_id = store_id
+        self.report_date = report_date.strftime("%Y-%m-%d")
+        self.image_kb = image_kb
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+        self.samples = []  # [(step, 秒, 是否成功, 错误说明)]
+        self._token = ""
+
+    def _request(self, path, data=None, content_type=None):
+        req = urllib.request.Request(self.base_url + path, data=data)
+        if content_type:
+            req.add_header("Content-Type", content_type)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                return resp.status, resp.read().decode("utf-8", "replace")
+        except urllib.error.HTTPError as e:
+            # 302 在 _NoRedirect 下也以 HTTPError 形式返回
+            return e.code, e.read().decode("utf-8", "replace")
+
+    def _timed(self, step, func):
+        started = time.perf_counter()
+        try:
+            ok, error = func()
+        except (urllib.error.URLError, socket.timeout, ConnectionError) as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        self.samples.append((step, time.perf_counter() - started, ok, error))
+        return ok
+
+    def _csrf(self, html):
+        match = _CSRF_RE.search(html)
+        return (match.group(1) or match.group(2)) if match else ""
+
+    def login(self):
+        def do():
+            _, html = self._request("/user/login")
+            body = urllib.parse.urlencode({
+                "csrf_token": self._csrf(html), "username": self.username, "password": self.password,
+            }).encode()
+            status, _ = self._request("/user/login", body, "application/x-www-form-urlencoded")
+            return status == 302, None if status == 302 else f"HTTP {status}"
+        return self._timed("login", do)
+
+    def view(self):
+        def do():
+            query = urllib.parse.urlencode({
+                "initial_load": "true", "store_id": self.store_id, "report_date": self.report_date,
+            })
+            status, html = self._request(f"/sales/report?{query}")
+            self._token = self._csrf(html)
+            return status == 200, None if status == 200 else f"HTTP {status}"
+        return self._timed("view", do)
+
+    def _post_step(self, step, fields, files=None):
+        def do():
+            body, content_type = _multipart(
+                {"csrf_token": self._token, "store_id": self.store_id, "report_date": self.report_date, **fields},
+                files or {},
+            )
+            status, _ = self._request("/sales/report", body, content_type)
+            # 保存成功会重定向回上报页；返回 200 说明表单校验未通过
+            return status == 302, None if status == 302 else f"HTTP {status}"
+        return self._timed(step, do)
+
+    def _image(self, step):
+        name = f"{USER_PREFIX}_{self.store_id}_{self.report_date}_{step}.png"
+        return name, receipt_png(self.image_kb, seed=f"{self.store_id}-{step}")
+
+    def run(self):
+        rnd = random.Random(self.store_id)
+        cash, electronic, takeaway = (round(rnd.uniform(1000, 20000), 2) for _ in range(3))
+        if not self.login():
+            return self.samples
+        flow = [
+            ("pos", {"step": "pos", "cash_sales": cash, "electronic_sales": electronic,
+                     "system_takeaway_sales": takeaway, "voucher_amount": 0,
+                     "cash_difference": 0, "electronic_difference": 0},
+             {"sales_slip_image": self._image("pos")}),
+            ("takeaway", {"step": "takeaway", "takeaway_platform_sales": takeaway},
+             {"takeaway_platform_receipt": self._image("takeaway")}),
+            ("bank", {"step": "bank", "bank_deposit": cash, "bank_fee": 15},
+             {"bank_receipt_image": self._image("bank")}),
+            ("submit", {"submit_final": "final_submit", "initial_load": "false"}, None),
+        ]
+        for step, fields, files in flow:
+            if not self.view() or not self._post_step(step, fields, files):
+                break
+        return self.samples
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """按步骤汇总：请求数、错误率、p50/p90/p99/最大耗时（毫秒）"""
+    summary = {}
+    for step in STEPS:
+        rows = [s for s in samples if s[0] == step]
+        if not rows:
+            continue
+        durations = sorted(s[1] * 1000 for s in rows)
+        errors = [s[3] for s in rows if not s[2]]
+        summary[step] = {
+            "count": len(rows),
+            "errors": len(errors),
+            "error_rate": len(errors) / len(rows),
+            "p50": percentile(durations, 50),
+            "p90": percentile(durations, 90),
+            "p99": percentile(durations, 99),
+            "max": durations[-1],
+            "sample_error": errors[0] if errors else None,
+        }
+    return {
+        "elapsed": elapsed,
+        "requests": len(samples),
+        "throughput": len(samples) / elapsed if elapsed else 0.0,
+        "steps": summary,
+    }
+
+
+def run_load(base_url, accounts, password, concurrency=10, report_date=None, image_kb=200):
+    """
+    功能：并发驱动所有模拟门店走完一遍上报流程。
+    参数：
+        accounts (list): prepare_users() 的返回值，每个账号一个虚拟用户。
+        concurrency (int): 同时进行上报的虚拟用户数。
+    返回：
+        dict: summarize() 的结果。
+    """
+    report_date = report_date or date.today()
+    users = [VirtualStoreUser(base_url, username, password, store_id, report_date, image_kb)
+             for username, store_id in accounts]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda u: u.run(), users))
+    elapsed = time.perf_counter() - started
+    return summarize([s for samples in results for s in samples], elapsed)
+
+
+def start_gunicorn(project_root, port, workers=3, threads=1, timeout=30):
+    """
+    在本机启动一个 gunicorn 实例（与生产相同的 run:app 入口），就绪后返回进程对象。
+    子进程继承当前环境变量（DATABASE_URL 等），因此压测与本命令使用同一个数据库。
+    """
+    command = [sys.executable, "-m", "gunicorn", "--workers", str(workers), "--threads", str(threads),
+               "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "run:app"]
+    process = subprocess.Popen(command, cwd=project_root)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn 启动失败（退出码 {process.returncode}），请确认已安装 gunicorn")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn 在 {timeout} 秒内未就绪")
@@ -0,0 +1,147 @@
+# app/utils/missing_reports.py
+
+import logging
+from datetime import date, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import CalendarDay, Store, union_all_sales
+from app.utils.jobs import job
+
+logger = logging.getLogger(__name__)
+
+# 单次检查最多覆盖的天数（约一个季度）
+MAX_DAYS = 92
+# 矩阵中的单元格状态：没有日报；其余情况为已完成的步骤数 0~3（已提交或已归档的日期不出现在结果中）
+MISSING = "missing"
+
+
+def ensure_calendar(first, last):
+    """补齐日历表中 [first, last] 内缺少的日期（直接写主库，与调用方的会话无关）"""
+    table = CalendarDay.__table__
+    expected = (last - first).days + 1
+    with db.engine.begin() as conn:
+        existing = set(conn.execute(
+            sa.select(table.c.day).where(table.c.day.between(first, last))
+        ).scalars())
+    if len(existing) >= expected:
+        return 0
+    missing = [{"day": first + timedelta(days=i)} for i in range(expected)
+               if first + timedelta(days=i) not in existing]
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(table.insert(), missing)
+    except IntegrityError:
+        # 其它进程同时补齐了部分日期，逐条插入剩余的
+        for row in missing:
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(table.insert().values(**row))
+            except IntegrityError:
+                pass
+    return len(missing)
+
+
+def _report_status(first, last, store_ids):
+    """每个 (门店, 日期) 的日报汇总：是否已完成（已提交或已归档），以及完成步骤最多的一份日报的步骤数"""
+    def criteria(t):
+        conditions = [t.c.report_date.between(first, last)]
+        if store_ids:
+            conditions.append(t.c.store_id.in_(store_ids))
+        return conditions
+
+    sales = union_all_sales(
+        ['store_id', 'report_date', 'archived', 'is_submitted',
+         'pos_info_completed', 'takeaway_info_completed', 'bank_info_completed'],
+        criteria,
+    )
+    done = sa.case((sa.or_(sales.c.is_submitted == sa.true(), sales.c.archived == sa.true()), 1), else_=0)
+    steps = sum(sa.case((sales.c[name] == sa.true(), 1), else_=0)
+                for name in ('pos_info_completed', 'takeaway_info_completed', 'bank_info_completed'))
+    return (
+        sa.select(sales.c.store_id, sales.c.report_date,
+                  sa.func.max(done).label('done'), sa.func.max(steps).label('steps'))
+        .group_by(sales.c.store_id, sales.c.report_date)
+        .subquery('report_status')
+    )
+
+
+def find_missing_reports(first, last, store_ids=None):
+    """
+    功能：找出 [first, last] 内每个门店没有日报、或日报尚未完成的日期。
+    说明：
+        门店 × 日历表生成全部应有的 (门店, 日期)，与按 (门店, 日期) 汇总的日报（热表与历史表合并）
+        做一次左反连接，只返回有问题的组合；不在 Python 中逐店逐日查询。
+    参数：
+        first (date): 起始日期（含）。
+        last (date): 截止日期（含），不超过 first 之后 MAX_DAYS 天。
+        store_ids (list[str]): 只检查这些门店，默认全部门店。
+    返回：
+        list[tuple]: [(store_id, 日期, MISSING 或已完成步骤数), ...]，按门店、日期排序。
+    """
+    if last < first:
+        raise ValueError("截止日期不能早于起始日期")
+    if (last - first).days + 1 > MAX_DAYS:
+        raise ValueError(f"一次最多检查 {MAX_DAYS} 天")
+    ensure_calendar(first, last)
+
+    stores, calendar = Store.__table__, CalendarDay.__table__
+    status = _report_status(first, last, store_ids)
+    stmt = (
+        sa.select(stores.c.store_id, calendar.c.day, status.c.steps)
+        .select_from(
+            stores.join(calendar, calendar.c.day.between(first, last))
+            .outerjoin(status, sa.and_(status.c.store_id == stores.c.store_id,
+                                       status.c.report_date == calendar.c.day))
+        )
+        .where(sa.or_(status.c.store_id.is_(None), status.c.done == 0))
+        .order_by(stores.c.store_id, calendar.c.day)
+    )
+    if store_ids:
+        stmt = stmt.where(stores.c.store_id.in_(store_ids))
+    return [(store_id, day, MISSING if steps is None else int(steps))
+            for store_id, day, steps in db.session.execute(stmt)]
+
+
+def missing_report_matrix(first, last, store_ids=None):
+    """
+    功能：把 find_missing_reports 的结果整理为门店 × 日期矩阵，供页面展示。
+    返回：
+        dict: days 为日期列表；rows 为有问题的门店（门店名、各日期状态、缺报/未完成天数），
+              按缺报天数降序；complete_count 为全部按时完成的门店数。
+    """
+    problems = find_missing_reports(first, last, store_ids)
+    query = Store.query.order_by(Store.store_id)
+    if store_ids:
+        query = query.filter(Store.store_id.in_(store_ids))
+    names = {store.store_id: store.store_name for store in query}
+
+    rows = {}
+    for store_id, day, state in problems:
+        row = rows.setdefault(store_id, {"store_id": store_id, "store_name": names.get(store_id, store_id),
+                                         "cells": {}, "missing": 0, "incomplete": 0})
+        row["cells"][day] = state
+        row["missing" if state == MISSING else "incomplete"] += 1
+    return {
+        "days": [first + timedelta(days=i) for i in range((last - first).days + 1)],
+        "rows": sorted(rows.values(), key=lambda r: (-r["missing"], -r["incomplete"], r["store_id"])),
+        "complete_count": len(names) - len(rows),
+    }
+
+
+@job("detect_missing_reports", max_attempts=1)
+def detect_missing_reports_job(days=7, today=None):
+    """后台任务：检查截至昨天的最近 days 天，把缺报/未完成的门店写入应用日志"""
+    last = (today or date.today()) - timedelta(days=1)
+    first = last - timedelta(days=days - 1)
+    problems = {}
+    for store_id, day, state in find_missing_reports(first, last):
+        problems.setdefault(store_id, []).append(
+            f"{day:%m-%d}{'缺报' if state == MISSING else f'({state}/3)'}"
+        )
+    for store_id, items in problems.items():
+        logger.warning(f"门店 {store_id} 在 {first} 至 {last} 有 {len(items)} 天日报缺失或未完成: {', '.join(items)}")
+    logger.info(f"缺报检查完成（{first} 至 {last}），{len(problems)} 个门店有缺报或未完成的日报")
+    return problems
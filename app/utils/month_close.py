@@ -0,0 +1,123 @@
+# app/utils/month_close.py
+
+import sqlalchemy as sa
+from flask import Flask
+
+from app.extensions import db
+from app.models import MonthlyCloseSnapshot, Store, union_all_sales
+from app.utils.helpers import parse_month
+
+# 参与汇总的金额字段（快照中对应同名列）
+SUM_COLUMNS = [
+    'pos_total', 'takeaway_amount', 'bank_receipt_amount', 'bank_deposit', 'bank_fee',
+    'voucher_amount', 'cash_difference', 'electronic_difference', 'actual_sales',
+]
+
+# 子进程内的最小应用实例（每个进程创建一次，拥有独立的数据库连接池）
+_worker_app = None
+
+
+def compute_store_totals(store_ids, first, next_first):
+    """
+    功能：用一条分组聚合查询计算一组门店的当月汇总（热表与历史表合并）。
+    说明：只统计已最终提交的日报；unarchived_count 提示财务尚有未归档记录。
+    返回：
+        list[dict]: 每个门店一条，没有日报的门店各项为 0。
+    """
+    sales = union_all_sales(
+        ['store_id', 'archived'] + SUM_COLUMNS,
+        lambda t: [
+            t.c.store_id.in_(store_ids),
+            t.c.report_date >= first,
+            t.c.report_date < next_first,
+            t.c.is_submitted == sa.true(),
+        ]
+    )
+    rows = db.session.execute(
+        sa.select(
+            sales.c.store_id,
+            sa.func.count().label('report_count'),
+            sa.func.sum(sa.case((sales.c.archived == sa.true(), 0), else_=1)).label('unarchived_count'),
+            *[sa.func.coalesce(sa.func.sum(sales.c[name]), 0).label(name) for name in SUM_COLUMNS],
+        ).group_by(sales.c.store_id)
+    ).mappings().all()
+
+    by_store = {row['store_id']: dict(row) for row in rows}
+    results = []
+    for store_id in store_ids:
+        totals = by_store.get(store_id) or {'report_count': 0, 'unarchived_count': 0, **{n: 0 for n in SUM_COLUMNS}}
+        totals['store_id'] = store_id
+        results.append(totals)
+    return results
+
+
+def _init_worker(config_path):
+    """
+    进程池初始化：每个子进程只加载配置并初始化数据库（独立的连接，不复用父进程连接）。
+    不调用 create_app：子进程只做聚合查询，无需蓝图、日志文件，也不应启动审计、后台任务等线程。
+    """
+    global _worker_app
+    _worker_app = Flask(__name__)
+    _worker_app.config.from_object(config_path)
+    db.init_app(_worker_app)
+
+
+def _compute_in_worker(store_ids, first, next_first):
+    with _worker_app.app_context():
+        return compute_store_totals(store_ids, first, next_first)
+
+
+def pending_store_ids(month):
+    """尚未生成当月快照的门店（用于中断后续跑）"""
+    done = sa.select(MonthlyCloseSnapshot.store_id).where(MonthlyCloseSnapshot.month == month)
+    return db.session.execute(
+        sa.select(Store.store_id).where(Store.store_id.not_in(done)).order_by(Store.store_id)
+    ).scalars().all()
+
+
+def _save_snapshots(month, totals):
+    for item in totals:
+        db.session.add(MonthlyCloseSnapshot(month=month, **item))
+    db.session.commit()
+
+
+def run_month_close(month, config_path, workers=4, group_size=50, progress=None):
+    """
+    功能：执行月结，为所有尚无快照的门店生成当月快照。
+    说明：
+        门店按 group_size 分组，交给进程池并行计算；每组完成后立即写入并提交，
+        因此中断后重新执行只会计算剩余门店。workers=0 时在当前进程内顺序执行。
+    参数：
+        month (str): YYYY-MM。
+        config_path (str): 子进程创建应用时使用的配置导入路径（app.config["CONFIG_IMPORT_PATH"]）。
+        progress (callable): 每组完成后回调 progress(已完成组数, 总组数, 本组门店数)。
+    返回：
+        int: 本次新生成的快照条数。
+    """
+    first, next_first = parse_month(month)
+    store_ids = pending_store_ids(month)
+    groups = [store_ids[i:i + group_size] for i in range(0, len(store_ids), group_size)]
+    if not groups:
+        return 0
+
+    created = 0
+    if workers <= 0:
+        for index, group in enumerate(groups, 1):
+            _save_snapshots(month, compute_store_totals(group, first, next_first))
+            created += len(group)
+            if progress is not None:
+                progress(index, len(groups), len(group))
+        return created
+
+    # 进程池只在命令行月结时用到，不随模块导入进 Web 进程
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config_path,)) as pool:
+        futures = [pool.submit(_compute_in_worker, group, first, next_first) for group in groups]
+        for index, future in enumerate(as_completed(futures), 1):
+            totals = future.result()
+            _save_snapshots(month, totals)
+            created += len(totals)
+            if progress is not None:
+                progress(index, len(groups), len(totals))
+    return created
@@ -0,0 +1,173 @@
+# app/utils/profiler.py
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+from app.models import RoleType
+from app.utils import sql_timing
+
+# 触发方式：URL 加 ?_profile=1，或请求头 X-Profile: 1（仅管理员有效）
+PROFILE_QUERY_ARG = "_profile"
+PROFILE_HEADER = "X-Profile"
+# 保存的调用统计中列出的函数数
+SUMMARY_LINES = 40
+# 单次分析最多保存的 SQL 条数（N+1 问题的页面可能执行上千条）
+MAX_SQL_STATEMENTS = 500
+
+_CAPTURE_ID_RE = re.compile(r"^\d{14}_[0-9a-f]{8}$")
+
+
+def _capture_dir():
+    folder = current_app.config["PROFILER_DIR"]
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _requested():
+    return request.args.get(PROFILE_QUERY_ARG) == "1" or request.headers.get(PROFILE_HEADER) == "1"
+
+
+def _rate_limited(folder):
+    """按暂存目录中最近一分钟的分析结果计数，多个 worker 共用同一个限额"""
+    window_start = time.time() - 60
+    recent = 0
+    for entry in os.scandir(folder):
+        if entry.name.endswith(".json") and entry.stat().st_mtime >= window_start:
+            recent += 1
+    return recent >= current_app.config["PROFILER_MAX_PER_MINUTE"]
+
+
+def _start_profile():
+    if not current_app.config.get("PROFILER_ENABLED") or not _requested():
+        return
+    if not current_user.is_authenticated or current_user.role != RoleType.ADMIN:
+        return
+    if _rate_limited(_capture_dir()):
+        current_app.logger.warning(f"请求分析已达每分钟上限，跳过: {request.full_path}")
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # 同一线程中已有其它分析器在运行（例如本地调试器）
+        return
+    g._profile = {"profiler": profiler, "started": time.perf_counter()}
+    sql_timing.start_capture()
+
+
+def _finish_profile(response):
+    state = g.pop("_profile", None)
+    if state is None:
+        return response
+    state["profiler"].disable()
+    elapsed = time.perf_counter() - state["started"]
+    statements = sql_timing.stop_capture()
+    try:
+        capture_id = save_capture(state["profiler"], elapsed, statements, response.status_code)
+    except OSError as e:
+        current_app.logger.error(f"保存请求分析结果失败: {e}")
+        return response
+    response.headers["X-Profile-Id"] = capture_id
+    return response
+
+
+def _abort_profile(exc=None):
+    # 请求异常中断、未经过 after_request 时，确保关闭分析器
+    state = g.pop("_profile", None)
+    if state is not None:
+        state["profiler"].disable()
+        sql_timing.stop_capture()
+
+
+def save_capture(profiler, elapsed, statements, status_code):
+    """
+    功能：保存一次请求分析：<id>.prof 为 cProfile 原始数据（可用 snakeviz 等工具打开），
+         <id>.json 为请求信息、SQL 列表与按累计耗时排序的调用统计。超出 PROFILER_KEEP 的旧结果被删除。
+    返回：
+        str: 分析结果 ID。
+    """
+    folder = _capture_dir()
+    capture_id = f"{datetime.utcnow():%Y%m%d%H%M%S}_{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(os.path.join(folder, capture_id + ".prof"))
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(SUMMARY_LINES)
+    meta = {
+        "capture_id": capture_id,
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "username": current_user.username,
+        "status": status_code,
+        "duration_ms": round(elapsed * 1000, 1),
+        "sql_count": len(statements),
+        "sql_ms": round(sum(seconds for _, seconds in statements) * 1000, 1),
+        "sql": [{"statement": statement, "ms": round(seconds * 1000, 2)}
+                for statement, seconds in statements[:MAX_SQL_STATEMENTS]],
+        "summary": summary.getvalue(),
+    }
+    with open(os.path.join(folder, capture_id + ".json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    _prune(folder)
+    return capture_id
+
+
+def _prune(folder):
+    capture_ids = sorted(name[:-len(".json")] for name in os.listdir(folder) if name.endswith(".json"))
+    for capture_id in capture_ids[:-current_app.config["PROFILER_KEEP"]]:
+        for ext in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(folder, capture_id + ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_captures():
+    """最近的分析结果（不含 SQL 明细与调用统计），最新的在前"""
+    folder = _capture_dir()
+    captures = []
+    for name in sorted(os.listdir(folder), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(folder, name), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta.pop("sql", None)
+        meta.pop("summary", None)
+        captures.append(meta)
+    return captures
+
+
+def capture_path(capture_id, ext):
+    """分析结果文件路径；ID 格式不正确或文件不存在时返回 None"""
+    if not _CAPTURE_ID_RE.match(capture_id or ""):
+        return None
+    path = os.path.join(_capture_dir(), capture_id + ext)
+    return path if os.path.exists(path) else None
+
+
+def load_capture(capture_id):
+    path = capture_path(capture_id, ".json")
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def init_app(app):
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_abort_profile)
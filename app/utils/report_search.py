@@ -0,0 +1,195 @@
+# app/utils/report_search.py
+
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from app.extensions import db
+from app.models import DailySales, FinancialCheckStatus, Store
+from app.utils.cache import cache
+from app.utils.helpers import parse_month
+
+# 可筛选的步骤标志（值为 "1"/"0"，分别表示已完成/未完成）
+FLAGS = ("pos_info_completed", "takeaway_info_completed", "bank_info_completed", "is_submitted", "archived")
+STATUS_LABELS = {
+    FinancialCheckStatus.PENDING: "待核对",
+    FinancialCheckStatus.BANK_RECEIVED: "现金存款已到账",
+    FinancialCheckStatus.TAKEEAWAY_RECEIVED: "外卖收入已到账",
+    FinancialCheckStatus.AMOUNT_VERIFIED: "金额已核实",
+    FinancialCheckStatus.REQUIRES_REMEDIATION: "需要补交",
+    FinancialCheckStatus.CHECKED: "审核通过",
+}
+PAGE_SIZE = 50
+# MySQL 全文索引使用 ngram 分词（默认 ngram_token_size=2），更短的关键词改用 LIKE
+FULLTEXT_MIN_CHARS = 2
+# 无筛选条件时的分面计数缓存秒数（日报写入时立即失效，这里只是兜底）
+FACET_CACHE_TTL = 600
+
+
+def parse_filters(args):
+    """
+    功能：把查询参数解析为筛选条件，未填写的条件不出现在结果中。
+    参数：
+        args: request.args（MultiDict），store_id 与 status 可重复。
+    返回：
+        dict: store_ids、statuses、flags（{标志: bool}）、min_amount、max_amount、date_from、date_to、q；
+              month（YYYY-MM，分面中的月份链接）换算为 date_from/date_to。
+    异常：
+        ValueError: 参数格式不正确。
+    """
+    filters = {}
+    store_ids = [s.strip() for s in args.getlist("store_id") if s.strip()]
+    if store_ids:
+        filters["store_ids"] = sorted(set(store_ids))
+    statuses = [s for s in args.getlist("status") if s]
+    if statuses:
+        try:
+            filters["statuses"] = sorted({FinancialCheckStatus(s) for s in statuses}, key=lambda s: s.value)
+        except ValueError:
+            raise ValueError(f"未知的核对状态: {', '.join(statuses)}")
+    flags = {name: args[name] == "1" for name in FLAGS if args.get(name) in ("0", "1")}
+    if flags:
+        filters["flags"] = flags
+    for name in ("min_amount", "max_amount"):
+        if args.get(name):
+            try:
+                filters[name] = float(args[name])
+            except ValueError:
+                raise ValueError("金额应为数字")
+    if args.get("month"):
+        first, next_first = parse_month(args["month"])
+        filters["date_from"], filters["date_to"] = first, next_first - timedelta(days=1)
+    for name in ("date_from", "date_to"):
+        if args.get(name):
+            try:
+                filters[name] = datetime.strptime(args[name], "%Y-%m-%d").date()
+            except ValueError:
+                raise ValueError("日期格式应为 YYYY-MM-DD")
+    q = (args.get("q") or "").strip()
+    if q:
+        filters["q"] = q[:100]
+    return filters
+
+
+def _remark_condition(column, q):
+    """MySQL 上用全文索引（MATCH ... AGAINST 短语检索）；其它数据库或关键词过短时退化为 LIKE 包含匹配"""
+    dialect = db.session.get_bind(mapper=DailySales.__mapper__).dialect.name
+    if dialect == "mysql" and len(q) >= FULLTEXT_MIN_CHARS:
+        from sqlalchemy.dialects.mysql import match
+
+        return match(column, against='"{}"'.format(q.replace('"', " "))).in_boolean_mode()
+    return column.contains(q, autoescape=True)
+
+
+def _conditions(filters, table):
+    """按分面分组的 WHERE 条件：{分面: [条件, ...]}，计算某个分面时去掉它自己的条件"""
+    c = table.c
+    groups = {}
+    if "store_ids" in filters:
+        groups["store"] = [c.store_id.in_(filters["store_ids"])]
+    if "statuses" in filters:
+        groups["status"] = [c.financial_check_status.in_(filters["statuses"])]
+    if "flags" in filters:
+        groups["flags"] = [c[name] == sa.true() if value else c[name] == sa.false()
+                           for name, value in filters["flags"].items()]
+    date_range = []
+    if "date_from" in filters:
+        date_range.append(c.report_date >= filters["date_from"])
+    if "date_to" in filters:
+        date_range.append(c.report_date <= filters["date_to"])
+    if date_range:
+        groups["date"] = date_range
+    amount = []
+    if "min_amount" in filters:
+        amount.append(c.actual_sales >= filters["min_amount"])
+    if "max_amount" in filters:
+        amount.append(c.actual_sales <= filters["max_amount"])
+    if amount:
+        groups["amount"] = amount
+    if "q" in filters:
+        groups["remark"] = [_remark_condition(c.remark, filters["q"])]
+    return groups
+
+
+def _where(groups, exclude=None):
+    return [cond for name, conds in groups.items() if name != exclude for cond in conds]
+
+
+def compute_facets(filters):
+    """
+    功能：计算各分面的计数，固定四条分组查询，与筛选条件的多少无关。
+    说明：
+        每个分面去掉自身的条件后计数（例如选中某门店后，门店分面仍显示其它门店的条数），
+        步骤标志与结果总数在同一条查询中用 SUM(CASE ...) 得出。
+    返回：
+        dict: total、stores [(store_id, 条数)]、statuses [(状态值, 条数)]、
+              months [("YYYY-MM", 条数)]、flags {标志: 条数}。
+    """
+    table = DailySales.__table__
+    c = table.c
+    groups = _conditions(filters, table)
+    count = sa.func.count().label("n")
+
+    stores = db.session.execute(
+        sa.select(c.store_id, count).where(*_where(groups, "store"))
+        .group_by(c.store_id).order_by(count.desc(), c.store_id)
+    ).all()
+    statuses = db.session.execute(
+        sa.select(c.financial_check_status, count).where(*_where(groups, "status"))
+        .group_by(c.financial_check_status)
+    ).all()
+    year, month = sa.extract("year", c.report_date), sa.extract("month", c.report_date)
+    months = db.session.execute(
+        sa.select(year, month, count).where(*_where(groups, "date"))
+        .group_by(year, month).order_by(year.desc(), month.desc())
+    ).all()
+
+    flag_conds = groups.get("flags", [])
+    matched = sa.and_(*flag_conds) if flag_conds else sa.true()
+    row = db.session.execute(
+        sa.select(
+            sa.func.sum(sa.case((matched, 1), else_=0)),
+            *[sa.func.sum(sa.case((c[name] == sa.true(), 1), else_=0)) for name in FLAGS],
+        ).where(*_where(groups, "flags"))
+    ).one()
+
+    return {
+        "total": int(row[0] or 0),
+        "stores": [(store_id, n) for store_id, n in stores],
+        "statuses": sorted(((status.value, n) for status, n in statuses), key=lambda item: -item[1]),
+        "months": [(f"{int(y):04d}-{int(m):02d}", n) for y, m, n in months],
+        "flags": {name: int(value or 0) for name, value in zip(FLAGS, row[1:])},
+    }
+
+
+def search_reports(filters, page=1, per_page=PAGE_SIZE):
+    """
+    功能：日报检索，返回一页结果与全部分面计数。
+    说明：
+        共五条查询：一条取当前页（只取列表需要的列），四条分组查询计算分面与总数；
+        没有任何筛选条件时（打开页面的默认视图）分面计数走缓存，日报变更提交后失效。
+    返回：
+        dict: rows（当前页）、page、pages、facets（见 compute_facets）。
+    """
+    if filters:
+        facets = compute_facets(filters)
+    else:
+        facets = cache.get_or_set("report_facets", "unfiltered", lambda: compute_facets({}), FACET_CACHE_TTL)
+
+    table = DailySales.__table__
+    c = table.c
+    stores = Store.__table__
+    page = max(page, 1)
+    rows = db.session.execute(
+        sa.select(c.report_id, c.store_id, stores.c.store_name, c.report_date, c.actual_sales,
+                  c.financial_check_status, c.remark, *[c[name] for name in FLAGS])
+        .select_from(table.outerjoin(stores, stores.c.store_id == c.store_id))
+        .where(*_where(_conditions(filters, table)))
+        .order_by(c.report_date.desc(), c.report_id.desc())
+        .limit(per_page).offset((page - 1) * per_page)
+    ).mappings().all()
+    return {
+        "rows": rows,
+        "page": page,
+        "pages": max(1, -(-facets["total"] // per_page)),
+        "facets": facets,
+    }
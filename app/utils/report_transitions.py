@@ -0,0 +1,180 @@
+# app/utils/report_transitions.py
+
+from collections import namedtuple
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.extensions import db
+from app.models import DailySales, FinancialCheckStatus
+from app.utils import audit, cache, dashboard, live_events
+
+S = FinancialCheckStatus
+
+# guard: 执行前必须满足的状态（列名 -> 值，或值的元组表示"其中之一"）
+# sets: 状态列的新值；fields: 该操作允许同时写入的数据字段；event: 成功后推送的实时事件 (类型, 步骤)
+Transition = namedtuple("Transition", ["guard", "sets", "fields", "event"])
+
+_EDITABLE = {"archived": False, "is_submitted": False}
+_UNDER_REVIEW = {"archived": False, "is_submitted": True}
+
+# V3.1 日报流程：POS → 外卖/银行 → 最终提交 → 财务核对（PENDING → … → CHECKED）→ 归档
+TRANSITIONS = {
+    "save_pos": Transition(
+        guard=_EDITABLE,
+        sets={"pos_info_completed": True},
+        fields=("cash_income", "pos_income", "day_pass_income", "voucher_amount",
+                "cash_difference", "electronic_difference"),
+        event=("step_completed", "pos"),
+    ),
+    "save_takeaway": Transition(
+        guard={**_EDITABLE, "pos_info_completed": True},
+        sets={"takeaway_info_completed": True},
+        fields=("takeaway_amount",),
+        event=("step_completed", "takeaway"),
+    ),
+    "save_bank": Transition(
+        guard={**_EDITABLE, "pos_info_completed": True},
+        sets={"bank_info_completed": True},
+        fields=("bank_deposit", "bank_fee"),
+        event=("step_completed", "bank"),
+    ),
+    "submit": Transition(
+        guard={**_EDITABLE, "pos_info_completed": True, "takeaway_info_completed": True, "bank_info_completed": True},
+        sets={"is_submitted": True, "financial_check_status": S.PENDING},
+        fields=(),
+        event=("submitted", None),
+    ),
+    "bank_received": Transition(
+        guard={**_UNDER_REVIEW, "financial_check_status": (S.PENDING, S.TAKEEAWAY_RECEIVED)},
+        sets={"financial_check_status": S.BANK_RECEIVED},
+        fields=("bank_deposit",),
+        event=None,
+    ),
+    "takeaway_received": Transition(
+        guard={**_UNDER_REVIEW, "financial_check_status": (S.PENDING, S.BANK_RECEIVED)},
+        sets={"financial_check_status": S.TAKEEAWAY_RECEIVED},
+        fields=(),
+        event=None,
+    ),
+    "verify_amount": Transition(
+        guard={**_UNDER_REVIEW, "financial_check_status": (S.PENDING, S.BANK_RECEIVED, S.TAKEEAWAY_RECEIVED)},
+        sets={"financial_check_status": S.AMOUNT_VERIFIED},
+        fields=("bank_deposit", "voucher_amount", "remark"),
+        event=None,
+    ),
+    # 退回门店补交：重新开放编辑，门店修改后再次最终提交即回到 PENDING
+    "require_remediation": Transition(
+        guard={**_UNDER_REVIEW, "financial_check_status": (S.PENDING, S.BANK_RECEIVED, S.TAKEEAWAY_RECEIVED,
+                                                           S.AMOUNT_VERIFIED)},
+        sets={"financial_check_status": S.REQUIRES_REMEDIATION, "is_submitted": False},
+        fields=("remark",),
+        event=None,
+    ),
+    "check": Transition(
+        guard={**_UNDER_REVIEW, "financial_check_status": S.AMOUNT_VERIFIED},
+        sets={"financial_check_status": S.CHECKED},
+        fields=(),
+        event=None,
+    ),
+    "archive": Transition(
+        guard={**_UNDER_REVIEW, "financial_check_status": S.CHECKED},
+        sets={"archived": True},
+        fields=(),
+        event=("archived", None),
+    ),
+}
+
+
+class TransitionConflict(Exception):
+    """状态转换未生效：日报已被他人修改，或当前状态不允许该操作"""
+
+    def __init__(self, message, current_version=None):
+        super().__init__(message)
+        self.current_version = current_version
+
+
+def _guard_clauses(table, guard):
+    clauses = []
+    for name, expected in guard.items():
+        if isinstance(expected, tuple):
+            clauses.append(table.c[name].in_(expected))
+        else:
+            clauses.append(table.c[name] == expected)
+    return clauses
+
+
+def _guard_failures(report, guard):
+    failures = []
+    for name, expected in guard.items():
+        actual = getattr(report, name)
+        allowed = expected if isinstance(expected, tuple) else (expected,)
+        if actual not in allowed:
+            failures.append(f"{name}={actual.value if hasattr(actual, 'value') else actual}")
+    return failures
+
+
+def apply_transition(report, name, expected_version=None, **values):
+    """
+    功能：以一条条件 UPDATE（比较并交换）执行日报状态转换。
+    说明：
+        UPDATE daily_sales SET <新状态与数据>, version = version + 1
+        WHERE report_id = ? AND version = ? AND <转换前应满足的状态>
+        不加锁；影响行数为 0 说明期间已被他人修改或状态不符，抛出 TransitionConflict，
+        调用方应回滚并提示用户刷新，而不是覆盖他人的修改。
+    参数：
+        report (DailySales): 当前事务中已加载的日报，其 version 作为预期版本。
+        name (str): TRANSITIONS 中的转换名。
+        expected_version (int): 用户打开页面时看到的版本（表单隐藏字段），可选。
+        values: 本次一并写入的数据字段，必须在该转换的 fields 中。
+    返回：
+        int: 新的版本号。
+    """
+    transition = TRANSITIONS[name]
+    unknown = set(values) - set(transition.fields)
+    if unknown:
+        raise ValueError(f"状态转换 {name} 不允许修改字段: {', '.join(sorted(unknown))}")
+
+    version = report.version
+    if expected_version is not None and int(expected_version) != version:
+        raise TransitionConflict(f"日报已被他人修改（版本 {expected_version} → {version}），请刷新页面后重试。", version)
+
+    table = DailySales.__table__
+    now = datetime.utcnow()
+    changes = {**values, **transition.sets}
+    result = db.session.execute(
+        table.update()
+        .where(table.c.report_id == report.report_id, table.c.version == version,
+               *_guard_clauses(table, transition.guard))
+        .values(**changes, version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount != 1:
+        db.session.refresh(report)
+        if report.version != version:
+            raise TransitionConflict(f"日报已被他人修改（版本 {version} → {report.version}），请刷新页面后重试。",
+                                     report.version)
+        failures = _guard_failures(report, transition.guard)
+        raise TransitionConflict(f"当前状态不允许执行“{name}”: {', '.join(failures) or '状态不符'}", report.version)
+
+    # UPDATE 不经过 ORM flush，变更审计、实时事件与缓存失效在这里登记（同样在事务提交后才生效）
+    for field in audit.AUDITED_FIELDS:
+        if field in changes:
+            audit.queue_change(db.session, report, field, getattr(report, field), changes[field])
+    if transition.event is not None:
+        live_events.queue_event(db.session, report, *transition.event)
+    # 状态与步骤标志都参与日报检索的分面计数
+    cache.invalidate_on_commit(db.session, "report_facets")
+    if "archived" in changes:
+        # 首页营业额只统计已归档日报：缓存失效后由后台任务重新计算，首页请求不必同步重算
+        cache.invalidate_on_commit(db.session, "dashboard")
+        dashboard.queue_refresh()
+
+    # 同步内存中的对象，且不标记为已修改（避免 flush 时再次 UPDATE）
+    for field, value in changes.items():
+        set_committed_value(report, field, value)
+    set_committed_value(report, "version", version + 1)
+    set_committed_value(report, "updated_at", now)
+    # 生成列（pos_total、actual_sales 等）由数据库重新计算，下次访问时再加载
+    db.session.expire(report, [column.key for column in table.c if column.computed is not None])
+    return version + 1
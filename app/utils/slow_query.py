@@ -0,0 +1,260 @@
+# app/utils/slow_query.py
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+
+from flask import current_app, has_app_context, has_request_context, request
+
+from app.utils import sql_timing
+
+LOGGER_NAME = "app.slow_query"
+# 只对这些语句执行 EXPLAIN（EXPLAIN 本身不会执行 UPDATE/DELETE）
+EXPLAINABLE = ("select", "update", "delete")
+# 各数据库查看执行计划的前缀
+EXPLAIN_PREFIX = {"mysql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))*\s*\)")
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s")
+_TABLE_RE = re.compile(r"\b(?:from|join|update|into)\s+`?(\w+)`?", re.IGNORECASE)
+
+logger = logging.getLogger(LOGGER_NAME)
+logger.propagate = False
+
+
+def fingerprint(statement):
+    """
+    功能：把语句归一化为"指纹"：常量与占位符统一为 ?，IN 列表折叠为 (...)，空白压缩。
+         同一访问路径只因参数个数不同（如 IN 列表长度）产生的语句归为一组。
+    返回：
+        tuple: (归一化后的语句, 12 位摘要)
+    """
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST_RE.sub("(...)", normalized)
+    normalized = _PLACEHOLDER_RE.sub("?", normalized)
+    normalized = " ".join(normalized.split())
+    return normalized, hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def tables(statement):
+    """语句中出现的表名（FROM / JOIN / UPDATE / INTO 之后），用于按表筛选"""
+    return sorted({name.lower() for name in _TABLE_RE.findall(statement)})
+
+
+def redact(value):
+    """
+    对语句参数脱敏后返回可写入日志的结构。
+    数字、日期与空值保留，便于复现；字符串可能是用户名、手机号或密码哈希，只记录类型与长度。
+    """
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+class SlowQueryRecorder:
+    """
+    慢查询记录器。
+    语句执行线程只把慢查询放进队列；后台线程负责执行 EXPLAIN（同一指纹在
+    SLOW_QUERY_EXPLAIN_INTERVAL 秒内只执行一次）并写入滚动日志，不拖慢原请求。
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue(maxsize=1000)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._explained = {}
+        self.dropped = 0
+
+    def init_app(self, app):
+        if self.app is None:
+            atexit.register(self.drain)
+        self.app = app
+        path = os.path.abspath(app.config["SLOW_QUERY_LOG"])
+        if not any(getattr(h, "baseFilename", None) == path for h in logger.handlers):
+            # 每个进程只写一个日志文件；配置变化（如测试中多次创建应用）时替换原有 handler
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=app.config["SLOW_QUERY_LOG_MAX_BYTES"],
+                                          backupCount=app.config["SLOW_QUERY_LOG_BACKUPS"], encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+    def record(self, engine, statement, parameters, elapsed):
+        if has_request_context():
+            source = request.endpoint or request.path
+            view = current_app.view_functions.get(request.endpoint)
+            view_name = f"{view.__module__}.{view.__qualname__}" if view is not None else None
+        else:
+            source, view_name = threading.current_thread().name, None
+        entry = {
+            "at": datetime.utcnow().isoformat(timespec="seconds"),
+            "ms": round(elapsed * 1000, 1),
+            "statement": statement,
+            "params": redact(parameters),
+            "endpoint": source,
+            "view": view_name,
+        }
+        try:
+            self._queue.put_nowait((engine, parameters, entry))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_thread()
+
+    def _ensure_thread(self):
+        # gunicorn fork 出的 worker 不继承父进程的线程，按进程号判断是否需要重新启动
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._write(*item)
+            except Exception:
+                self.app.logger.exception("慢查询日志写入失败")
+            finally:
+                self._queue.task_done()
+
+    def drain(self):
+        """在当前线程写完队列中剩余的记录，并等待后台线程正在写的一条（进程退出时、测试中使用）"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def _write(self, engine, parameters, entry):
+        normalized, digest = fingerprint(entry["statement"])
+        entry["fingerprint"] = digest
+        entry["tables"] = tables(entry["statement"])
+        entry["explain"] = self._explain(engine, entry["statement"], parameters, digest)
+        logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+
+    def _explain(self, engine, statement, parameters, digest):
+        prefix = EXPLAIN_PREFIX.get(engine.dialect.name)
+        if prefix is None or not statement.lstrip().lower().startswith(EXPLAINABLE):
+            return None
+        if isinstance(parameters, list):  # executemany
+            return None
+        now = time.monotonic()
+        interval = self.app.config.get("SLOW_QUERY_EXPLAIN_INTERVAL", 600)
+        if now - self._explained.get(digest, -interval) < interval:
+            return None
+        self._explained[digest] = now
+        try:
+            with engine.connect() as conn:
+                result = conn.exec_driver_sql(prefix + statement, parameters or ())
+                return {"columns": list(result.keys()), "rows": [[str(v) for v in row] for row in result]}
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+
+recorder = SlowQueryRecorder()
+
+
+@sql_timing.on_statement
+def _check_statement(conn, statement, parameters, context, executemany, elapsed):
+    if not has_app_context():
+        return
+    threshold = current_app.config.get("SLOW_QUERY_MS", 0)
+    if threshold <= 0 or elapsed * 1000 < threshold:
+        return
+    # 后台线程执行的 EXPLAIN 本身不再记录
+    if statement.lstrip()[:7].upper() == "EXPLAIN":
+        return
+    recorder.record(conn.engine, statement, list(parameters) if executemany else parameters, elapsed)
+
+
+def read_entries(limit=5000):
+    """从滚动日志（含备份文件）中读取最近 limit 条慢查询记录，最新的在后"""
+    path = os.path.abspath(current_app.config["SLOW_QUERY_LOG"])
+    files = [f"{path}.{i}" for i in range(current_app.config["SLOW_QUERY_LOG_BACKUPS"], 0, -1)] + [path]
+    entries = deque(maxlen=limit)
+    for name in files:
+        try:
+            with open(name, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+    return list(entries)
+
+
+def group_by_fingerprint(entries, table=None):
+    """
+    功能：按语句指纹分组汇总。
+    返回：
+        list[dict]: 每组的次数、总/平均/最大耗时、涉及的视图、最近一次的语句与执行计划，按总耗时降序。
+    """
+    groups = {}
+    for entry in entries:
+        if table and table not in entry.get("tables", []):
+            continue
+        normalized, digest = fingerprint(entry["statement"])
+        group = groups.setdefault(digest, {
+            "fingerprint": digest, "normalized": normalized, "tables": entry.get("tables", []),
+            "count": 0, "total_ms": 0.0, "max_ms": 0.0, "endpoints": set(), "explain": None,
+        })
+        group["count"] += 1
+        group["total_ms"] += entry["ms"]
+        group["max_ms"] = max(group["max_ms"], entry["ms"])
+        group["endpoints"].add(entry.get("view") or entry.get("endpoint") or "-")
+        group["last_at"] = entry["at"]
+        group["sample"] = entry
+        if entry.get("explain"):
+            group["explain"] = entry["explain"]
+    result = sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+    for group in result:
+        group["avg_ms"] = round(group["total_ms"] / group["count"], 1)
+        group["total_ms"] = round(group["total_ms"], 1)
+        group["endpoints"] = sorted(group["endpoints"])
+    return result
+
+
+def init_app(app):
+    recorder.init_app(app)
+    return app
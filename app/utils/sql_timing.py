@@ -0,0 +1,52 @@
+# app/utils/sql_timing.py
+
+import time
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 每条语句执行完成后回调 callback(conn, statement, parameters, context, executemany, 秒)，见 on_statement
+_observers = []
+
+
+def on_statement(callback):
+    """注册语句执行完成后的回调（如慢查询日志）；回调中不应再执行 SQL"""
+    if callback not in _observers:
+        _observers.append(callback)
+    return callback
+
+
+def start_capture():
+    """开始记录当前请求执行的 SQL（语句与耗时），供请求分析使用"""
+    g._sql_capture = []
+
+
+def stop_capture():
+    """
+    结束记录并取出结果。
+    返回：
+        list[tuple]: [(statement, 秒), ...]，按执行顺序。
+    """
+    return g.pop("_sql_capture", None) or []
+
+
+# 监听 Engine 类：主库与只读副本（SQLALCHEMY_BINDS）的所有连接都会计时
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_timing_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_sql_timing_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if has_request_context():
+        captured = g.get("_sql_capture")
+        if captured is not None:
+            captured.append((statement, elapsed))
+    for callback in _observers:
+        callback(conn, statement, parameters, context, executemany, elapsed)
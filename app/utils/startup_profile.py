@@ -0,0 +1,95 @@
+# app/utils/startup_profile.py
+
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# 在独立的子进程中执行，保证测量的是"干净"的冷启动，而不是当前 CLI 进程
+_PROBE_SCRIPT = r"""
+import cProfile, json, os, pstats, resource, sys, time
+root = os.getcwd()
+t0 = time.perf_counter()
+import config
+t1 = time.perf_counter()
+import app as app_pkg
+t2 = time.perf_counter()
+profiler = cProfile.Profile()
+profiler.enable()
+app_pkg.create_app(sys.argv[1])
+profiler.disable()
+t3 = time.perf_counter()
+stats = pstats.Stats(profiler)
+factory = []
+for (filename, lineno, func), (cc, nc, tt, ct, callers) in stats.stats.items():
+    if filename.startswith(root) and "site-packages" not in filename:
+        factory.append([os.path.relpath(filename, root) + ":" + func, ct])
+factory.sort(key=lambda item: item[1], reverse=True)
+print(json.dumps({
+    "phases": {"import config": t1 - t0, "import app": t2 - t1, "create_app()": t3 - t2},
+    "factory": factory,
+    "modules": len(sys.modules),
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def parse_importtime(stderr):
+    """
+    功能：解析 python -X importtime 的输出。
+    返回：
+        list[dict]: 每个模块的 {module, self_us, cumulative_us, depth}
+    """
+    records = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        records.append({
+            "module": module,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(indent) - 1) // 2,
+        })
+    return records
+
+
+def summarize_by_package(records):
+    """按顶层包汇总模块自身导入耗时（微秒），便于看出 faker/alembic 等大头"""
+    totals = defaultdict(int)
+    for record in records:
+        totals[record["module"].split(".")[0]] += record["self_us"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def profile_startup(project_root, config_path):
+    """
+    功能：在子进程中冷启动应用，采集导入耗时与应用工厂耗时。
+    参数：
+        project_root (str): 项目根目录（config.py 所在目录）。
+        config_path (str): 配置类的导入路径，如 "config.DevelopmentConfig"。
+    返回：
+        dict: {phases, factory, modules, max_rss_kb, imports, packages}
+    异常：
+        RuntimeError: 子进程启动失败时抛出，附带其错误输出。
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = project_root + os.pathsep + env.get("PYTHONPATH", "")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE_SCRIPT, config_path],
+        cwd=project_root, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"启动分析子进程失败:\n{proc.stderr[-2000:]}")
+
+    # 结果位于最后一行（之前可能有应用自身的输出）
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(proc.stderr)
+    result["imports"] = imports
+    result["packages"] = summarize_by_package(imports)
+    return result
@@ -0,0 +1,231 @@
+# app/utils/user_import.py
+
+import csv
+import io
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db
+from app.models import RoleType, Store, User
+
+# CSV 表头：前三列必填，其余可选
+REQUIRED_COLUMNS = ("username", "password", "role")
+OPTIONAL_COLUMNS = ("store_id", "real_name", "phone", "email")
+RESULT_COLUMNS = ("line", "username", "status", "user_id", "message")
+# 门店组角色必须填写 store_id，管理组角色不能填写
+STORE_ROLES = (RoleType.BRANCH_MANAGER, RoleType.EMPLOYEE)
+# IN 列表每次查询的元素个数
+_IN_CHUNK = 500
+
+
+class ImportFileError(ValueError):
+    """CSV 文件整体无法导入（缺少表头、行数超限等），不逐行报告"""
+
+
+def _parse_role(value):
+    value = (value or "").strip()
+    for role in RoleType:
+        if value.lower() in (role.value, role.name.lower()):
+            return role
+    return None
+
+
+def read_rows(stream, max_rows=None):
+    """
+    功能：读取 CSV（UTF-8，可带 BOM），返回 [(行号, {列名: 值}), ...]，空行跳过。
+    异常：
+        ImportFileError: 缺少必填列或超过 max_rows 行时抛出。
+    """
+    text = stream.read()
+    if isinstance(text, bytes):
+        try:
+            text = text.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ImportFileError("文件编码应为 UTF-8")
+    reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+    header = [name.strip() for name in reader.fieldnames or []]
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ImportFileError(f"缺少必填列: {', '.join(missing)}")
+    reader.fieldnames = header
+
+    rows = []
+    for row in reader:
+        values = {name: (row.get(name) or "").strip() for name in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+        if not any(values.values()):
+            continue
+        rows.append((reader.line_num, values))
+        if max_rows is not None and len(rows) > max_rows:
+            raise ImportFileError(f"一次最多导入 {max_rows} 个用户")
+    return rows
+
+
+def _existing(column, values):
+    """分批查询 column 中已存在的值（每批一条 IN 查询）"""
+    values = sorted(set(values))
+    found = set()
+    for i in range(0, len(values), _IN_CHUNK):
+        found.update(db.session.execute(
+            sa.select(column).where(column.in_(values[i:i + _IN_CHUNK]))
+        ).scalars())
+    return found
+
+
+def validate_rows(rows):
+    """
+    功能：逐行校验，门店与已有用户名各用一条（分批的）IN 查询核对，不逐行查库。
+    返回：
+        tuple: (通过校验的 [(行号, values, RoleType)], 未通过的结果行列表)
+    """
+    store_ids = _existing(Store.store_id, [v["store_id"] for _, v in rows if v["store_id"]])
+    taken = _existing(User.username, [v["username"] for _, v in rows if v["username"]])
+
+    valid, errors, seen = [], [], set()
+    for line, values in rows:
+        username, role = values["username"], _parse_role(values["role"])
+        if not 4 <= len(username) <= 64:
+            message = "用户名长度应为 4~64 个字符"
+        elif username in taken:
+            message = "用户名已存在"
+        elif username in seen:
+            message = "用户名在文件中重复"
+        elif len(values["password"]) < 6:
+            message = "密码至少 6 位"
+        elif role is None:
+            message = f"未知角色: {values['role']}"
+        elif role in STORE_ROLES and not values["store_id"]:
+            message = "门店组用户必须填写 store_id"
+        elif role not in STORE_ROLES and values["store_id"]:
+            message = "管理组用户不能填写 store_id"
+        elif values["store_id"] and values["store_id"] not in store_ids:
+            message = f"门店不存在: {values['store_id']}"
+        else:
+            message = None
+        seen.add(username)
+        if message:
+            errors.append(_result(line, username, "error", message=message))
+        else:
+            valid.append((line, values, role))
+    return valid, errors
+
+
+def hash_passwords(passwords, workers=4):
+    """
+    功能：计算密码哈希。Werkzeug 的哈希算法刻意设计得很慢（每个约 0.1~0.2 秒），
+         因此交给进程池并行计算；workers=0 时在当前进程内顺序计算。
+         进程池使用 spawn 方式启动：Web 请求中调用时，gunicorn worker 已有后台线程（审计、任务等），
+         fork 会复制持有中的锁和数据库连接，子进程可能死锁。
+    返回：
+        list[str]: 与 passwords 顺序一致的哈希。
+    """
+    if workers <= 0 or len(passwords) < 2:
+        return [generate_password_hash(p) for p in passwords]
+    # 只在批量导入时才需要进程池
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(workers, len(passwords))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(generate_password_hash, passwords,
+                             chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def _result(line, username, status, user_id=None, message=""):
+    return {"line": line, "username": username, "status": status, "user_id": user_id, "message": message}
+
+
+def _insert_batch(batch):
+    """
+    插入一批用户并提交；违反约束时回滚，改为逐条插入以定位失败的行。
+    返回：
+        dict: {行号: 失败原因}，全部成功时为空。
+    """
+    table = User.__table__
+    try:
+        db.session.execute(table.insert(), [values for _, values in batch])
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+    else:
+        return {}
+    failed = {}
+    for line, values in batch:
+        try:
+            db.session.execute(table.insert().values(**values))
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            # 校验之后被并发创建的同名用户最常见；其它约束（如门店刚被删除）如实报告数据库的错误
+            if db.session.execute(sa.select(User.user_id).where(User.username == values["username"])).first():
+                failed[line] = "用户名已存在"
+            else:
+                failed[line] = f"写入失败: {e.orig}"
+    return failed
+
+
+def import_users(stream, workers=4, batch_size=200, max_rows=None, progress=None):
+    """
+    功能：从 CSV 批量创建用户。
+    说明：
+        1. 读取并校验全部行（门店、已有用户名各一次批量查询）；
+        2. 通过校验的密码交给进程池并行哈希；
+        3. 分批插入（每批一条多行 INSERT 并提交），批内有冲突时逐条重试。
+        校验失败的行不影响其它行。
+    参数：
+        stream: 二进制或文本文件对象。
+        workers (int): 哈希进程数，0 表示在当前进程内计算。
+        batch_size (int): 每批插入的用户数。
+        max_rows (int): 文件最多包含的用户数，可选。
+        progress (callable): 每批插入后回调 progress(已处理条数, 待插入总条数)。
+    返回：
+        list[dict]: 每行一条结果（line、username、status=created/error、user_id、message），按行号排序。
+    """
+    rows = read_rows(stream, max_rows=max_rows)
+    valid, results = validate_rows(rows)
+    hashes = hash_passwords([values["password"] for _, values, _ in valid], workers=workers)
+
+    now = datetime.now()
+    pending = []
+    for (line, values, role), password_hash in zip(valid, hashes):
+        pending.append((line, {
+            "username": values["username"],
+            "password_hash": password_hash,
+            "role": role,
+            "store_id": values["store_id"] or None,
+            "real_name": values["real_name"] or None,
+            "phone": values["phone"] or None,
+            "email": values["email"] or None,
+            "user_status": 1,
+            "is_primary_contact": False,
+            "profile_completed": False,
+            "last_login_time": now,
+            "created_at": now,
+            "updated_at": now,
+        }))
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        failed = _insert_batch(batch)
+        inserted = {values["username"]: line for line, values in batch if line not in failed}
+        for line, values in batch:
+            if line in failed:
+                results.append(_result(line, values["username"], "error", message=failed[line]))
+        if inserted:
+            for user_id, username in db.session.execute(
+                sa.select(User.user_id, User.username).where(User.username.in_(list(inserted)))
+            ):
+                results.append(_result(inserted[username], username, "created", user_id=user_id))
+        if progress is not None:
+            progress(start + len(batch), len(pending))
+    return sorted(results, key=lambda r: r["line"])
+
+
+def write_results(results, stream):
+    """把逐行结果写为 CSV（带 BOM，便于用 Excel 打开）"""
+    stream.write("\ufeff")
+    writer = csv.DictWriter(stream, fieldnames=RESULT_COLUMNS)
+    writer.writeheader()
+    writer.writerows(results)
@@ -0,0 +1,243 @@
+from datetime import date, datetime, timedelta
+from functools import wraps
+
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, send_file, url_for
+from flask_login import current_user, login_required
+
+from app.extensions import db
+from app.models import DailySalesAudit, Job, JobStatus, RoleType
+from app.utils import audit, jobs, missing_reports, profiler, report_search, slow_query
+from app.utils.cache import NAMESPACES, cache
+from app.views.admin_user_views import admin_required
+
+admin_ops_bp = Blueprint('admin_ops', __name__, url_prefix='/admin/ops')
+
+def system_admin_required(func):
+    """仅系统管理员可访问（请求分析记录包含 SQL 文本、参数与管理页面路径，不对财务、总店长开放）"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if current_user.role != RoleType.ADMIN:
+            abort(403)
+        return func(*args, **kwargs)
+    return wrapper
+
+@admin_ops_bp.route('/jobs')
+@login_required
+@admin_required
+def job_list():
+    """
+    后台任务状态页：按状态筛选，最新的任务在前。
+    """
+    status = request.args.get('status', '')
+    page = request.args.get('page', 1, type=int)
+
+    query = Job.query
+    if status:
+        try:
+            query = query.filter(Job.status == JobStatus(status))
+        except ValueError:
+            status = ''
+    pagination = query.order_by(Job.job_id.desc()).paginate(
+        page=page, per_page=current_app.config.get('RECORDS_PER_PAGE', 10), error_out=False
+    )
+    counts = dict(db.session.query(Job.status, db.func.count()).group_by(Job.status).all())
+    return render_template('admin/jobs.html', jobs=pagination.items, pagination=pagination,
+                           statuses=list(JobStatus), counts=counts, status=status,
+                           handlers=sorted(jobs.load_handlers()),
+                           worker_threads=current_app.config.get('JOB_WORKER_THREADS', 0))
+
+@admin_ops_bp.route('/jobs/<int:job_id>/retry', methods=['POST'])
+@login_required
+@admin_required
+def job_retry(job_id):
+    """将最终失败的任务重新放回队列"""
+    if jobs.retry_job(job_id):
+        flash(f'任务 #{job_id} 已重新排队', 'success')
+    else:
+        flash(f'任务 #{job_id} 无法重试（不是失败状态，或同类任务正在排队）', 'warning')
+    return redirect(url_for('admin_ops.job_list'))
+
+@admin_ops_bp.route('/jobs/archive-reports', methods=['POST'])
+@login_required
+@admin_required
+def enqueue_archive_reports():
+    """登记一次"已归档日报迁入历史表"任务，由后台工作线程执行"""
+    jobs.enqueue('archive_reports', {'older_than_months': 6}, dedup_key='archive_reports')
+    db.session.commit()
+    flash('已登记归档迁移任务，稍后刷新查看执行结果', 'info')
+    return redirect(url_for('admin_ops.job_list'))
+
+@admin_ops_bp.route('/jobs/archive-attachments', methods=['POST'])
+@login_required
+@admin_required
+def enqueue_archive_attachments():
+    """登记一次"旧附件转入冷存储"任务，由后台工作线程执行"""
+    jobs.enqueue('archive_attachments', {'older_than_months': 3}, dedup_key='archive_attachments')
+    db.session.commit()
+    flash('已登记附件冷存储任务，稍后刷新查看执行结果', 'info')
+    return redirect(url_for('admin_ops.job_list'))
+
+@admin_ops_bp.route('/audit')
+@login_required
+@admin_required
+def audit_list():
+    """
+    日报变更审计：按日报ID、门店、字段筛选，最近的变更在前。
+    （审计记录批量延迟写入，最近几秒内的修改可能尚未出现）
+    """
+    report_id = request.args.get('report_id', type=int)
+    store_id = request.args.get('store_id', '').strip()
+    field_name = request.args.get('field_name', '')
+    page = request.args.get('page', 1, type=int)
+
+    query = DailySalesAudit.query
+    if report_id:
+        query = query.filter(DailySalesAudit.report_id == report_id)
+    if store_id:
+        query = query.filter(DailySalesAudit.store_id == store_id)
+    if field_name in audit.AUDITED_FIELDS:
+        query = query.filter(DailySalesAudit.field_name == field_name)
+    else:
+        field_name = ''
+    pagination = query.order_by(DailySalesAudit.audit_id.desc()).paginate(
+        page=page, per_page=current_app.config.get('RECORDS_PER_PAGE', 10), error_out=False
+    )
+    filters = {'report_id': report_id or '', 'store_id': store_id, 'field_name': field_name}
+    return render_template('admin/audit.html', records=pagination.items, pagination=pagination,
+                           fields=audit.AUDITED_FIELDS, filters=filters)
+
+@admin_ops_bp.route('/profiles')
+@login_required
+@system_admin_required
+def profile_list():
+    """
+    请求分析记录：管理员在慢页面的 URL 后加 ?_profile=1 访问一次，即可在此查看耗时分布与执行的 SQL。
+    """
+    return render_template('admin/profiles.html', captures=profiler.list_captures(),
+                           enabled=current_app.config.get('PROFILER_ENABLED'),
+                           max_per_minute=current_app.config.get('PROFILER_MAX_PER_MINUTE'))
+
+@admin_ops_bp.route('/profiles/<capture_id>')
+@login_required
+@system_admin_required
+def profile_detail(capture_id):
+    """单次请求分析：按累计耗时排序的调用统计与 SQL 明细"""
+    capture = profiler.load_capture(capture_id)
+    if capture is None:
+        abort(404)
+    return render_template('admin/profile_detail.html', capture=capture)
+
+@admin_ops_bp.route('/profiles/<capture_id>/download')
+@login_required
+@system_admin_required
+def profile_download(capture_id):
+    """下载 cProfile 原始数据（.prof），可用 snakeviz、pstats 等工具打开"""
+    path = profiler.capture_path(capture_id, '.prof')
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=f'{capture_id}.prof',
+                     mimetype='application/octet-stream')
+
+@admin_ops_bp.route('/slow-queries')
+@login_required
+@admin_required
+def slow_query_list():
+    """
+    慢查询：按语句指纹分组，按总耗时排序，可按表筛选（如 daily_sales、users），
+    结合执行计划判断哪些访问路径缺少索引。
+    """
+    table = request.args.get('table', '').strip().lower()
+    entries = slow_query.read_entries()
+    groups = slow_query.group_by_fingerprint(entries, table=table or None)
+    all_tables = sorted({name for entry in entries for name in entry.get('tables', [])})
+    return render_template('admin/slow_queries.html', groups=groups, table=table, tables=all_tables,
+                           entry_count=len(entries), threshold=current_app.config.get('SLOW_QUERY_MS'))
+
+@admin_ops_bp.route('/missing-reports')
+@login_required
+@admin_required
+def missing_report_list():
+    """
+    缺报检查：门店 × 日期矩阵，标出没有日报或日报尚未完成的日期（默认截至昨天的最近 30 天）。
+    """
+    last = date.today() - timedelta(days=1)
+    first = last - timedelta(days=29)
+    try:
+        if request.args.get('start'):
+            first = datetime.strptime(request.args['start'], '%Y-%m-%d').date()
+        if request.args.get('end'):
+            last = datetime.strptime(request.args['end'], '%Y-%m-%d').date()
+    except ValueError:
+        flash('日期格式应为 YYYY-MM-DD', 'warning')
+        return redirect(url_for('admin_ops.missing_report_list'))
+    store_id = request.args.get('store_id', '').strip()
+
+    try:
+        matrix = missing_reports.missing_report_matrix(first, last, [store_id] if store_id else None)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        return redirect(url_for('admin_ops.missing_report_list'))
+    return render_template('admin/missing_reports.html', matrix=matrix, first=first, last=last,
+                           store_id=store_id, missing=missing_reports.MISSING)
+
+@admin_ops_bp.route('/jobs/missing-reports', methods=['POST'])
+@login_required
+@admin_required
+def enqueue_missing_reports():
+    """登记一次缺报检查任务（最近 7 天），结果写入应用日志"""
+    jobs.enqueue('detect_missing_reports', {'days': 7}, dedup_key='detect_missing_reports')
+    db.session.commit()
+    flash('已登记缺报检查任务，结果将写入应用日志', 'info')
+    return redirect(url_for('admin_ops.job_list'))
+
+@admin_ops_bp.route('/report-search')
+@login_required
+@admin_required
+def report_search_list():
+    """
+    日报检索：按门店、核对状态、步骤标志、实际营业额区间、营业日期与备注关键词筛选，
+    同时显示各分面的计数；format=json 时返回 JSON。
+    """
+    try:
+        filters = report_search.parse_filters(request.args)
+    except ValueError as e:
+        if request.args.get('format') == 'json':
+            return {'error': str(e)}, 400
+        flash(str(e), 'warning')
+        return redirect(url_for('admin_ops.report_search_list'))
+    result = report_search.search_reports(filters, page=request.args.get('page', 1, type=int))
+
+    if request.args.get('format') == 'json':
+        return {
+            'total': result['facets']['total'],
+            'page': result['page'],
+            'pages': result['pages'],
+            'rows': [{**row, 'report_date': row['report_date'].isoformat(),
+                      'financial_check_status': row['financial_check_status'].value}
+                     for row in result['rows']],
+            'facets': result['facets'],
+        }
+    # 分页链接保留当前筛选条件
+    args = request.args.to_dict(flat=False)
+    args.pop('page', None)
+    return render_template('admin/report_search.html', result=result, filters=filters, args=args,
+                           flags=report_search.FLAGS,
+                           status_labels={s.value: label for s, label in report_search.STATUS_LABELS.items()})
+
+@admin_ops_bp.route('/cache')
+@login_required
+@admin_required
+def cache_stats():
+    """两级缓存：当前 worker 进程内各层的命中统计，可按命名空间手动失效"""
+    return render_template('admin/cache.html', stats=cache.stats(), namespaces=NAMESPACES)
+
+@admin_ops_bp.route('/cache/<namespace>/invalidate', methods=['POST'])
+@login_required
+@admin_required
+def cache_invalidate(namespace):
+    """使某个命名空间的缓存立即失效（所有 worker 共用的版本号加一）"""
+    if namespace not in NAMESPACES:
+        abort(404)
+    cache.invalidate(namespace)
+    flash(f'已使“{NAMESPACES[namespace]}”缓存失效', 'success')
+    return redirect(url_for('admin_ops.cache_stats'))
@@ -1,9 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import io
+
+from flask import Blueprint, Response, current_app, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app.models import User, RoleType, Store
 from app.forms.user_forms import EditProfileForm, RegistrationForm
 from app.extensions import db
 from functools import wraps
+from sqlalchemy import or_
 
 admin_user_bp = Blueprint('admin_user', __name__, url_prefix='/admin/users')
 
@@ -20,12 +23,40 @@ def admin_required(func):
 @login_required
 @admin_required
 def user_list():
-    q = request.args.get('q', '')
+    """
+    用户列表：按用户名/真实姓名/电话前缀搜索，支持角色、门店、状态筛选并分页。
+    前缀匹配（LIKE 'q%'）可以走索引，避免全表扫描；总数由分页对象单独 COUNT，不加载全部行。
+    """
+    q = request.args.get('q', '').strip()
+    role = request.args.get('role', '')
+    store_id = request.args.get('store_id', '')
+    status = request.args.get('status', '')
+    page = request.args.get('page', 1, type=int)
+
     users = User.query
     if q:
-        users = users.filter(User.username.contains(q))
-    users = users.order_by(User.user_id.desc()).all()
-    return render_template('admin/user_list.html', users=users, q=q)
+        users = users.filter(or_(
+            User.username.startswith(q, autoescape=True),
+            User.real_name.startswith(q, autoescape=True),
+            User.phone.startswith(q, autoescape=True),
+        ))
+    if role:
+        try:
+            users = users.filter(User.role == RoleType(role))
+        except ValueError:
+            role = ''
+    if store_id:
+        users = users.filter(User.store_id == store_id)
+    if status in ('0', '1'):
+        users = users.filter(User.user_status == int(status))
+
+    pagination = users.order_by(User.user_id.desc()).paginate(
+        page=page, per_page=current_app.config.get('RECORDS_PER_PAGE', 10), error_out=False
+    )
+    stores = Store.query.order_by(Store.store_name).all()
+    filters = {'q': q, 'role': role, 'store_id': store_id, 'status': status}
+    return render_template('admin/user_list.html', users=pagination.items, pagination=pagination,
+                           stores=stores, roles=list(RoleType), filters=filters, q=q)
 
 @admin_user_bp.route('/<int:user_id>')
 @login_required
@@ -68,6 +99,38 @@ def user_create():
         return redirect(url_for('admin_user.user_list'))
     return render_template('admin/user_create.html', form=form)
 
+@admin_user_bp.route('/import', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def user_import():
+    """
+    批量导入用户：上传 CSV，密码由进程池并行哈希，分批插入，返回逐行结果 CSV。
+    """
+    if request.method == 'POST':
+        # 导入模块只在提交导入时加载，不随蓝图进入每个 Web 进程
+        from app.utils.user_import import ImportFileError, import_users, write_results
+
+        upload = request.files.get('csv_file')
+        if upload is None or not upload.filename:
+            flash('请选择要导入的 CSV 文件', 'warning')
+            return redirect(url_for('admin_user.user_import'))
+        try:
+            results = import_users(upload.stream,
+                                   workers=current_app.config.get('USER_IMPORT_WORKERS', 4),
+                                   max_rows=current_app.config.get('USER_IMPORT_MAX_ROWS', 1000))
+        except ImportFileError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('admin_user.user_import'))
+        created = sum(1 for r in results if r['status'] == 'created')
+        current_app.logger.info(f"用户 {current_user.username} 批量导入用户：成功 {created} 个，失败 {len(results) - created} 个")
+        output = io.StringIO()
+        write_results(results, output)
+        return Response(output.getvalue(), mimetype='text/csv', headers={
+            'Content-Disposition': 'attachment; filename=user_import_result.csv',
+            'X-Import-Created': str(created),
+        })
+    return render_template('admin/user_import.html', max_rows=current_app.config.get('USER_IMPORT_MAX_ROWS', 1000))
+
 @admin_user_bp.route('/<int:user_id>/delete', methods=['POST'])
 @login_required
 @admin_required
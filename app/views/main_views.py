@@ -2,13 +2,20 @@
 
 from datetime import date
 from app.extensions import db
-from app.models import DailySales, RoleType, Store, user
-from flask import Blueprint, current_app, flash, render_template
+from app.models import DailySales, RoleType, user
+from app.utils import dashboard, live_events
+from app.utils.completion_heatmap import heatmap_payload
+from app.utils.helpers import parse_month
+from app.utils.http_cache import apply_cache_headers, build_etag, not_modified, viewer_scope
+from flask import Blueprint, Response, abort, current_app, flash, make_response, render_template, request, stream_with_context
 from flask_login import current_user, login_required
-from sqlalchemy import func, literal
+from sqlalchemy import func
 
 main_bp = Blueprint("main", __name__)
 
+# 可以查看所有门店实时上报动态的角色
+LIVE_FEED_ROLES = (RoleType.ADMIN, RoleType.HEAD_MANAGER, RoleType.FINANCE)
+
 @main_bp.route("/")
 @login_required
 def index():
@@ -17,57 +24,125 @@ def index():
     """
     try:
         user_role = current_user.role
-        stores = []
-
-        if user_role in (RoleType.EMPLOYEE, RoleType.BRANCH_MANAGER):
-            if hasattr(current_user, 'store_id') and current_user.store_id:
-                stores = [Store.query.get(current_user.store_id)]
-            else:
-                stores = []
-        else:
-            stores = Store.query.all()
+        # 门店列表来自两级缓存（字典形式，模板中的 store.store_id 写法不变）
+        stores = [dict(store_id=store_id, store_name=name) for store_id, name in _visible_store_rows()]
 
         today = date.today()
         first_day_of_month = date(today.year, today.month, 1)
 
-        last_archived_sales = {}
-        cumulative_sales = {}
-
-        for store in stores:
-            if not store: continue
+        # 条件 GET：以可见门店日报的汇总版本（条数 + 最近更新时间）作为页面版本
+        store_ids = [store["store_id"] for store in stores]
+        report_count, last_updated = db.session.query(
+            func.count(DailySales.report_id),
+            func.max(DailySales.updated_at)
+        ).filter(DailySales.store_id.in_(store_ids)).one()
+        etag = build_etag("main.index", today, store_ids, report_count, last_updated, *viewer_scope())
+        cached = not_modified(etag, last_updated)
+        if cached is not None:
+            return cached
 
-            latest_sale = DailySales.query.filter(
-                DailySales.store_id == store.store_id,
-                DailySales.archived == True
-            ).order_by(DailySales.report_date.desc()).first()
+        # 各门店最近归档营业额与本月累计只随归档变化，缓存后多个 worker 共用；归档后由后台任务预先算好
+        last_archived_sales, cumulative_sales = dashboard.cached_summary(store_ids, first_day_of_month)
 
-            if latest_sale:
-                calculated_actual_sales = (latest_sale.bank_deposit or 0) + (latest_sale.voucher_amount or 0)
-                last_archived_sales[store.store_id] = {
-                    "report_date": latest_sale.report_date,
-                    "actual_sales": calculated_actual_sales
+        # 今日各门店上报进度（页面打开后由 /main/live 推送增量更新）
+        today_status = {}
+        if user_role in LIVE_FEED_ROLES:
+            for sale in DailySales.query.filter(
+                DailySales.store_id.in_(store_ids),
+                DailySales.report_date == today
+            ).order_by(DailySales.archived):
+                today_status[sale.store_id] = {
+                    "pos": sale.pos_info_completed,
+                    "takeaway": sale.takeaway_info_completed,
+                    "bank": sale.bank_info_completed,
+                    "submitted": sale.is_submitted,
+                    "archived": sale.archived,
                 }
-            else:
-                last_archived_sales[store.store_id] = None
-
-            total = db.session.query(
-                func.sum(literal(0) + DailySales.bank_deposit + DailySales.voucher_amount)
-            ).filter(
-                DailySales.store_id == store.store_id,
-                DailySales.report_date >= first_day_of_month,
-                DailySales.archived == True
-            ).scalar()
-            cumulative_sales[store.store_id] = total or 0
 
         current_app.logger.info(f"用户 {current_user.username} 成功加载首页。")
 
-        return render_template(
+        response = make_response(render_template(
             "main/index.html",
             stores=stores,
             last_archived_sales=last_archived_sales,
-            cumulative_sales=cumulative_sales
-        )
+            cumulative_sales=cumulative_sales,
+            today=today,
+            today_status=today_status,
+            live_feed=user_role in LIVE_FEED_ROLES
+        ))
+        return apply_cache_headers(response, etag, last_updated)
     except Exception as e:
         current_app.logger.error(f"加载首页时发生错误: {e}", exc_info=True)
         flash("加载首页时发生未知错误，请联系管理员。", "danger")
-        return render_template("main/index.html", stores=[], last_archived_sales={}, cumulative_sales={})
\ No newline at end of file
+        return render_template("main/index.html", stores=[], last_archived_sales={}, cumulative_sales={})
+
+@main_bp.route("/live")
+@login_required
+def live():
+    """
+    实时上报动态（Server-Sent Events）：日报步骤完成、最终提交、归档时推送事件，
+    首页据此增量更新，无需反复刷新。
+    """
+    if current_user.role not in LIVE_FEED_ROLES:
+        abort(403)
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    # 长连接期间不占用数据库连接
+    db.session.close()
+    response = Response(stream_with_context(live_events.stream(last_event_id)), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # 关闭 nginx 对本响应的缓冲，事件才能即时送达
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+def _visible_store_rows():
+    """当前用户可见的门店 [(store_id, store_name), ...]：店员与店长只看本店，其余角色看全部门店"""
+    rows = dashboard.store_rows()
+    if current_user.role in (RoleType.EMPLOYEE, RoleType.BRANCH_MANAGER):
+        return [row for row in rows if row[0] == current_user.store_id]
+    return rows
+
+@main_bp.route("/heatmap")
+@login_required
+def heatmap():
+    """
+    月度上报热力图：每个门店每天一格，颜色表示 POS/外卖/银行/提交/归档的完成进度。
+    页面只是外壳，数据由 heatmap_data 接口一次取回后在浏览器中绘制。
+    """
+    month = request.args.get("month") or date.today().strftime("%Y-%m")
+    try:
+        parse_month(month)
+    except ValueError:
+        flash("月份格式应为 YYYY-MM", "warning")
+        month = date.today().strftime("%Y-%m")
+    return render_template("main/heatmap.html", month=month, today_iso=date.today().isoformat())
+
+@main_bp.route("/heatmap/data")
+@login_required
+def heatmap_data():
+    """
+    热力图数据：门店列表 + 所有门店逐日进度的位图（每格一个字节，base64 编码）。
+    月内日报未变化时返回 304。
+    """
+    month = request.args.get("month", "")
+    try:
+        first, next_first = parse_month(month)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    stores = _visible_store_rows()
+    store_ids = [store_id for store_id, _ in stores]
+
+    # 历史表中的日报不再修改，以热表当月记录的条数与最近更新时间作为数据版本
+    report_count, last_updated = db.session.query(
+        func.count(DailySales.report_id),
+        func.max(DailySales.updated_at)
+    ).filter(
+        DailySales.store_id.in_(store_ids),
+        DailySales.report_date >= first,
+        DailySales.report_date < next_first
+    ).one()
+    etag = build_etag("main.heatmap_data", month, store_ids, report_count, last_updated)
+    cached = not_modified(etag, last_updated)
+    if cached is not None:
+        return cached
+    response = make_response(heatmap_payload(month, stores))
+    return apply_cache_headers(response, etag, last_updated)
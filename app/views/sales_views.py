@@ -1,21 +1,32 @@
 # app/views/sales_views.py
 from datetime import datetime
+import mimetypes
 import os
 import traceback
 import pprint
 
 from app.extensions import db
-from app.forms.sales_forms import SalesForm
-from app.models import DailySales, FinancialCheckStatus, RoleType, Store, User
+from app.forms.sales_forms import UPLOAD_ID_FIELDS, SalesForm
+from app.models import DailySales, DailySalesAttachmentsHistory, DailySalesHistory, FinancialCheckStatus, RoleType, Store, User
 from app.models.attachment import DailySalesAttachments
 from app.models.enums import AttachmentType
+from app.utils import chunked_upload
+from app.utils.attachment_store import attachment_name
+from app.utils.chunked_upload import UploadError
+from app.utils.daily_reports import upsert_live_report
+from app.utils.db_routing import use_primary
+from app.utils.report_transitions import TransitionConflict, apply_transition
+from app.utils.http_cache import apply_cache_headers, build_etag, not_modified, viewer_scope
 from flask import (
     Blueprint,
+    abort,
     current_app,
     flash,
+    make_response,
     redirect,
     render_template,
     request,
+    send_file,
     url_for,
 )
 from flask_login import current_user, login_required
@@ -25,22 +36,27 @@ from wtforms.validators import DataRequired, Optional
 sales_bp = Blueprint('sales', __name__)
 
 # Helper function for file uploads
-def save_attachment(form_field, report_id, attachment_type):
+def save_attachment(form_field, report_id, attachment_type, upload_field=None):
     """Helper function to save uploaded file and create DailySalesAttachments record.
     辅助函数：保存上传的文件并创建 DailySalesAttachments 记录。
+    upload_field 为分片上传完成后回填的上传 ID 字段；有值时使用已上传的文件，表单中不再携带文件本身。
     """
-    if form_field.data and hasattr(form_field.data, 'filename') and form_field.data.filename:
+    upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
+    if upload_field is not None and upload_field.data:
+        save_path = chunked_upload.consume_upload(upload_field.data, current_user.user_id, upload_folder, db.session)
+    elif form_field.data and hasattr(form_field.data, 'filename') and form_field.data.filename:
         file = form_field.data
         filename = secure_filename(file.filename)
-        upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
         save_path = os.path.join(upload_folder, filename)
         file.save(save_path)
-        attachment = DailySalesAttachments(
-            report_id=report_id,
-            file_path=save_path,
-            attachment_type=attachment_type
-        )
-        db.session.add(attachment)
+    else:
+        return
+    attachment = DailySalesAttachments(
+        report_id=report_id,
+        file_path=save_path,
+        attachment_type=attachment_type
+    )
+    db.session.add(attachment)
 
 
 def apply_dynamic_validation(form, step):
@@ -58,11 +74,16 @@ def apply_dynamic_validation(form, step):
         field.validators = [v for v in field.validators if not isinstance(v, DataRequired)]
         # Add DataRequired if the field is required for the current step
         if field_name in required_fields:
+            # 凭证已通过分片上传接口上传时，表单中只带上传 ID
+            upload_field = UPLOAD_ID_FIELDS.get(field_name)
+            if upload_field and form[upload_field].data:
+                continue
             field.validators.insert(0, DataRequired())
 
 
 @sales_bp.route('/report', methods=['GET', 'POST'])
 @login_required
+@use_primary  # 提交后重定向回本页需要立即读到刚写入的数据，不能读副本
 def report_sales():
     """Handles GET and POST requests for sales report submissions.
     处理营业额上报的 GET 和 POST 请求。
@@ -97,70 +118,67 @@ def report_sales():
             # 【调试关键】 记录表单中的日期对象
             current_app.logger.info(f"表单中的日期对象: {form.report_date.data}")
 
-            daily_sales = DailySales.query.filter_by(
-                store_id=form.store_id.data,
-                report_date=form.report_date.data,
-                archived=False
-            ).first()
+            # 一条语句完成"查找或创建"未归档日报，并发提交不会产生重复日报
+            report_id = upsert_live_report(form.store_id.data, form.report_date.data, current_user.user_id)
+            daily_sales = db.session.get(DailySales, report_id)
+            is_new = not (daily_sales.pos_info_completed or daily_sales.takeaway_info_completed or daily_sales.bank_info_completed)
+            # 表单中带回的版本号：打开页面后日报被他人修改过则拒绝本次保存
+            expected_version = form.version.data or None
 
-            if daily_sales is None:
-                # 【调试关键】 记录即将保存到数据库的日期
-                current_app.logger.info(f"即将保存到数据库的日期: {form.report_date.data}")
-                daily_sales = DailySales(
-                    user_id=current_user.user_id,
-                    store_id=form.store_id.data,
-                    # 【调试关键】从表单获取日期
-                    report_date=form.report_date.data
-                )
-                db.session.add(daily_sales)
-                db.session.flush()
-                flash('新的日报已创建，数据已保存！', 'success')
-            else:
-                flash('日报数据更新成功！', 'success')
+            def amount(field):
+                return float(field.data) if field.data is not None else 0.0
 
+            # 各步骤均以一条条件 UPDATE 完成（见 app/utils/report_transitions.py），并发修改不会被静默覆盖
             if step == 'pos':
-                # POS机信息
-                daily_sales.cash_income = float(form.cash_sales.data) if form.cash_sales.data is not None else 0.0
-                daily_sales.pos_income = float(form.electronic_sales.data) if form.electronic_sales.data is not None else 0.0
-                daily_sales.day_pass_income = float(form.system_takeaway_sales.data) if form.system_takeaway_sales.data is not None else 0.0
-                daily_sales.voucher_amount = float(form.voucher_amount.data) if form.voucher_amount.data is not None else 0.0
-                daily_sales.cash_difference = float(form.cash_difference.data) if form.cash_difference.data is not None else 0.0
-                daily_sales.electronic_difference = float(form.electronic_difference.data) if form.electronic_difference.data is not None else 0.0
-
-                # Save attachment
-                save_attachment(form.sales_slip_image, daily_sales.report_id, AttachmentType.sales_slip)
-                # 校验POS总收入
-                pos_total = daily_sales.cash_income + daily_sales.pos_income + daily_sales.day_pass_income
-                daily_sales.pos_total = pos_total
-                # 校验公式
-                if abs(pos_total - (daily_sales.cash_income + daily_sales.pos_income + daily_sales.day_pass_income)) > 0.01:
-                    flash('POS机小票总收入与各项收入之和不符，请检查！', 'danger')
-                    return redirect(url_for('sales.report_sales', report_date=daily_sales.report_date.strftime('%Y-%m-%d'), store_id=daily_sales.store_id))
-                # 步骤完成
-                daily_sales.pos_info_completed = True
+                # POS机信息；POS机小票总收入（现金 + 电子支付 + POS外卖）是数据库生成列，无需赋值
+                apply_transition(
+                    daily_sales, 'save_pos', expected_version,
+                    cash_income=amount(form.cash_sales),
+                    pos_income=amount(form.electronic_sales),
+                    day_pass_income=amount(form.system_takeaway_sales),
+                    voucher_amount=amount(form.voucher_amount),
+                    cash_difference=amount(form.cash_difference),
+                    electronic_difference=amount(form.electronic_difference),
+                )
+                save_attachment(form.sales_slip_image, daily_sales.report_id, AttachmentType.sales_slip,
+                                form.sales_slip_upload_id)
+
             elif step == 'takeaway':
-                daily_sales.takeaway_amount = float(form.takeaway_platform_sales.data) if form.takeaway_platform_sales.data is not None else 0.0
-                save_attachment(form.takeaway_platform_receipt, daily_sales.report_id, AttachmentType.takeaway_screenshot)
-                daily_sales.takeaway_info_completed = True
+                apply_transition(daily_sales, 'save_takeaway', expected_version,
+                                 takeaway_amount=amount(form.takeaway_platform_sales))
+                save_attachment(form.takeaway_platform_receipt, daily_sales.report_id, AttachmentType.takeaway_screenshot,
+                                form.takeaway_receipt_upload_id)
 
             elif step == 'bank':
-                daily_sales.bank_deposit = float(form.bank_deposit.data) if form.bank_deposit.data is not None else 0.0
-                daily_sales.bank_fee = float(form.bank_fee.data) if form.bank_fee.data is not None else 0.0
-                save_attachment(form.bank_receipt_image, daily_sales.report_id, AttachmentType.bank_receipt)
-                daily_sales.bank_info_completed = True
+                apply_transition(daily_sales, 'save_bank', expected_version,
+                                 bank_deposit=amount(form.bank_deposit), bank_fee=amount(form.bank_fee))
+                save_attachment(form.bank_receipt_image, daily_sales.report_id, AttachmentType.bank_receipt,
+                                form.bank_receipt_upload_id)
 
             elif request.form.get('submit_final') == 'final_submit':
-                if daily_sales.pos_info_completed and daily_sales.takeaway_info_completed and daily_sales.bank_info_completed:
-                    daily_sales.is_submitted = True
-                    flash('所有信息已最终提交，等待财务审核。', 'success')
-                else:
+                if not (daily_sales.pos_info_completed and daily_sales.takeaway_info_completed and daily_sales.bank_info_completed):
                     flash('请先完成所有步骤再进行最终提交。', 'danger')
                     return redirect(url_for('sales.report_sales', report_date=daily_sales.report_date.strftime('%Y-%m-%d'), store_id=daily_sales.store_id))
+                apply_transition(daily_sales, 'submit', expected_version)
+                flash('所有信息已最终提交，等待财务审核。', 'success')
 
             db.session.commit()
+            flash('新的日报已创建，数据已保存！' if is_new else '日报数据更新成功！', 'success')
             current_app.logger.info(f"日报保存后主要字段: store_id={daily_sales.store_id}, report_date={daily_sales.report_date}, pos_info_completed={daily_sales.pos_info_completed}, takeaway_info_completed={daily_sales.takeaway_info_completed}, bank_info_completed={daily_sales.bank_info_completed}, is_submitted={daily_sales.is_submitted}")
             return redirect(url_for('sales.report_sales', report_date=daily_sales.report_date.strftime('%Y-%m-%d'), store_id=daily_sales.store_id))
 
+        except TransitionConflict as e:
+            db.session.rollback()
+            current_app.logger.warning(f"日报保存冲突: 用户 {current_user.username}, {e}")
+            flash(str(e), 'warning')
+            return redirect(url_for('sales.report_sales', report_date=form.report_date.data.strftime('%Y-%m-%d'), store_id=form.store_id.data, initial_load='true'))
+
+        except UploadError as e:
+            db.session.rollback()
+            current_app.logger.warning(f"日报凭证上传无效: 用户 {current_user.username}, {e}")
+            flash(f'凭证文件无效：{e}，请重新选择文件上传。', 'warning')
+            return redirect(url_for('sales.report_sales', report_date=form.report_date.data.strftime('%Y-%m-%d'), store_id=form.store_id.data, initial_load='true'))
+
         except Exception as e:
             db.session.rollback()
 
@@ -234,6 +252,120 @@ def report_sales():
                 form.takeaway_platform_sales.data = daily_sales.takeaway_amount
                 form.bank_deposit.data = daily_sales.bank_deposit
                 form.bank_fee.data = daily_sales.bank_fee
+                form.version.data = daily_sales.version
                 # 其它分步字段可按需补充
 
-    return render_template('sales/report.html', form=form, title="上报营业额", daily_sales=daily_sales)
\ No newline at end of file
+    if request.method != 'GET':
+        return render_template('sales/report.html', form=form, title="上报营业额", daily_sales=daily_sales)
+
+    # 条件 GET：同一 (store_id, report_date) 的日报未变化时直接返回 304，跳过模板渲染
+    last_updated = daily_sales.updated_at if daily_sales else None
+    etag = build_etag(
+        "sales.report_sales",
+        form.store_id.data,
+        form.report_date.data,
+        initial_load,
+        [s.store_id for s in user_stores],
+        daily_sales.report_id if daily_sales else None,
+        daily_sales.version if daily_sales else None,
+        last_updated,
+        *viewer_scope()
+    )
+    cached = not_modified(etag, last_updated)
+    if cached is not None:
+        return cached
+    response = make_response(
+        render_template('sales/report.html', form=form, title="上报营业额", daily_sales=daily_sales)
+    )
+    return apply_cache_headers(response, etag, last_updated)
+
+def _upload_error(e):
+    body = {"error": str(e)}
+    if e.offset is not None:
+        body["offset"] = e.offset
+    return body, e.status
+
+
+@sales_bp.route('/uploads', methods=['POST'])
+@login_required
+def upload_init():
+    """
+    分片上传 - 开始：JSON {filename, size, sha256?}，返回 upload_id 与建议的分片大小。
+    凭证照片分多次小请求上传，弱网断线后可从断点续传，单个请求也不会长时间占用 worker。
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        status = chunked_upload.create_upload(current_user.user_id, data.get('filename'), data.get('size'),
+                                              data.get('sha256'))
+    except UploadError as e:
+        return _upload_error(e)
+    return status, 201
+
+
+@sales_bp.route('/uploads/<upload_id>', methods=['GET'])
+@login_required
+def upload_status(upload_id):
+    """分片上传 - 查询：返回服务端已接收的字节数（offset），断线后从此处继续"""
+    try:
+        return chunked_upload.get_status(upload_id, current_user.user_id)
+    except UploadError as e:
+        return _upload_error(e)
+
+
+@sales_bp.route('/uploads/<upload_id>', methods=['PATCH'])
+@login_required
+def upload_append(upload_id):
+    """
+    分片上传 - 追加：请求体为分片的原始字节。
+    请求头 Upload-Offset 为该分片在文件中的起始位置，X-Chunk-CRC32 为分片校验值（可选）。
+    """
+    length = request.content_length
+    if length is None:
+        return {"error": "缺少 Content-Length"}, 411
+    if length > current_app.config['UPLOAD_CHUNK_BYTES']:
+        return {"error": "分片过大"}, 413
+    try:
+        return chunked_upload.append_chunk(
+            upload_id, current_user.user_id, request.headers.get('Upload-Offset'),
+            request.get_data(cache=False), request.headers.get('X-Chunk-CRC32')
+        )
+    except UploadError as e:
+        return _upload_error(e)
+
+
+@sales_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+def upload_complete(upload_id):
+    """分片上传 - 完成：校验文件完整后，提交日报步骤时以 upload_id 引用该文件"""
+    try:
+        return chunked_upload.complete_upload(upload_id, current_user.user_id)
+    except UploadError as e:
+        return _upload_error(e)
+
+
+@sales_bp.route('/attachments/<int:attachment_id>')
+@login_required
+def attachment_download(attachment_id):
+    """
+    下载日报附件：热表与历史表的附件都可下载；已转入冷存储的附件从月度归档中只解压该文件。
+    门店组用户只能下载本门店的附件。
+    """
+    attachment = db.session.get(DailySalesAttachments, attachment_id)
+    report_model = DailySales
+    if attachment is None:
+        attachment = db.session.get(DailySalesAttachmentsHistory, attachment_id)
+        report_model = DailySalesHistory
+    if attachment is None:
+        abort(404)
+    if current_user.role not in [RoleType.ADMIN, RoleType.FINANCE, RoleType.HEAD_MANAGER]:
+        store_id = db.session.query(report_model.store_id).filter_by(report_id=attachment.report_id).scalar()
+        if store_id is None or store_id != current_user.store_id:
+            abort(403)
+    try:
+        stream = attachment.open_file()
+    except FileNotFoundError:
+        current_app.logger.warning(f"[附件] 文件不存在: id={attachment_id}, path={attachment.file_path}")
+        abort(404)
+    name = attachment_name(attachment.file_path)
+    return send_file(stream, download_name=name,
+                     mimetype=mimetypes.guess_type(name)[0] or 'application/octet-stream')
@@ -1,9 +1,5 @@
 # config.py
 import os
-from dotenv import load_dotenv
-
-# 在文件顶部加载 .env，确保环境变量在类定义之前可用
-load_dotenv()
 
 class Config:
     """
@@ -16,14 +12,91 @@ class Config:
         if os.environ.get('FLASK_ENV') == 'production':
             raise ValueError("生产环境必须设置 SECRET_KEY 环境变量！")
         else:
-            print("警告：SECRET_KEY 未通过环境变量设置，将使用开发默认值。请勿在生产中使用此默认值！")
+            # 导入配置时不输出，由 create_app 记录警告日志（.env 由 run.py / flask 命令加载）
             SECRET_KEY = 'dev_secret_key_do_not_use_in_prod'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     if not SQLALCHEMY_DATABASE_URI:
         raise RuntimeError("未检测到数据库连接字符串(DATABASE_URL)，请在.env中正确配置！")
+    # 只读副本（可选）：配置后 READ_REPLICA_ENDPOINTS 中的端点读取副本，写入与其它请求仍走主库。
+    # 本地可用两个 SQLite 文件或两个本地 MySQL 实例测试，例如 DATABASE_REPLICA_URL=sqlite:///replica.db
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    READ_REPLICA_ENDPOINTS = [
+        e.strip() for e in os.environ.get('READ_REPLICA_ENDPOINTS', 'main.index,main.heatmap_data').split(',') if e.strip()
+    ]
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
     RECORDS_PER_PAGE = int(os.environ.get('RECORDS_PER_PAGE', 10))
+    # 条件 GET（ETag/Last-Modified）：日报页与首页未变化时返回 304，不重新渲染模板
+    CONDITIONAL_GET_ENABLED = os.environ.get('CONDITIONAL_GET_ENABLED', 'true').lower() == 'true'
+    # Jinja2 字节码缓存目录（所有 worker 共享，置空则关闭），部署时可用 flask precompile-templates 预热
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get(
+        'JINJA_BYTECODE_CACHE_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.jinja_cache')
+    )
+    # 后台任务：每个应用进程内启动的工作线程数（0 表示不随应用启动，改用 flask worker 单独运行）
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 0))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 2))
+    JOB_RETRY_BASE_SECONDS = int(os.environ.get('JOB_RETRY_BASE_SECONDS', 30))
+    # 执行中超过该秒数仍未结束的任务视为所在进程已退出，重新放回队列
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 1800))
+    # 工作线程检查超时任务的间隔（秒）
+    JOB_STALE_CHECK_SECONDS = int(os.environ.get('JOB_STALE_CHECK_SECONDS', 60))
+    # 首页实时动态（SSE）：各 worker 通过同一个事件日志文件互通，多台服务器部署时需放在共享目录
+    LIVE_EVENTS_FILE = os.environ.get(
+        'LIVE_EVENTS_FILE',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.live_events', 'events.log')
+    )
+    LIVE_EVENTS_MAX_BYTES = int(os.environ.get('LIVE_EVENTS_MAX_BYTES', 1024 * 1024))
+    LIVE_EVENTS_POLL_INTERVAL = float(os.environ.get('LIVE_EVENTS_POLL_INTERVAL', 1.0))
+    # 单个 SSE 连接的最长保持时间（秒），到期后浏览器自动重连，避免长期占用 worker 线程
+    LIVE_EVENTS_STREAM_SECONDS = int(os.environ.get('LIVE_EVENTS_STREAM_SECONDS', 300))
+    # 日报变更审计：先缓存在进程内，按间隔或条数批量写入 daily_sales_audit（进程退出时也会写入）
+    AUDIT_WRITE_BEHIND = os.environ.get('AUDIT_WRITE_BEHIND', 'true').lower() == 'true'
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 5))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 200))
+    # 凭证照片分片上传（断点续传）：暂存目录默认为 <UPLOAD_FOLDER>/.partial，多台服务器部署时需放在共享目录
+    UPLOAD_PARTIAL_DIR = os.environ.get('UPLOAD_PARTIAL_DIR')
+    UPLOAD_CHUNK_BYTES = int(os.environ.get('UPLOAD_CHUNK_BYTES', 512 * 1024))
+    UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 20 * 1024 * 1024))
+    UPLOAD_EXPIRE_HOURS = int(os.environ.get('UPLOAD_EXPIRE_HOURS', 24))
+    # 附件冷存储：已归档日报的旧附件按月打包为 <ATTACHMENT_COLD_DIR>/YYYY-MM.<n>.zip（每批一个新文件），默认为 <UPLOAD_FOLDER>/.cold
+    ATTACHMENT_COLD_DIR = os.environ.get('ATTACHMENT_COLD_DIR')
+    # 请求分析：管理员在 URL 后加 ?_profile=1（或请求头 X-Profile: 1）时用 cProfile 记录该请求及其 SQL
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'true').lower() == 'true'
+    PROFILER_DIR = os.environ.get(
+        'PROFILER_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.profiles')
+    )
+    PROFILER_MAX_PER_MINUTE = int(os.environ.get('PROFILER_MAX_PER_MINUTE', 6))
+    PROFILER_KEEP = int(os.environ.get('PROFILER_KEEP', 50))
+    # 慢查询日志：超过 SLOW_QUERY_MS 毫秒的语句连同脱敏参数、来源视图与 EXPLAIN 结果写入滚动日志（0 表示关闭）
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 300))
+    SLOW_QUERY_LOG = os.environ.get(
+        'SLOW_QUERY_LOG',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slow_query.log')
+    )
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 5 * 1024 * 1024))
+    SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 3))
+    # 同一语句指纹在该秒数内只执行一次 EXPLAIN
+    SLOW_QUERY_EXPLAIN_INTERVAL = int(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', 600))
+
+    # 批量导入用户：计算密码哈希的进程数（0 表示在请求进程内顺序计算）与单个文件的最大行数
+    USER_IMPORT_WORKERS = int(os.environ.get('USER_IMPORT_WORKERS', 4))
+    USER_IMPORT_MAX_ROWS = int(os.environ.get('USER_IMPORT_MAX_ROWS', 1000))
+    # 两级缓存：进程内 LRU（每个 worker 各一份）+ 所有 worker 共用的共享层
+    # CACHE_SHARED_BACKEND 可选 sqlite（本机文件，默认）、redis（需安装 redis 包）、none（只用进程内缓存）
+    CACHE_SHARED_BACKEND = os.environ.get('CACHE_SHARED_BACKEND', 'sqlite')
+    CACHE_SQLITE_PATH = os.environ.get(
+        'CACHE_SQLITE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'shared.sqlite3')
+    )
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+    CACHE_LOCAL_MAX_ITEMS = int(os.environ.get('CACHE_LOCAL_MAX_ITEMS', 1024))
+    CACHE_LOCAL_TTL = int(os.environ.get('CACHE_LOCAL_TTL', 30))
+    # 其它 worker 的失效操作最迟在该秒数内对本进程生效
+    CACHE_SYNC_SECONDS = float(os.environ.get('CACHE_SYNC_SECONDS', 1.0))
 
 class DevelopmentConfig(Config):
     """开发环境的特定配置"""
@@ -45,7 +118,11 @@ class TestingConfig(Config):
     ENV = 'testing'
     SQLALCHEMY_ECHO = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
+    # 内存库的所有连接共用同一个 SQLite 连接，不能在后台线程中执行 EXPLAIN
+    SLOW_QUERY_MS = 0
     WTF_CSRF_ENABLED = False
+    AUDIT_WRITE_BEHIND = False  # 测试中审计记录随提交同步写入，便于断言
+    CACHE_SHARED_BACKEND = 'memory'  # 共享层使用进程内替身，不写本机文件
     SECRET_KEY = os.environ.get('TEST_SECRET_KEY') or 'test_secret_key'
 
 config_by_name = dict(
@@ -0,0 +1,79 @@
+"""日报金额生成列
+
+Revision ID: 3d7a9c2e5f84
+Revises: b9a3e0d6c2f1
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7a9c2e5f84'
+down_revision = 'b9a3e0d6c2f1'
+branch_labels = None
+depends_on = None
+
+POS_TOTAL_EXPR = 'COALESCE(cash_income, 0) + COALESCE(pos_income, 0) + COALESCE(day_pass_income, 0)'
+ACTUAL_SALES_EXPR = 'COALESCE(bank_deposit, 0) + COALESCE(voucher_amount, 0)'
+LIVE_MARKER_EXPR = 'CASE WHEN archived THEN NULL ELSE 1 END'
+
+
+def _amount_columns(generated):
+    if generated:
+        return [
+            sa.Column('pos_total', sa.Float(), sa.Computed(POS_TOTAL_EXPR, persisted=True), nullable=True, comment='POS机小票总收入(T)，=现金+电子支付+POS外卖（生成列）'),
+            sa.Column('actual_sales', sa.Float(), sa.Computed(ACTUAL_SALES_EXPR, persisted=True), nullable=True, comment='店铺实际营业额，=实际到账金额+代金券金额（生成列）'),
+        ]
+    return [
+        sa.Column('pos_total', sa.Float(), nullable=True, comment='POS机小票总收入(T)，=现金+电子支付+POS外卖'),
+        sa.Column('actual_sales', sa.Float(), nullable=True, comment='店铺实际营业额（财务核对后）'),
+    ]
+
+
+def _rebuild_amount_columns(generated):
+    """
+    删除并重建 pos_total、actual_sales（普通列 <-> STORED 生成列）。
+    SQLite 不能用 ALTER TABLE 添加 STORED 生成列，只能重建表；而批量模式复制数据时会把已有的
+    生成列 live_marker 当普通列写入而失败，所以在同一批中把 live_marker 也删除后重新定义，不参与复制。
+    """
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('daily_sales', schema=None, recreate='always') as batch_op:
+            batch_op.drop_constraint('uq_daily_sales_live', type_='unique')
+            batch_op.drop_column('live_marker')
+            batch_op.drop_column('pos_total')
+            batch_op.drop_column('actual_sales')
+            for column in _amount_columns(generated):
+                batch_op.add_column(column)
+            batch_op.add_column(sa.Column('live_marker', sa.Integer(), sa.Computed(LIVE_MARKER_EXPR, persisted=True), nullable=True, comment='未归档标记（生成列）'))
+            batch_op.create_unique_constraint('uq_daily_sales_live', ['store_id', 'report_date', 'live_marker'])
+    else:
+        # MySQL：删除后按新定义重新添加，生成列的值由数据库在 ALTER 时按公式计算
+        op.drop_column('daily_sales', 'pos_total')
+        op.drop_column('daily_sales', 'actual_sales')
+        for column in _amount_columns(generated):
+            op.add_column('daily_sales', column)
+
+
+def upgrade():
+    # 原值由应用代码写入且不一致（actual_sales 基本为空），统一改为数据库按公式计算
+    _rebuild_amount_columns(generated=True)
+    with op.batch_alter_table('daily_sales', schema=None) as batch_op:
+        batch_op.create_index('ix_daily_sales_month_sum', ['store_id', 'archived', 'report_date', 'actual_sales'], unique=False)
+
+    # 历史表仍是普通列：按同一公式回填，与热表迁入的值一致
+    op.execute(f'UPDATE daily_sales_history SET pos_total = {POS_TOTAL_EXPR}, actual_sales = {ACTUAL_SALES_EXPR}')
+    with op.batch_alter_table('daily_sales_history', schema=None) as batch_op:
+        batch_op.create_index('ix_daily_sales_history_month_sum', ['store_id', 'archived', 'report_date', 'actual_sales'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_sales_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_daily_sales_history_month_sum')
+
+    with op.batch_alter_table('daily_sales', schema=None) as batch_op:
+        batch_op.drop_index('ix_daily_sales_month_sum')
+    _rebuild_amount_columns(generated=False)
+    # 恢复为普通列后保留当前计算结果
+    op.execute(f'UPDATE daily_sales SET pos_total = {POS_TOTAL_EXPR}, actual_sales = {ACTUAL_SALES_EXPR}')
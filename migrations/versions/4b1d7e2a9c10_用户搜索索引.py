@@ -0,0 +1,32 @@
+"""用户搜索索引
+
+Revision ID: 4b1d7e2a9c10
+Revises: c65a30e50a36
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b1d7e2a9c10'
+down_revision = 'c65a30e50a36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_store_id'), ['store_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_real_name'), ['real_name'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_phone'), ['phone'], unique=False)
+        batch_op.create_index('ix_users_role_status', ['role', 'user_status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_role_status')
+        batch_op.drop_index(batch_op.f('ix_users_phone'))
+        batch_op.drop_index(batch_op.f('ix_users_real_name'))
+        batch_op.drop_index(batch_op.f('ix_users_store_id'))
@@ -0,0 +1,44 @@
+"""日报变更审计表
+
+Revision ID: 5c8e21f4a7d9
+Revises: d41b7c93e8f2
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8e21f4a7d9'
+down_revision = 'd41b7c93e8f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_sales_audit',
+    sa.Column('audit_id', sa.Integer(), autoincrement=True, nullable=False, comment='审计记录ID'),
+    sa.Column('report_id', sa.Integer(), nullable=False, comment='日报ID'),
+    sa.Column('store_id', sa.String(length=32), nullable=True, comment='门店ID'),
+    sa.Column('report_date', sa.Date(), nullable=True, comment='营业日期'),
+    sa.Column('field_name', sa.String(length=64), nullable=False, comment='变更字段'),
+    sa.Column('old_value', sa.String(length=255), nullable=True, comment='原值'),
+    sa.Column('new_value', sa.String(length=255), nullable=True, comment='新值'),
+    sa.Column('user_id', sa.Integer(), nullable=True, comment='操作人ID（命令行等非请求场景为空）'),
+    sa.Column('username', sa.String(length=64), nullable=True, comment='操作人用户名'),
+    sa.Column('source', sa.String(length=128), nullable=True, comment='来源（请求端点或命令）'),
+    sa.Column('changed_at', sa.DateTime(), nullable=False, comment='变更时间'),
+    sa.PrimaryKeyConstraint('audit_id')
+    )
+    with op.batch_alter_table('daily_sales_audit', schema=None) as batch_op:
+        batch_op.create_index('ix_daily_sales_audit_report_changed', ['report_id', 'changed_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_daily_sales_audit_store_id'), ['store_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_sales_audit', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_sales_audit_store_id'))
+        batch_op.drop_index('ix_daily_sales_audit_report_changed')
+
+    op.drop_table('daily_sales_audit')
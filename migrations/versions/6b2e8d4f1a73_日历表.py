@@ -0,0 +1,36 @@
+"""日历表
+
+Revision ID: 6b2e8d4f1a73
+Revises: 3d7a9c2e5f84
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b2e8d4f1a73'
+down_revision = '3d7a9c2e5f84'
+branch_labels = None
+depends_on = None
+
+# 预先生成的日期范围；范围之外的日期由应用在缺报检查时按需补齐
+FIRST_DAY = date(2020, 1, 1)
+LAST_DAY = date(2030, 12, 31)
+
+
+def upgrade():
+    calendar_days = op.create_table('calendar_days',
+    sa.Column('day', sa.Date(), autoincrement=False, nullable=False, comment='日期'),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.bulk_insert(calendar_days, [
+        {'day': FIRST_DAY + timedelta(days=i)} for i in range((LAST_DAY - FIRST_DAY).days + 1)
+    ])
+
+
+def downgrade():
+    op.drop_table('calendar_days')
@@ -0,0 +1,30 @@
+"""日报检索索引
+
+Revision ID: 7d2a4c9e1f38
+Revises: 6b2e8d4f1a73
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2a4c9e1f38'
+down_revision = '6b2e8d4f1a73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('daily_sales', schema=None) as batch_op:
+        batch_op.create_index('ix_daily_sales_status_date', ['financial_check_status', 'report_date'], unique=False)
+        # MySQL 5.7.6+ 内置 ngram 分词器，中文、泰文备注无需空格分词也能检索；其它数据库忽略 mysql_ 参数，建普通索引
+        batch_op.create_index('ft_daily_sales_remark', ['remark'], unique=False,
+                              mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+
+def downgrade():
+    with op.batch_alter_table('daily_sales', schema=None) as batch_op:
+        batch_op.drop_index('ft_daily_sales_remark')
+        batch_op.drop_index('ix_daily_sales_status_date')
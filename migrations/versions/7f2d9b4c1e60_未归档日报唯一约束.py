@@ -0,0 +1,37 @@
+"""未归档日报唯一约束
+
+Revision ID: 7f2d9b4c1e60
+Revises: 5c8e21f4a7d9
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f2d9b4c1e60'
+down_revision = '5c8e21f4a7d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 已存在重复的未归档日报时无法建立唯一约束；这些是真实营业数据，需人工确认保留哪一条
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT store_id, report_date, COUNT(*) FROM daily_sales "
+        "WHERE archived = 0 GROUP BY store_id, report_date HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        listing = ", ".join(f"{store_id}@{report_date}({count}条)" for store_id, report_date, count in duplicates)
+        raise RuntimeError(f"存在重复的未归档日报，请先人工合并或删除后再升级: {listing}")
+
+    with op.batch_alter_table('daily_sales', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('live_marker', sa.Integer(), sa.Computed('CASE WHEN archived THEN NULL ELSE 1 END', persisted=True), nullable=True, comment='未归档标记（生成列）'))
+        batch_op.create_unique_constraint('uq_daily_sales_live', ['store_id', 'report_date', 'live_marker'])
+
+
+def downgrade():
+    with op.batch_alter_table('daily_sales', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_daily_sales_live', type_='unique')
+        batch_op.drop_column('live_marker')
@@ -0,0 +1,77 @@
+"""日报历史表
+
+Revision ID: 8e3f5a61d2b7
+Revises: 4b1d7e2a9c10
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3f5a61d2b7'
+down_revision = '4b1d7e2a9c10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_sales_history',
+    sa.Column('report_id', sa.Integer(), autoincrement=False, nullable=False, comment='日报主键（沿用热表ID）'),
+    sa.Column('store_id', sa.String(length=32), nullable=False, comment='门店ID'),
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='上报人ID'),
+    sa.Column('report_date', sa.Date(), nullable=False, comment='营业日期'),
+    sa.Column('cash_income', sa.Float(), nullable=True, comment='POS现金收入(C)'),
+    sa.Column('pos_income', sa.Float(), nullable=True, comment='POS电子支付收入(P)'),
+    sa.Column('day_pass_income', sa.Float(), nullable=True, comment='POS系统中记录的外卖收入(D)'),
+    sa.Column('pos_total', sa.Float(), nullable=True, comment='POS机小票总收入(T)'),
+    sa.Column('cash_difference', sa.Float(), nullable=True, comment='POS现金收入误差(A)'),
+    sa.Column('electronic_difference', sa.Float(), nullable=True, comment='POS电子支付误差(B)'),
+    sa.Column('takeaway_amount', sa.Float(), nullable=True, comment='第三方外卖平台收入'),
+    sa.Column('bank_receipt_amount', sa.Float(), nullable=True, comment='银行存入的现金金额'),
+    sa.Column('bank_fee', sa.Float(), nullable=True, comment='银行存款手续费'),
+    sa.Column('bank_deposit', sa.Float(), nullable=True, comment='财务填写的实际到账金额'),
+    sa.Column('voucher_amount', sa.Float(), nullable=True, comment='财务填写的代金券金额'),
+    sa.Column('actual_sales', sa.Float(), nullable=True, comment='店铺实际营业额（财务核对后）'),
+    sa.Column('remark', sa.String(length=255), nullable=True, comment='备注'),
+    sa.Column('pos_info_completed', sa.Boolean(), nullable=False, comment='第一步(POS)是否完成'),
+    sa.Column('takeaway_info_completed', sa.Boolean(), nullable=False, comment='第二步(外卖)是否完成'),
+    sa.Column('bank_info_completed', sa.Boolean(), nullable=False, comment='第三步(银行)是否完成'),
+    sa.Column('is_submitted', sa.Boolean(), nullable=False, comment='是否已最终提交给财务'),
+    sa.Column('financial_check_status', sa.Enum('PENDING', 'BANK_RECEIVED', 'TAKEEAWAY_RECEIVED', 'AMOUNT_VERIFIED', 'REQUIRES_REMEDIATION', 'CHECKED', name='financialcheckstatus'), nullable=False, comment='财务核对状态'),
+    sa.Column('archived', sa.Boolean(), nullable=False, comment='是否已归档（历史表中恒为是）'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True, comment='更新时间'),
+    sa.Column('moved_at', sa.DateTime(), nullable=True, comment='迁入历史表的时间'),
+    sa.ForeignKeyConstraint(['store_id'], ['stores.store_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('report_id')
+    )
+    with op.batch_alter_table('daily_sales_history', schema=None) as batch_op:
+        batch_op.create_index('ix_daily_sales_history_store_date', ['store_id', 'report_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_daily_sales_history_report_date'), ['report_date'], unique=False)
+
+    op.create_table('daily_sales_attachments_history',
+    sa.Column('attachment_id', sa.Integer(), autoincrement=False, nullable=False, comment='凭证ID（沿用热表ID）'),
+    sa.Column('report_id', sa.Integer(), nullable=False, comment='日报ID'),
+    sa.Column('file_path', sa.String(length=255), nullable=True, comment='文件路径'),
+    sa.Column('attachment_type', sa.Enum('sales_slip', 'bank_receipt', 'takeaway_screenshot', 'image', 'pdf', name='attachmenttype'), nullable=False, comment='附件类型'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+    sa.ForeignKeyConstraint(['report_id'], ['daily_sales_history.report_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('attachment_id')
+    )
+    with op.batch_alter_table('daily_sales_attachments_history', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_daily_sales_attachments_history_report_id'), ['report_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_sales_attachments_history', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_sales_attachments_history_report_id'))
+
+    op.drop_table('daily_sales_attachments_history')
+    with op.batch_alter_table('daily_sales_history', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_sales_history_report_date'))
+        batch_op.drop_index('ix_daily_sales_history_store_date')
+
+    op.drop_table('daily_sales_history')
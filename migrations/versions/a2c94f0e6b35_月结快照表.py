@@ -0,0 +1,48 @@
+"""月结快照表
+
+Revision ID: a2c94f0e6b35
+Revises: 8e3f5a61d2b7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c94f0e6b35'
+down_revision = '8e3f5a61d2b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monthly_close_snapshots',
+    sa.Column('snapshot_id', sa.Integer(), autoincrement=True, nullable=False, comment='快照ID'),
+    sa.Column('month', sa.String(length=7), nullable=False, comment='月份（YYYY-MM）'),
+    sa.Column('store_id', sa.String(length=32), nullable=False, comment='门店ID'),
+    sa.Column('report_count', sa.Integer(), nullable=False, comment='已提交日报数'),
+    sa.Column('unarchived_count', sa.Integer(), nullable=False, comment='其中尚未归档的日报数'),
+    sa.Column('pos_total', sa.Float(), nullable=False, comment='POS机小票总收入合计'),
+    sa.Column('takeaway_amount', sa.Float(), nullable=False, comment='第三方外卖收入合计'),
+    sa.Column('bank_receipt_amount', sa.Float(), nullable=False, comment='银行存入现金合计'),
+    sa.Column('bank_deposit', sa.Float(), nullable=False, comment='实际到账金额合计'),
+    sa.Column('bank_fee', sa.Float(), nullable=False, comment='银行手续费合计'),
+    sa.Column('voucher_amount', sa.Float(), nullable=False, comment='代金券金额合计'),
+    sa.Column('cash_difference', sa.Float(), nullable=False, comment='POS现金误差合计'),
+    sa.Column('electronic_difference', sa.Float(), nullable=False, comment='POS电子支付误差合计'),
+    sa.Column('actual_sales', sa.Float(), nullable=False, comment='实际营业额合计（实际到账 + 代金券）'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='生成时间'),
+    sa.ForeignKeyConstraint(['store_id'], ['stores.store_id'], ),
+    sa.PrimaryKeyConstraint('snapshot_id'),
+    sa.UniqueConstraint('month', 'store_id', name='uq_monthly_close_month_store')
+    )
+    with op.batch_alter_table('monthly_close_snapshots', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_monthly_close_snapshots_month'), ['month'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('monthly_close_snapshots', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_monthly_close_snapshots_month'))
+
+    op.drop_table('monthly_close_snapshots')
@@ -0,0 +1,26 @@
+"""日报版本号
+
+Revision ID: b9a3e0d6c2f1
+Revises: 7f2d9b4c1e60
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9a3e0d6c2f1'
+down_revision = '7f2d9b4c1e60'
+branch_labels = None
+depends_on = None
+
+
+# 不用 batch_alter_table：SQLite 批量模式重建表时会把生成列 live_marker 当普通列复制而失败；
+# 加列/删列在 MySQL 与 SQLite (>= 3.35) 上都可直接执行
+def upgrade():
+    op.add_column('daily_sales', sa.Column('version', sa.Integer(), server_default='0', nullable=False, comment='版本号'))
+
+
+def downgrade():
+    op.drop_column('daily_sales', 'version')
@@ -0,0 +1,50 @@
+"""后台任务表
+
+Revision ID: d41b7c93e8f2
+Revises: a2c94f0e6b35
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41b7c93e8f2'
+down_revision = 'a2c94f0e6b35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('job_id', sa.Integer(), autoincrement=True, nullable=False, comment='任务ID'),
+    sa.Column('name', sa.String(length=64), nullable=False, comment='任务名称（处理函数注册名）'),
+    sa.Column('payload', sa.Text(), nullable=True, comment='任务参数（JSON）'),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus'), nullable=False, comment='任务状态'),
+    sa.Column('dedup_key', sa.String(length=128), nullable=True, comment='去重键'),
+    sa.Column('active_dedup_key', sa.String(length=128), nullable=True, comment='活动任务去重键'),
+    sa.Column('attempts', sa.Integer(), nullable=False, comment='已执行次数'),
+    sa.Column('max_attempts', sa.Integer(), nullable=False, comment='最大执行次数'),
+    sa.Column('run_after', sa.DateTime(), nullable=False, comment='最早可执行时间'),
+    sa.Column('locked_by', sa.String(length=64), nullable=True, comment='领取该任务的工作线程'),
+    sa.Column('locked_at', sa.DateTime(), nullable=True, comment='领取时间'),
+    sa.Column('last_error', sa.Text(), nullable=True, comment='最近一次错误信息'),
+    sa.Column('created_at', sa.DateTime(), nullable=True, comment='创建时间'),
+    sa.Column('finished_at', sa.DateTime(), nullable=True, comment='结束时间'),
+    sa.PrimaryKeyConstraint('job_id'),
+    sa.UniqueConstraint('active_dedup_key')
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_jobs_dedup_key'), ['dedup_key'], unique=False)
+        batch_op.create_index(batch_op.f('ix_jobs_name'), ['name'], unique=False)
+        batch_op.create_index('ix_jobs_status_run_after', ['status', 'run_after'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_jobs_status_run_after')
+        batch_op.drop_index(batch_op.f('ix_jobs_name'))
+        batch_op.drop_index(batch_op.f('ix_jobs_dedup_key'))
+
+    op.drop_table('jobs')
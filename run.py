@@ -3,8 +3,13 @@
 # Flask 应用的开发环境启动脚本。
 import os
 
-from app import create_app
-from config import (
+from dotenv import load_dotenv
+
+# 先加载 .env，再导入配置与应用（config.py 在导入时读取环境变量）
+load_dotenv()
+
+from app import create_app  # noqa: E402
+from config import (  # noqa: E402
     DevelopmentConfig,
     ProductionConfig,
     TestingConfig,
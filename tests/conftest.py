@@ -0,0 +1,68 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+# 模板字节码、实时事件日志、慢查询日志与请求分析结果写到临时目录，测试结束后删除，不留在仓库目录中；
+# 通过环境变量传递，月结等测试启动的子进程同样生效
+_FILES_DIR = tempfile.mkdtemp(prefix='pytest-files-')
+atexit.register(shutil.rmtree, _FILES_DIR, ignore_errors=True)
+os.environ.setdefault('JINJA_BYTECODE_CACHE_DIR', os.path.join(_FILES_DIR, 'jinja_cache'))
+os.environ.setdefault('LIVE_EVENTS_FILE', os.path.join(_FILES_DIR, 'live_events', 'events.log'))
+os.environ.setdefault('SLOW_QUERY_LOG', os.path.join(_FILES_DIR, 'slow_query.log'))
+os.environ.setdefault('PROFILER_DIR', os.path.join(_FILES_DIR, 'profiles'))
+
+import pytest
+from app import create_app, db
+from app.models import RoleType, Store, User
+from config import TestingConfig
+
+PASSWORD = 'test1234'
+
+
+@pytest.fixture
+def config_class():
+    """应用配置类；需要在创建应用之前确定的配置（如数据库地址）由测试模块覆盖此 fixture"""
+    return TestingConfig
+
+
+@pytest.fixture
+def app(config_class):
+    """
+    建好表、只含门店 190 的应用，并保持应用上下文。
+    测试模块需要额外数据或配置时，定义同名 fixture 接收本 fixture 后再补充。
+    """
+    app = create_app(config_class)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Store(store_id='190', store_name='Central WestGate'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def make_user(app):
+    """创建并提交一个用户：make_user(username, role=..., store_id=..., password=..., **其它字段)"""
+    def make_user(username, role=RoleType.BRANCH_MANAGER, store_id='190', password=PASSWORD, **fields):
+        user = User(username=username, role=role, store_id=store_id, **fields)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
+
+
+@pytest.fixture
+def login(app):
+    """
+    返回以指定用户登录的测试客户端。
+    测试中应用上下文一直处于激活状态，flask-login 的当前用户缓存在其中，因此每个测试只登录一个用户。
+    """
+    def login(username, password=PASSWORD):
+        client = app.test_client()
+        client.post('/user/login', data={'username': username, 'password': password})
+        return client
+    return login
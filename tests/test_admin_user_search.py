@@ -0,0 +1,38 @@
+import pytest
+from app import db
+from app.models import RoleType, Store
+
+
+@pytest.fixture
+def client(app, make_user, login):
+    app.config['RECORDS_PER_PAGE'] = 2
+    db.session.add(Store(store_id='191', store_name='Central Rama 2'))
+    db.session.commit()
+    make_user('admin', role=RoleType.ADMIN, store_id=None)
+    make_user('alice', role=RoleType.EMPLOYEE, real_name='Somchai', phone='0811111111')
+    make_user('bob', role=RoleType.EMPLOYEE, store_id='191', real_name='Anan', phone='0822222222')
+    make_user('boss', role=RoleType.FINANCE, store_id=None, user_status=0, real_name='Malee')
+    return login('admin')
+
+
+def test_prefix_search_matches_username_real_name_and_phone(client):
+    assert b'alice' in client.get('/admin/users/?q=ali').data
+    assert b'alice' in client.get('/admin/users/?q=Somc').data
+    assert b'bob' in client.get('/admin/users/?q=0822').data
+    # 前缀匹配，不做中间匹配
+    assert b'alice' not in client.get('/admin/users/?q=lice').data
+
+
+def test_filters_by_role_store_and_status(client):
+    resp = client.get('/admin/users/?store_id=191')
+    assert b'bob' in resp.data and b'alice' not in resp.data
+    resp = client.get('/admin/users/?role=finance&status=0')
+    assert b'boss' in resp.data and b'bob' not in resp.data
+
+
+def test_pagination_reports_total_without_loading_all_rows(client):
+    resp = client.get('/admin/users/')
+    assert '共 4 个用户'.encode() in resp.data
+    assert b'page=2' in resp.data
+    resp = client.get('/admin/users/?page=2')
+    assert b'alice' in resp.data and b'admin</td>' in resp.data
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+from app import db
+from app.models import DailySales, DailySalesAttachments, DailySalesAttachmentsHistory, DailySalesHistory
+from app.models.enums import AttachmentType
+from app.utils.archive_mover import move_archived_reports
+from app.utils.dashboard import archived_sales_summary
+
+TODAY = date(2024, 12, 15)  # 保留 6 个月：2024-06-01 之前的已归档日报迁入历史表
+
+
+@pytest.fixture
+def app(app, make_user):
+    make_user('manager')
+    for day in range(1, 6):
+        report = DailySales(store_id='190', user_id=1, report_date=date(2024, 3, day),
+                            bank_deposit=100.0 * day, archived=True, is_submitted=True)
+        db.session.add(report)
+        db.session.flush()
+        db.session.add(DailySalesAttachments(report_id=report.report_id, file_path=f'uploads/{day}.png',
+                                             attachment_type=AttachmentType.sales_slip))
+    # 未归档的旧日报与保留期内的日报都留在热表
+    db.session.add(DailySales(store_id='190', user_id=1, report_date=date(2024, 3, 9), bank_deposit=7.0))
+    db.session.add(DailySales(store_id='190', user_id=1, report_date=date(2024, 11, 1),
+                              bank_deposit=50.0, archived=True, is_submitted=True))
+    db.session.commit()
+    return app
+
+
+def test_moves_reports_and_attachments_to_history(app):
+    assert move_archived_reports(batch_size=2, today=TODAY) == 5
+
+    assert DailySalesHistory.query.count() == 5
+    assert DailySalesAttachmentsHistory.query.count() == 5
+    assert DailySalesAttachments.query.count() == 0
+    assert sorted(r.report_date for r in DailySales.query) == [date(2024, 3, 9), date(2024, 11, 1)]
+    history = DailySalesHistory.query.filter_by(report_date=date(2024, 3, 2)).one()
+    assert history.actual_sales == 200.0 and history.moved_at is not None
+    attachment = DailySalesAttachmentsHistory.query.filter_by(report_id=history.report_id).one()
+    assert attachment.file_path == 'uploads/2.png'
+
+
+def test_rerun_after_interruption_has_no_duplicates(app):
+    def interrupt(count, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        move_archived_reports(batch_size=2, today=TODAY, progress=interrupt)
+    assert DailySalesHistory.query.count() == 2
+
+    assert move_archived_reports(batch_size=2, today=TODAY) == 3
+    assert move_archived_reports(batch_size=2, today=TODAY) == 0
+    report_ids = [r.report_id for r in DailySalesHistory.query]
+    assert len(report_ids) == len(set(report_ids)) == 5
+    assert DailySalesAttachmentsHistory.query.count() == 5
+
+
+def test_home_page_totals_unchanged_by_move(app):
+    before = archived_sales_summary(['190'], date(2024, 1, 1))
+    assert before[1] == {'190': 1550.0}
+
+    move_archived_reports(batch_size=2, today=TODAY)
+    assert archived_sales_summary(['190'], date(2024, 1, 1)) == before
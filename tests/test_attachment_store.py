@@ -0,0 +1,128 @@
+import os
+import zipfile
+from datetime import date
+
+import pytest
+from app import db
+from app.models import (
+    AttachmentType,
+    DailySales,
+    DailySalesAttachments,
+    DailySalesAttachmentsHistory,
+    Store,
+)
+from app.utils.archive_mover import move_archived_reports
+from app.utils.attachment_store import archive_attachments, is_cold, open_attachment
+from app.utils.daily_reports import upsert_live_report
+
+PHOTO = bytes(range(256)) * 40
+PDF = b'%PDF-1.4 ' + b'receipt ' * 500
+
+
+@pytest.fixture
+def app(app, tmp_path, make_user):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    db.session.add(Store(store_id='191', store_name='Harbour City'))
+    db.session.commit()
+    make_user('manager')
+    make_user('other', store_id='191')
+    return app
+
+
+def add_report(tmp_path, report_date, files, archived=True):
+    report = db.session.get(DailySales, upsert_live_report('190', report_date, 1))
+    report.archived = archived
+    attachments = []
+    for name, content in files:
+        path = tmp_path / f'{report_date}_{name}'
+        if content is not None:
+            path.write_bytes(content)
+        attachment = DailySalesAttachments(report_id=report.report_id, file_path=str(path),
+                                           attachment_type=AttachmentType.image)
+        db.session.add(attachment)
+        attachments.append(attachment)
+    db.session.commit()
+    return [a.attachment_id for a in attachments]
+
+
+def test_old_attachments_move_to_monthly_archives(app, tmp_path):
+    photo_id, pdf_id, lost_id = add_report(tmp_path, date(2024, 3, 5),
+                                           [('slip.png', PHOTO), ('bank.pdf', PDF), ('lost.png', None)])
+    june_id, = add_report(tmp_path, date(2024, 6, 1), [('slip.png', PHOTO)])
+    recent_id, = add_report(tmp_path, date(2024, 8, 20), [('slip.png', PHOTO)])
+    live_id, = add_report(tmp_path, date(2024, 4, 1), [('slip.png', PHOTO)], archived=False)
+    # 六月的日报已迁入历史表，其附件同样转入冷存储
+    assert move_archived_reports(older_than_months=2, today=date(2024, 9, 1)) == 2
+
+    assert archive_attachments(older_than_months=2, today=date(2024, 9, 1), batch_size=2) == 3
+    cold = os.path.join(str(tmp_path), '.cold')
+    # 每批一个新归档，按月份编号
+    assert sorted(n for n in os.listdir(cold) if n.endswith('.zip')) == ['2024-03.1.zip', '2024-06.1.zip']
+    with zipfile.ZipFile(os.path.join(cold, '2024-03.1.zip')) as zf:
+        assert zf.getinfo(f'{photo_id}/2024-03-05_slip.png').compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo(f'{pdf_id}/2024-03-05_bank.pdf').compress_type == zipfile.ZIP_DEFLATED
+
+    pdf = db.session.get(DailySalesAttachmentsHistory, pdf_id)
+    assert pdf.file_path == f'cold://2024-03.1.zip/{pdf_id}/2024-03-05_bank.pdf'
+    with pdf.open_file() as f:
+        assert f.read() == PDF
+    assert not os.path.exists(tmp_path / '2024-03-05_bank.pdf')
+    with db.session.get(DailySalesAttachmentsHistory, june_id).open_file() as f:
+        assert f.read() == PHOTO
+
+    # 文件缺失、未过保留期、未归档的附件保持原样
+    assert not is_cold(db.session.get(DailySalesAttachmentsHistory, lost_id).file_path)
+    for attachment_id in (recent_id, live_id):
+        assert not is_cold(db.session.get(DailySalesAttachments, attachment_id).file_path)
+    assert archive_attachments(older_than_months=2, today=date(2024, 9, 1)) == 0
+
+
+def test_download_reads_hot_and_cold_attachments(app, tmp_path, login):
+    old_id, = add_report(tmp_path, date(2024, 3, 5), [('bank.pdf', PDF)])
+    new_id, = add_report(tmp_path, date(2024, 8, 20), [('slip.png', PHOTO)])
+    archive_attachments(older_than_months=2, today=date(2024, 9, 1))
+
+    client = login('manager')
+    response = client.get(f'/sales/attachments/{old_id}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert response.get_data() == PDF
+    assert client.get(f'/sales/attachments/{new_id}').get_data() == PHOTO
+    assert client.get('/sales/attachments/999').status_code == 404
+
+
+def test_download_is_limited_to_own_store(app, tmp_path, login):
+    old_id, = add_report(tmp_path, date(2024, 3, 5), [('bank.pdf', PDF)])
+    archive_attachments(older_than_months=2, today=date(2024, 9, 1))
+    assert login('other').get(f'/sales/attachments/{old_id}').status_code == 403
+
+
+def test_crash_while_writing_archive_keeps_earlier_attachments(app, tmp_path, monkeypatch):
+    first_id, second_id = add_report(tmp_path, date(2024, 3, 5), [('slip.png', PHOTO), ('bank.pdf', PDF)])
+    write = zipfile.ZipFile.write
+    calls = []
+
+    def crash_on_second_batch(zf, *args, **kwargs):
+        calls.append(1)
+        write(zf, *args, **kwargs)
+        if len(calls) == 2:
+            # 进程在写归档时被杀：文件只写了一半，中央目录没有写出
+            zf.fp.truncate(zf.fp.tell() // 2)
+            raise OSError('killed')
+
+    monkeypatch.setattr(zipfile.ZipFile, 'write', crash_on_second_batch)
+    with pytest.raises(OSError):
+        archive_attachments(older_than_months=2, today=date(2024, 9, 1), batch_size=1)
+    monkeypatch.undo()
+
+    first = db.session.get(DailySalesAttachments, first_id)
+    assert is_cold(first.file_path)
+    with open_attachment(first.file_path) as f:
+        assert f.read() == PHOTO
+    second = db.session.get(DailySalesAttachments, second_id)
+    assert not is_cold(second.file_path) and os.path.exists(second.file_path)
+
+    assert archive_attachments(older_than_months=2, today=date(2024, 9, 1), batch_size=1) == 1
+    for attachment_id, content in ((first_id, PHOTO), (second_id, PDF)):
+        with open_attachment(db.session.get(DailySalesAttachments, attachment_id).file_path) as f:
+            assert f.read() == content
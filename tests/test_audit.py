@@ -0,0 +1,65 @@
+from datetime import date
+
+import pytest
+from app import db
+from app.models import DailySales, DailySalesAudit, FinancialCheckStatus, RoleType
+from app.utils import audit
+from app.utils.daily_reports import upsert_live_report
+from flask_login import login_user
+
+
+@pytest.fixture
+def report(app):
+    report = db.session.get(DailySales, upsert_live_report('190', date(2024, 5, 1), 1))
+    db.session.commit()
+    return report
+
+
+def changes():
+    return [(a.field_name, a.old_value, a.new_value) for a in DailySalesAudit.query.order_by(DailySalesAudit.audit_id)]
+
+
+def test_records_old_and_new_values_with_user(app, report, make_user):
+    finance = make_user('finance', role=RoleType.FINANCE)
+    with app.test_request_context('/sales/finance', method='POST'):
+        login_user(finance)
+        report.bank_deposit = 1200
+        report.financial_check_status = FinancialCheckStatus.CHECKED
+        db.session.commit()
+
+    assert sorted(changes()) == [
+        ('bank_deposit', None, '1200.00'),
+        ('financial_check_status', 'PENDING', 'CHECKED'),
+    ]
+    entry = DailySalesAudit.query.filter_by(field_name='bank_deposit').one()
+    assert (entry.report_id, entry.user_id, entry.username) == (report.report_id, finance.user_id, 'finance')
+    assert entry.source == 'POST /sales/finance'
+
+
+def test_rolled_back_change_is_not_recorded(app, report):
+    report.bank_deposit = 1200
+    db.session.flush()
+    db.session.rollback()
+    assert changes() == []
+
+    # 回滚后再提交其它修改时，之前丢弃的变更也不会被带上
+    report.voucher_amount = 50
+    db.session.commit()
+    assert changes() == [('voucher_amount', None, '50.00')]
+
+
+def test_write_behind_buffer_flushes_on_demand_and_at_exit(app, report, monkeypatch):
+    app.config['AUDIT_WRITE_BEHIND'] = True
+    monkeypatch.setattr(audit.buffer, '_ensure_thread', lambda: None)  # 不启动后台线程，由测试控制写入时机
+
+    report.bank_deposit = 1200
+    db.session.commit()
+    assert audit.buffer.pending() == 1 and changes() == []
+    assert audit.buffer.flush() == 1
+    assert changes() == [('bank_deposit', None, '1200.00')]
+
+    report.bank_deposit = 900
+    db.session.commit()
+    audit.buffer._flush_at_exit()  # atexit 注册的回调
+    assert audit.buffer.pending() == 0
+    assert changes()[-1] == ('bank_deposit', '1200.00', '900.00')
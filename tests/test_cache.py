@@ -0,0 +1,81 @@
+import pytest
+from app import db
+from app.models import Store
+from app.utils.cache import LocalLRU, SQLiteBackend, TwoTierCache, cache
+
+
+@pytest.fixture
+def app(app):
+    app.config['CACHE_SYNC_SECONDS'] = 0
+    return app
+
+
+def worker(app, shared):
+    """模拟另一个 gunicorn worker：独立的进程内层，共用同一个共享层"""
+    other = TwoTierCache()
+    other.app = app
+    other.shared = shared
+    return other
+
+
+def test_local_lru_is_size_bounded():
+    lru = LocalLRU(2)
+    lru.set('a', 1, 60)
+    lru.set('b', 2, 60)
+    lru.get('a')
+    lru.set('c', 3, 60)
+    assert lru.get('a') == 1
+    assert lru.get('c') == 3
+    assert len(lru) == 2
+    assert lru.evictions == 1
+
+
+def test_second_worker_reads_shared_tier_and_sees_invalidation(app):
+    calls = []
+    load = lambda: calls.append(1) or ['190']
+    other = worker(app, cache.shared)
+
+    assert cache.get_or_set('stores', 'all', load) == ['190']
+    assert other.get_or_set('stores', 'all', load) == ['190']
+    assert other.get_or_set('stores', 'all', load) == ['190']
+    assert len(calls) == 1
+    stats = other.stats()
+    assert (stats['local']['hits'], stats['shared']['hits']) == (1, 1)
+
+    cache.invalidate('stores')
+    assert other.get_or_set('stores', 'all', load) == ['190']
+    assert len(calls) == 2
+
+
+def test_value_computed_across_invalidation_is_not_served(app):
+    other = worker(app, cache.shared)
+
+    def load_then_invalidate():
+        other.invalidate('stores')  # 计算期间另一个 worker 提交了门店变更
+        return ['stale']
+
+    assert cache.get_or_set('stores', 'all', load_then_invalidate) == ['stale']
+    assert cache.get_or_set('stores', 'all', lambda: ['fresh']) == ['fresh']
+    assert other.get('stores', 'all') == ['fresh']
+
+
+def test_sqlite_backend_is_shared_between_caches(app, tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    first, second = worker(app, SQLiteBackend(path)), worker(app, SQLiteBackend(path))
+    first.set('dashboard', ('index', 1), {'190': 12.5})
+    assert second.get('dashboard', ('index', 1)) == {'190': 12.5}
+    second.invalidate('dashboard')
+    assert first.get('dashboard', ('index', 1)) is None
+
+
+def test_invalidation_waits_for_commit(app):
+    cache.set('stores', 'all', [])
+    db.session.add(Store(store_id='191', store_name='Harbour City'))
+    db.session.flush()
+    assert cache.get('stores', 'all') == []
+    db.session.rollback()
+    assert cache.get('stores', 'all') == []
+
+    db.session.add(Store(store_id='191', store_name='Harbour City'))
+    db.session.commit()
+    assert cache.get('stores', 'all') is None
@@ -0,0 +1,96 @@
+import os
+import zlib
+from datetime import date
+
+import pytest
+from app import db
+from app.models import DailySales, DailySalesAttachments, User
+from app.utils.chunked_upload import consume_upload
+
+PHOTO = bytes(range(256)) * 40  # 10240 字节
+
+
+@pytest.fixture
+def app(app, tmp_path, make_user):
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    app.config['UPLOAD_CHUNK_BYTES'] = 4096
+    make_user('manager')
+    return app
+
+
+@pytest.fixture
+def client(app, login):
+    return login('manager')
+
+
+def append(client, upload_id, offset, chunk):
+    return client.patch(f'/sales/uploads/{upload_id}', data=chunk, headers={
+        'Upload-Offset': str(offset),
+        'X-Chunk-CRC32': f'{zlib.crc32(chunk) & 0xFFFFFFFF:08x}',
+        'Content-Type': 'application/octet-stream',
+    })
+
+
+def upload(client, content):
+    resp = client.post('/sales/uploads', json={'filename': 'slip.png', 'size': len(content)})
+    assert resp.status_code == 201
+    upload_id, chunk_size = resp.json['upload_id'], resp.json['chunk_size']
+    for offset in range(0, len(content), chunk_size):
+        assert append(client, upload_id, offset, content[offset:offset + chunk_size]).status_code == 200
+    assert client.post(f'/sales/uploads/{upload_id}/complete').status_code == 200
+    return upload_id
+
+
+def test_resume_after_interrupted_chunk(client):
+    upload_id = client.post('/sales/uploads', json={'filename': 'slip.png', 'size': len(PHOTO)}).json['upload_id']
+    assert append(client, upload_id, 0, PHOTO[:4096]).json['offset'] == 4096
+
+    # 重发已写入的分片（响应丢失后的重试）：拒绝并告知当前偏移量
+    resp = append(client, upload_id, 0, PHOTO[:4096])
+    assert resp.status_code == 409 and resp.json['offset'] == 4096
+
+    # 分片在传输中损坏：校验失败，不写入
+    bad = client.patch(f'/sales/uploads/{upload_id}', data=PHOTO[4096:8192], headers={
+        'Upload-Offset': '4096', 'X-Chunk-CRC32': '00000000'})
+    assert bad.status_code == 400
+    assert client.get(f'/sales/uploads/{upload_id}').json['offset'] == 4096
+
+    assert client.post(f'/sales/uploads/{upload_id}/complete').status_code == 409
+    append(client, upload_id, 4096, PHOTO[4096:8192])
+    append(client, upload_id, 8192, PHOTO[8192:])
+    resp = client.post(f'/sales/uploads/{upload_id}/complete')
+    assert resp.status_code == 200 and resp.json['completed']
+
+
+def test_step_submission_references_completed_upload(app, client):
+    upload_id = upload(client, PHOTO)
+    resp = client.post('/sales/report', data={
+        'step': 'pos', 'store_id': '190', 'report_date': '2024-05-01',
+        'cash_sales': '100', 'electronic_sales': '50', 'system_takeaway_sales': '20',
+        'sales_slip_upload_id': upload_id,
+    })
+    assert resp.status_code == 302
+
+    report = DailySales.query.filter_by(report_date=date(2024, 5, 1)).one()
+    attachment = DailySalesAttachments.query.filter_by(report_id=report.report_id).one()
+    with open(attachment.file_path, 'rb') as f:
+        assert f.read() == PHOTO
+    # 上传 ID 只能使用一次
+    assert client.get(f'/sales/uploads/{upload_id}').status_code == 404
+
+
+def test_rolled_back_submission_keeps_upload_reusable(app, client, tmp_path):
+    upload_id = upload(client, PHOTO)
+    user_id = User.query.filter_by(username='manager').one().user_id
+
+    save_path = consume_upload(upload_id, user_id, str(tmp_path), db.session)
+    assert os.path.exists(save_path)
+    db.session.rollback()
+    assert not os.path.exists(save_path)
+    assert client.get(f'/sales/uploads/{upload_id}').json['completed']
+
+    save_path = consume_upload(upload_id, user_id, str(tmp_path), db.session)
+    db.session.commit()
+    with open(save_path, 'rb') as f:
+        assert f.read() == PHOTO
+    assert client.get(f'/sales/uploads/{upload_id}').status_code == 404
@@ -0,0 +1,56 @@
+import base64
+from datetime import date
+
+import pytest
+from app import db
+from app.models import DailySales, RoleType, Store
+from app.utils.completion_heatmap import FLAG_BITS, REPORTED, month_masks
+from app.utils.daily_reports import upsert_live_report
+from app.utils.report_transitions import apply_transition
+
+
+@pytest.fixture
+def app(app, make_user):
+    db.session.add(Store(store_id='191', store_name='Harbour City'))
+    db.session.commit()
+    make_user('finance', role=RoleType.FINANCE, store_id='191')
+    make_user('manager', store_id='191')
+    return app
+
+
+def seed_reports():
+    report = db.session.get(DailySales, upsert_live_report('190', date(2024, 5, 3), 1))
+    db.session.commit()
+    apply_transition(report, 'save_pos')
+    apply_transition(report, 'save_bank')
+    archived = db.session.get(DailySales, upsert_live_report('191', date(2024, 5, 31), 1))
+    archived.archived = True
+    db.session.commit()
+
+
+def test_month_masks_pack_step_flags(app):
+    seed_reports()
+    days, masks = month_masks('2024-05', ['190', '191'])
+    assert days == 31
+    assert len(masks) == 62
+    assert masks[2] == REPORTED | FLAG_BITS['pos_info_completed'] | FLAG_BITS['bank_info_completed']
+    assert masks[31 + 30] == REPORTED | FLAG_BITS['archived']
+    assert sum(1 for m in masks if m) == 2
+
+
+def test_heatmap_data_endpoint_scopes_stores_and_supports_etag(app, login):
+    seed_reports()
+    client = login('finance')
+    resp = client.get('/main/heatmap/data?month=2024-05')
+    data = resp.get_json()
+    assert [s[0] for s in data['stores']] == ['190', '191']
+    assert base64.b64decode(data['masks'])[2] & FLAG_BITS['bank_info_completed']
+    assert client.get('/main/heatmap/data?month=2024-05', headers={'If-None-Match': resp.headers['ETag']}).status_code == 304
+    assert client.get('/main/heatmap/data?month=2024-13').status_code == 400
+    assert client.get('/main/heatmap?month=2024-05').status_code == 200
+
+
+def test_branch_manager_sees_only_own_store(app, login):
+    client = login('manager')
+    data = client.get('/main/heatmap/data?month=2024-05').get_json()
+    assert data['stores'] == [['191', 'Harbour City']]
@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+
+import pytest
+from app import db
+from app.models import DailySales, DailySalesHistory, FinancialCheckStatus
+from app.utils.daily_reports import upsert_live_report
+from app.utils.derived_fields import recompute_derived
+from app.utils.report_transitions import TransitionConflict, apply_transition
+from sqlalchemy.exc import IntegrityError
+
+REPORT_DATE = date(2024, 5, 1)
+
+
+@pytest.fixture
+def app(app, make_user):
+    make_user('manager')
+    return app
+
+
+def test_upsert_returns_existing_live_report(app):
+    first = upsert_live_report('190', REPORT_DATE, 1)
+    second = upsert_live_report('190', REPORT_DATE, 1)
+    db.session.commit()
+    assert first == second
+    assert DailySales.query.count() == 1
+
+
+def test_archived_report_does_not_block_new_live_report(app):
+    archived_id = upsert_live_report('190', REPORT_DATE, 1)
+    db.session.get(DailySales, archived_id).archived = True
+    db.session.commit()
+
+    live_id = upsert_live_report('190', REPORT_DATE, 1)
+    db.session.commit()
+    assert live_id != archived_id
+    assert DailySales.query.filter_by(archived=False).one().report_id == live_id
+
+
+def test_unique_constraint_rejects_second_live_report(app):
+    upsert_live_report('190', REPORT_DATE, 1)
+    db.session.commit()
+    db.session.add(DailySales(store_id='190', user_id=1, report_date=REPORT_DATE))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+
+
+def test_transition_rejects_stale_version(app):
+    report = db.session.get(DailySales, upsert_live_report('190', REPORT_DATE, 1))
+    assert apply_transition(report, 'save_pos', 0, cash_income=100.0) == 1
+    db.session.commit()
+
+    with pytest.raises(TransitionConflict) as excinfo:
+        apply_transition(report, 'save_pos', 0, cash_income=200.0)
+    assert excinfo.value.current_version == 1
+    db.session.rollback()
+    assert db.session.get(DailySales, report.report_id).cash_income == 100.0
+
+
+def test_transition_guard_blocks_out_of_order_step(app):
+    report = db.session.get(DailySales, upsert_live_report('190', REPORT_DATE, 1))
+    db.session.commit()
+    with pytest.raises(TransitionConflict):
+        apply_transition(report, 'save_takeaway', takeaway_amount=50.0)
+    db.session.rollback()
+    report = DailySales.query.one()
+    assert report.version == 0
+    assert not report.takeaway_info_completed
+
+
+def test_amount_columns_are_computed_null_safe(app):
+    report = db.session.get(DailySales, upsert_live_report('190', REPORT_DATE, 1))
+    db.session.commit()
+    assert report.pos_total == 0
+    assert report.actual_sales == 0
+
+    apply_transition(report, 'save_pos', cash_income=100.0, pos_income=50.5)
+    apply_transition(report, 'save_bank', bank_deposit=120.0)
+    db.session.commit()
+    assert report.pos_total == 150.5
+    assert report.actual_sales == 120.0
+
+
+def test_recompute_derived_fixes_history_in_chunks(app):
+    for i, (pos_total, actual_sales) in enumerate([(999.0, 1.0), (30.0, 15.0), (None, None)]):
+        db.session.add(DailySalesHistory(
+            report_id=10 + i * 7, store_id='190', user_id=1, report_date=REPORT_DATE + timedelta(days=i),
+            cash_income=10.0, pos_income=20.0, bank_deposit=15.0, pos_total=pos_total, actual_sales=actual_sales,
+            pos_info_completed=True, takeaway_info_completed=True, bank_info_completed=True, is_submitted=True,
+            financial_check_status=FinancialCheckStatus.AMOUNT_VERIFIED, archived=True,
+        ))
+    db.session.commit()
+
+    chunks = []
+    changed = recompute_derived(REPORT_DATE, REPORT_DATE + timedelta(days=1), chunk_size=5,
+                                progress=lambda n, total, last_id: chunks.append(last_id))
+    assert changed == 1
+    assert chunks == [14, 17]
+    rows = {r.report_id: (r.pos_total, r.actual_sales) for r in DailySalesHistory.query}
+    assert rows == {10: (30.0, 15.0), 17: (30.0, 15.0), 24: (None, None)}
+
+    assert recompute_derived(REPORT_DATE, REPORT_DATE + timedelta(days=2)) == 1
+    assert recompute_derived(REPORT_DATE, REPORT_DATE + timedelta(days=2)) == 0
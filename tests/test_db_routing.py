@@ -0,0 +1,89 @@
+import pytest
+from app import db
+from app.models import Store
+from app.utils.db_routing import REPLICA_BIND_KEY, primary, use_primary, use_replica
+from config import TestingConfig
+
+
+@pytest.fixture
+def config_class(tmp_path):
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        SQLALCHEMY_BINDS = {REPLICA_BIND_KEY: f"sqlite:///{tmp_path / 'replica.db'}"}
+        READ_REPLICA_ENDPOINTS = ['replica_by_config']
+
+    return ReplicaConfig
+
+
+def store_name():
+    return Store.query.filter_by(store_id='190').one().store_name
+
+
+@pytest.fixture
+def app(app):
+    # 副本中同一门店使用不同的名称，由返回的名称判断查询走了哪个库
+    replica = db.engines[REPLICA_BIND_KEY]
+    db.metadata.create_all(replica)
+    with replica.begin() as conn:
+        conn.execute(Store.__table__.insert().values(store_id='190', store_name='replica'))
+
+    @use_replica
+    def read_replica():
+        return store_name()
+
+    @use_primary
+    def read_primary():
+        return store_name()
+
+    @use_replica
+    def write_then_read():
+        db.session.add(Store(store_id='191', store_name='New'))
+        db.session.flush()
+        return store_name()
+
+    @use_replica
+    def read_inside_primary_block():
+        with primary():
+            return store_name()
+
+    def replica_by_config():
+        return store_name()
+
+    @use_replica
+    def lock_then_read():
+        locked = Store.query.filter_by(store_id='190').with_for_update().one().store_name
+        return f'{locked},{store_name()}'
+
+    for view in (read_replica, read_primary, write_then_read, read_inside_primary_block, replica_by_config,
+                 lock_then_read):
+        app.add_url_rule(f'/{view.__name__}', view.__name__, view)
+    # 建表时的写入会让当前会话固定走主库，请求前换一个新会话
+    db.session.remove()
+    yield app
+    db.metadata.drop_all(replica)
+    # init_app 为每个 bind 登记了 MetaData，不移除的话后续测试的 create_all 会找不到该 bind
+    db.metadatas.pop(REPLICA_BIND_KEY, None)
+
+
+def test_use_replica_view_reads_replica(app):
+    assert app.test_client().get('/read_replica').text == 'replica'
+
+
+def test_replica_endpoint_from_config_reads_replica(app):
+    assert app.test_client().get('/replica_by_config').text == 'replica'
+
+
+def test_use_primary_view_reads_primary(app):
+    assert app.test_client().get('/read_primary').text == 'Central WestGate'
+
+
+def test_reads_after_write_in_same_request_use_primary(app):
+    assert app.test_client().get('/write_then_read').text == 'Central WestGate'
+
+
+def test_primary_block_inside_replica_view(app):
+    assert app.test_client().get('/read_inside_primary_block').text == 'Central WestGate'
+
+
+def test_select_for_update_uses_primary_and_pins_session(app):
+    assert app.test_client().get('/lock_then_read').text == 'Central WestGate,Central WestGate'
@@ -0,0 +1,70 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from app import db
+from app.models import DailySales
+from app.utils.daily_reports import upsert_live_report
+from app.utils.report_transitions import apply_transition
+from werkzeug.http import http_date
+
+
+@pytest.fixture
+def client(app, make_user, login):
+    make_user('manager')
+    upsert_live_report('190', date(2024, 5, 3), 1)
+    db.session.commit()
+    return login('manager')
+
+
+def test_if_none_match_returns_304_until_reports_change(client):
+    first = client.get('/main/')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert 'private' in first.headers['Cache-Control']
+
+    cached = client.get('/main/', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b''
+    assert cached.headers['ETag'] == etag
+
+    apply_transition(DailySales.query.one(), 'save_pos')
+    db.session.commit()
+    changed = client.get('/main/', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_if_modified_since_compares_last_update(client):
+    first = client.get('/main/')
+    last_modified = first.headers['Last-Modified']
+
+    assert client.get('/main/', headers={'If-Modified-Since': last_modified}).status_code == 304
+    earlier = http_date(datetime.utcnow() - timedelta(days=1))
+    assert client.get('/main/', headers={'If-Modified-Since': earlier}).status_code == 200
+
+
+def test_conditional_get_can_be_disabled(app, client):
+    app.config['CONDITIONAL_GET_ENABLED'] = False
+    resp = client.get('/main/')
+    assert 'ETag' not in resp.headers
+    assert client.get('/main/', headers={'If-None-Match': '*'}).status_code == 200
+
+
+def test_report_page_returns_304_until_transition_updates_report(client):
+    url = '/sales/report?initial_load=true&store_id=190&report_date=2024-05-03'
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    report = DailySales.query.one()
+    updated_at = report.updated_at
+    apply_transition(report, 'save_pos')
+    db.session.commit()
+    db.session.refresh(report)
+    assert report.updated_at > updated_at
+
+    changed = client.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert client.get(url, headers={'If-None-Match': changed.headers['ETag']}).status_code == 304
@@ -0,0 +1,113 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from app import db
+from app.models import DailySales, Job, JobStatus
+from app.utils import dashboard, jobs
+from app.utils.daily_reports import upsert_live_report
+from app.utils.report_transitions import apply_transition
+
+calls = []
+
+
+@jobs.job('test_echo', max_attempts=2)
+def echo_job(value, fail=False):
+    calls.append(value)
+    if fail:
+        raise RuntimeError('boom')
+
+
+@pytest.fixture
+def app(app):
+    app.config['JOB_RETRY_BASE_SECONDS'] = 0
+    calls.clear()
+    return app
+
+
+def test_enqueue_waits_for_commit_and_is_discarded_on_rollback(app):
+    jobs.enqueue('test_echo', {'value': 1})
+    assert Job.query.count() == 0
+    db.session.rollback()
+    db.session.commit()
+    assert Job.query.count() == 0
+
+    jobs.enqueue('test_echo', {'value': 2})
+    db.session.commit()
+    assert Job.query.one().payload_data == {'value': 2}
+
+
+def test_dedup_key_keeps_one_active_job(app):
+    jobs.enqueue('test_echo', {'value': 1}, dedup_key='k')
+    jobs.enqueue('test_echo', {'value': 2}, dedup_key='k')
+    db.session.commit()
+    assert Job.query.count() == 1
+
+    assert jobs.JobWorker(app).run_once()
+    assert calls == [1]
+    # 前一个任务已结束，同一去重键可以再次登记
+    jobs.enqueue('test_echo', {'value': 3}, dedup_key='k')
+    db.session.commit()
+    assert Job.query.count() == 2
+
+
+def test_failed_job_retries_then_fails_and_can_be_retried(app):
+    jobs.enqueue('test_echo', {'value': 1, 'fail': True}, dedup_key='f')
+    db.session.commit()
+    worker = jobs.JobWorker(app)
+
+    assert worker.run_once()
+    job = db.session.get(Job, 1)
+    db.session.refresh(job)
+    assert job.status == JobStatus.QUEUED and job.attempts == 1 and 'boom' in job.last_error
+
+    assert worker.run_once()
+    db.session.refresh(job)
+    assert job.status == JobStatus.FAILED and job.active_dedup_key is None
+    assert not worker.run_once()
+    assert calls == [1, 1]
+
+    assert jobs.retry_job(job.job_id)
+    db.session.refresh(job)
+    assert job.status == JobStatus.QUEUED and job.attempts == 0 and job.active_dedup_key == 'f'
+
+
+def test_poll_loop_requeues_stale_jobs_on_interval(app, monkeypatch):
+    jobs.enqueue('test_echo', {'value': 1})
+    db.session.commit()
+    job = Job.query.one()
+    job.status, job.locked_by = JobStatus.RUNNING, 'dead-host:1:0'
+    job.locked_at = datetime.utcnow() - timedelta(hours=1)
+    db.session.commit()
+
+    worker = jobs.JobWorker(app)
+    worker._next_stale_check = 0.0
+    # 轮询一次后停止
+    monkeypatch.setattr(worker, 'run_once', lambda worker_id: worker._stop.set() or False)
+    worker._loop('test')
+    db.session.refresh(job)
+    assert job.status == JobStatus.QUEUED and job.locked_by is None
+    # 间隔未到时不再检查
+    assert worker.requeue_stale_if_due() == 0
+
+
+def test_archive_queues_dashboard_refresh_that_warms_cache(app, monkeypatch):
+    today = date.today()
+    report = db.session.get(DailySales, upsert_live_report('190', today, 1))
+    for name in ('save_pos', 'save_takeaway'):
+        apply_transition(report, name)
+    apply_transition(report, 'save_bank', bank_deposit=100)
+    for name in ('submit', 'verify_amount', 'check', 'archive'):
+        apply_transition(report, name)
+    db.session.commit()
+
+    job = Job.query.filter_by(name='refresh_dashboard').one()
+    assert job.run_after > datetime.utcnow()
+    job.run_after = datetime.utcnow()
+    db.session.commit()
+    assert jobs.JobWorker(app).run_once()
+
+    # 首页请求直接命中后台任务算好的汇总，不再逐门店查询
+    monkeypatch.setattr(dashboard, 'archived_sales_summary', lambda *args: pytest.fail('summary recomputed'))
+    last_archived, cumulative = dashboard.cached_summary(['190'], date(today.year, today.month, 1))
+    assert last_archived['190']['report_date'] == today
+    assert cumulative['190'] == 100
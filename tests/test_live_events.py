@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from app.utils import live_events
+
+
+@pytest.fixture
+def app(app, tmp_path):
+    app.config.update(LIVE_EVENTS_FILE=str(tmp_path / 'events.log'), LIVE_EVENTS_POLL_INTERVAL=0,
+                      LIVE_EVENTS_STREAM_SECONDS=0.2, LIVE_EVENTS_MAX_BYTES=400)
+    return app
+
+
+def event(report_id):
+    return {'type': 'submitted', 'report_id': report_id, 'store_id': '190'}
+
+
+def read(last_event_id=None):
+    """读完一次连接（LIVE_EVENTS_STREAM_SECONDS 后结束），返回 (推送的 report_id, 最后一个事件 id)"""
+    report_ids, last_id = [], None
+    for message in live_events.stream(last_event_id):
+        fields = dict(line.split(': ', 1) for line in message.splitlines() if ': ' in line and not line.startswith(':'))
+        last_id = fields.get('id', last_id)
+        if 'data' in fields:
+            report_ids.append(json.loads(fields['data'])['report_id'])
+    return report_ids, last_id
+
+
+def test_reconnect_resumes_after_last_event_id(app):
+    live_events.publish([event(1), event(2)])
+    _, last_id = read()
+    live_events.publish([event(3)])
+    assert read(last_id)[0] == [3]
+
+
+def test_stale_id_after_truncation_starts_from_now(app):
+    live_events.publish([event(1)])
+    _, last_id = read()
+    # 超过 LIVE_EVENTS_MAX_BYTES 后文件清空重写，旧 id 的偏移量在新文件中已无意义
+    for report_id in range(2, 12):
+        live_events.publish([event(report_id)])
+    report_ids, new_id = read(last_id)
+    assert report_ids == []
+    assert new_id.split('-')[0] != last_id.split('-')[0]
+    live_events.publish([event(12)])
+    assert read(new_id)[0] == [12]
+
+
+def test_unknown_id_starts_from_now(app):
+    live_events.publish([event(1)])
+    assert read('12')[0] == []
+    assert read('garbage')[0] == []
+
+
+def test_open_connection_follows_truncation(app):
+    live_events.publish([event(1)])
+    messages = live_events.stream()
+    next(messages)
+    for report_id in range(2, 12):
+        live_events.publish([event(report_id)])
+    received = [json.loads(m.split('data: ', 1)[1])['report_id'] for m in messages if 'data: ' in m]
+    # 清空重写之前已写入旧文件、尚未读取的事件无法补发；清空之后的事件全部送达且不重复
+    assert received == sorted(set(received)) and received[-1] == 11
@@ -0,0 +1,42 @@
+from datetime import date
+
+import pytest
+from app import db
+from app.models import DailySales, Store, User
+from app.utils import load_sim
+
+
+@pytest.fixture
+def app(app, make_user):
+    # 与旧版压测编号同形的真实门店与账号
+    db.session.add(Store(store_id='LS0001', store_name='Lat Phrao'))
+    db.session.commit()
+    make_user('loadsim0001', store_id='LS0001')
+    db.session.add(DailySales(store_id='LS0001', user_id=1, report_date=date(2024, 5, 1)))
+    db.session.commit()
+    return app
+
+
+def test_cleanup_removes_only_accounts_created_by_this_run(app):
+    accounts = load_sim.prepare_users(2, 'pw')
+    other_run = load_sim.prepare_users(1, 'pw')
+    assert len({store_id for _, store_id in accounts + other_run}) == 3
+    db.session.add(DailySales(store_id=accounts[0][1], user_id=1, report_date=date(2024, 5, 1)))
+    db.session.commit()
+
+    assert load_sim.cleanup(accounts) == 1
+    assert sorted(s.store_id for s in Store.query) == sorted(['190', 'LS0001', other_run[0][1]])
+    assert sorted(u.username for u in User.query) == sorted(['loadsim0001', other_run[0][0]])
+    assert DailySales.query.filter_by(store_id='LS0001').count() == 1
+
+
+def test_load_sim_fails_before_creating_accounts_without_gunicorn(app, monkeypatch):
+    import importlib.util
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name, *a: None if name == 'gunicorn' else find_spec(name, *a))
+    users = User.query.count()
+
+    result = app.test_cli_runner().invoke(args=['load-sim', '--users', '2'])
+    assert result.exit_code != 0
+    assert 'gunicorn' in result.output
+    assert User.query.count() == users
@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+from app import db
+from app.models import CalendarDay, DailySales, RoleType, Store
+from app.utils.daily_reports import upsert_live_report
+from app.utils.missing_reports import MISSING, find_missing_reports
+from app.utils.report_transitions import apply_transition
+
+FIRST, LAST = date(2024, 5, 1), date(2024, 5, 3)
+
+
+@pytest.fixture
+def app(app, make_user):
+    db.session.add(Store(store_id='191', store_name='Harbour City'))
+    db.session.commit()
+    make_user('finance', role=RoleType.FINANCE)
+    return app
+
+
+def test_reports_missing_and_incomplete_days(app):
+    # 190：5-01 已提交，5-02 只完成 POS，5-03 缺报；191：5-02 已归档，其余缺报
+    submitted = db.session.get(DailySales, upsert_live_report('190', FIRST, 1))
+    db.session.commit()
+    for name in ('save_pos', 'save_takeaway', 'save_bank', 'submit'):
+        apply_transition(submitted, name)
+    partial = db.session.get(DailySales, upsert_live_report('190', date(2024, 5, 2), 1))
+    db.session.commit()
+    apply_transition(partial, 'save_pos')
+    archived = db.session.get(DailySales, upsert_live_report('191', date(2024, 5, 2), 1))
+    archived.archived = True
+    db.session.commit()
+
+    assert find_missing_reports(FIRST, LAST) == [
+        ('190', date(2024, 5, 2), 1),
+        ('190', date(2024, 5, 3), MISSING),
+        ('191', date(2024, 5, 1), MISSING),
+        ('191', date(2024, 5, 3), MISSING),
+    ]
+    assert find_missing_reports(FIRST, LAST, ['191'])[0][0] == '191'
+    assert CalendarDay.query.count() == 3
+
+
+def test_rejects_range_over_limit(app):
+    with pytest.raises(ValueError):
+        find_missing_reports(date(2024, 1, 1), date(2024, 12, 31))
+
+
+def test_matrix_page(app, login):
+    client = login('finance')
+    resp = client.get('/admin/ops/missing-reports?start=2024-05-01&end=2024-05-03')
+    assert resp.status_code == 200
+    html = resp.get_data(as_text=True)
+    assert 'Harbour City' in html
+    assert html.count('table-danger') == 6
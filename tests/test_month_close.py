@@ -0,0 +1,62 @@
+import os
+from datetime import date
+
+import pytest
+from app import db
+from app.models import DailySales, MonthlyCloseSnapshot, Store
+from app.utils.month_close import run_month_close
+from config import TestingConfig
+
+
+class MonthCloseConfig(TestingConfig):
+    # 进程池的子进程按导入路径加载本配置，通过同一个文件数据库读取日报
+    SQLALCHEMY_DATABASE_URI = os.environ.get('MONTH_CLOSE_TEST_DB')
+
+
+@pytest.fixture
+def config_class(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'close.db'}"
+    monkeypatch.setattr(MonthCloseConfig, 'SQLALCHEMY_DATABASE_URI', url)
+    monkeypatch.setenv('MONTH_CLOSE_TEST_DB', url)  # 以 spawn/forkserver 启动的子进程重新导入本模块时使用
+    return MonthCloseConfig
+
+
+@pytest.fixture
+def app(app):
+    db.session.add_all([Store(store_id='191', store_name='Siam'), Store(store_id='192', store_name='Empty')])
+    for store_id, day, deposit, voucher in [('190', 1, 100.0, 10.0), ('190', 2, 200.0, 0.0), ('191', 3, 50.0, 5.0)]:
+        db.session.add(DailySales(store_id=store_id, user_id=1, report_date=date(2024, 5, day),
+                                  bank_deposit=deposit, voucher_amount=voucher, is_submitted=True, archived=True))
+    # 未最终提交的日报与其它月份的日报不计入
+    db.session.add(DailySales(store_id='190', user_id=1, report_date=date(2024, 5, 9), bank_deposit=999.0))
+    db.session.add(DailySales(store_id='191', user_id=1, report_date=date(2024, 6, 1), bank_deposit=999.0,
+                              is_submitted=True, archived=True))
+    db.session.commit()
+    return app
+
+
+def snapshots():
+    return {s.store_id: (s.report_count, s.bank_deposit, s.actual_sales)
+            for s in MonthlyCloseSnapshot.query.filter_by(month='2024-05')}
+
+
+EXPECTED = {'190': (2, 300.0, 310.0), '191': (1, 50.0, 55.0), '192': (0, 0, 0)}
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_snapshot_totals(app, workers):
+    assert run_month_close('2024-05', app.config['CONFIG_IMPORT_PATH'], workers=workers, group_size=2) == 3
+    assert snapshots() == EXPECTED
+
+
+def test_resume_after_interruption(app):
+    def interrupt(done, total, count):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_month_close('2024-05', app.config['CONFIG_IMPORT_PATH'], workers=0, group_size=1, progress=interrupt)
+    assert list(snapshots()) == ['190']
+
+    assert run_month_close('2024-05', app.config['CONFIG_IMPORT_PATH'], workers=0, group_size=1) == 2
+    assert snapshots() == EXPECTED
+    assert run_month_close('2024-05', app.config['CONFIG_IMPORT_PATH'], workers=0, group_size=1) == 0
@@ -0,0 +1,48 @@
+import pytest
+from app.models import RoleType
+from app.utils import profiler
+
+
+@pytest.fixture
+def app(app, tmp_path, make_user):
+    app.config['PROFILER_DIR'] = str(tmp_path)
+    app.config['PROFILER_MAX_PER_MINUTE'] = 2
+    make_user('admin', role=RoleType.ADMIN)
+    make_user('manager')
+    return app
+
+
+def test_admin_capture_records_sql_and_is_listed(app, login):
+    client = login('admin')
+    resp = client.get('/main/?_profile=1')
+    capture_id = resp.headers['X-Profile-Id']
+
+    capture = profiler.load_capture(capture_id)
+    assert capture['endpoint'] == 'main.index'
+    assert capture['sql_count'] > 0
+    assert any('daily_sales' in q['statement'] for q in capture['sql'])
+    assert 'daily_sales' in client.get(f'/admin/ops/profiles/{capture_id}').get_data(as_text=True)
+    assert client.get(f'/admin/ops/profiles/{capture_id}/download').status_code == 200
+    assert capture_id in client.get('/admin/ops/profiles').get_data(as_text=True)
+
+
+def test_capture_requires_admin(app, login):
+    resp = login('manager').get('/main/?_profile=1')
+    assert resp.status_code == 200
+    assert 'X-Profile-Id' not in resp.headers
+    assert profiler.list_captures() == []
+
+
+def test_capture_pages_are_admin_only(app, login, make_user):
+    make_user('finance', role=RoleType.FINANCE)
+    client = login('finance')
+    assert client.get('/admin/ops/profiles').status_code == 403
+    assert client.get('/admin/ops/profiles/abc').status_code == 403
+    assert client.get('/admin/ops/profiles/abc/download').status_code == 403
+    assert '请求分析' not in client.get('/admin/ops/jobs').get_data(as_text=True)
+
+
+def test_capture_is_rate_limited(app, login):
+    client = login('admin')
+    ids = [client.get('/main/', headers={'X-Profile': '1'}).headers.get('X-Profile-Id') for _ in range(3)]
+    assert ids[0] and ids[1] and ids[2] is None
@@ -0,0 +1,90 @@
+from datetime import date
+
+import pytest
+from app import db
+from app.models import DailySales, FinancialCheckStatus, RoleType, Store
+from app.utils.cache import cache
+from app.utils.daily_reports import upsert_live_report
+from app.utils.report_search import compute_facets, parse_filters, search_reports
+from app.utils.report_transitions import apply_transition
+from werkzeug.datastructures import MultiDict
+
+
+@pytest.fixture
+def app(app, make_user):
+    db.session.add(Store(store_id='191', store_name='Harbour City'))
+    db.session.commit()
+    make_user('finance', role=RoleType.FINANCE, store_id=None)
+    cache.invalidate('report_facets')
+    return app
+
+
+def seed_reports():
+    rows = [
+        ('190', date(2024, 5, 3), 1000, FinancialCheckStatus.CHECKED, '银行晚到账'),
+        ('190', date(2024, 5, 4), 2500, FinancialCheckStatus.PENDING, None),
+        ('191', date(2024, 5, 4), 1800, FinancialCheckStatus.PENDING, 'POS 机故障'),
+        ('191', date(2024, 6, 1), 3000, FinancialCheckStatus.REQUIRES_REMEDIATION, '缺银行凭证 100%'),
+    ]
+    for store_id, day, amount, status, remark in rows:
+        report = db.session.get(DailySales, upsert_live_report(store_id, day, 1))
+        report.bank_deposit = amount
+        report.financial_check_status = status
+        report.remark = remark
+        report.pos_info_completed = status != FinancialCheckStatus.PENDING
+        db.session.commit()
+
+
+def test_facets_exclude_their_own_filter(app):
+    seed_reports()
+    facets = compute_facets(parse_filters(MultiDict([('store_id', '190'), ('status', 'PENDING')])))
+    assert facets['total'] == 1
+    # 门店分面不受门店条件影响，状态分面不受状态条件影响
+    assert dict(facets['stores']) == {'190': 1, '191': 1}
+    assert dict(facets['statuses']) == {'CHECKED': 1, 'PENDING': 1}
+    assert dict(facets['months']) == {'2024-05': 1}
+    assert facets['flags']['pos_info_completed'] == 0
+
+
+def test_amount_remark_and_month_filters(app):
+    seed_reports()
+    result = search_reports(parse_filters(MultiDict({'min_amount': '1500', 'month': '2024-05'})))
+    assert sorted(row['store_id'] for row in result['rows']) == ['190', '191']
+    assert dict(result['facets']['months']) == {'2024-05': 2, '2024-06': 1}
+
+    result = search_reports(parse_filters(MultiDict({'q': '100%'})))
+    assert [row['remark'] for row in result['rows']] == ['缺银行凭证 100%']
+    result = search_reports(parse_filters(MultiDict({'q': '银行', 'pos_info_completed': '1'})))
+    assert result['facets']['total'] == 2
+
+    with pytest.raises(ValueError):
+        parse_filters(MultiDict({'status': 'NOPE'}))
+
+
+def test_unfiltered_facets_are_cached_until_reports_change(app):
+    seed_reports()
+    assert search_reports({})['facets']['total'] == 4
+    loads = cache.stats()['loads']
+    assert search_reports({})['facets']['total'] == 4
+    assert cache.stats()['loads'] == loads
+
+    report = db.session.get(DailySales, upsert_live_report('190', date(2024, 6, 2), 1))
+    db.session.commit()
+    apply_transition(report, 'save_pos')
+    db.session.commit()
+    facets = search_reports({})['facets']
+    assert facets['total'] == 5
+    assert facets['flags']['pos_info_completed'] == 3
+
+
+def test_search_page_and_json(app, login):
+    seed_reports()
+    client = login('finance')
+    response = client.get('/admin/ops/report-search?status=PENDING')
+    assert response.status_code == 200
+    assert 'Harbour City' in response.get_data(as_text=True)
+
+    data = client.get('/admin/ops/report-search?format=json&store_id=191').get_json()
+    assert data['total'] == 2
+    assert {row['financial_check_status'] for row in data['rows']} == {'PENDING', 'REQUIRES_REMEDIATION'}
+    assert client.get('/admin/ops/report-search?format=json&date_from=x').status_code == 400
@@ -0,0 +1,46 @@
+import pytest
+from app.models import RoleType, User
+from app.utils import slow_query
+from config import TestingConfig
+
+
+@pytest.fixture
+def config_class(tmp_path):
+    class SlowQueryConfig(TestingConfig):
+        # EXPLAIN 在后台线程的独立连接上执行，需要文件数据库
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        SLOW_QUERY_MS = 0.000001
+        SLOW_QUERY_LOG = str(tmp_path / 'slow_query.log')
+
+    return SlowQueryConfig
+
+
+def test_fingerprint_folds_literals_and_in_lists():
+    a, digest_a = slow_query.fingerprint("SELECT * FROM users WHERE user_id IN (?, ?, ?) AND username = 'bob'")
+    b, digest_b = slow_query.fingerprint("SELECT *  FROM users\nWHERE user_id IN (%s) AND username = 'alice'")
+    assert a == b == "SELECT * FROM users WHERE user_id IN (...) AND username = ?"
+    assert digest_a == digest_b
+
+
+def test_slow_statement_logged_with_redacted_params_and_plan(app):
+    User.query.filter_by(username='manager', role=RoleType.ADMIN).all()
+    slow_query.recorder.drain()
+
+    entries = [e for e in slow_query.read_entries() if 'FROM users' in e['statement']]
+    assert entries
+    entry = entries[-1]
+    assert entry['params'][0] == '<str:7>'
+    assert entry['tables'] == ['users']
+    assert 'SCAN' in str(entry['explain']['rows']) or 'SEARCH' in str(entry['explain']['rows'])
+
+    groups = slow_query.group_by_fingerprint(slow_query.read_entries(), table='users')
+    assert groups and all('users' in g['tables'] for g in groups)
+
+
+def test_admin_page_groups_entries(app, make_user, login):
+    make_user('admin', role=RoleType.ADMIN)
+    client = login('admin')
+    slow_query.recorder.drain()
+
+    html = client.get('/admin/ops/slow-queries?table=users').get_data(as_text=True)
+    assert 'FROM users' in html
@@ -0,0 +1,66 @@
+import csv
+import io
+
+import pytest
+from app.models import RoleType, User
+from app.utils.user_import import ImportFileError, _insert_batch, import_users
+
+CSV_TEXT = """username,password,role,store_id,real_name
+staff190,secret123,employee,190,Somchai
+lead190,secret123,BRANCH_MANAGER,190,
+finance1,secret123,finance,,
+nostore1,secret123,employee,999,
+staff190,secret123,employee,190,
+admin,secret123,admin,,
+short,123,employee,190,
+"""
+
+
+@pytest.fixture
+def app(app, make_user):
+    app.config['USER_IMPORT_WORKERS'] = 0
+    make_user('admin', role=RoleType.ADMIN, store_id=None, password='admin123')
+    return app
+
+
+def test_import_reports_each_row(app):
+    results = import_users(io.BytesIO(CSV_TEXT.encode('utf-8-sig')), workers=2, batch_size=2)
+    assert [(r['line'], r['status']) for r in results] == [
+        (2, 'created'), (3, 'created'), (4, 'created'), (5, 'error'), (6, 'error'), (7, 'error'), (8, 'error'),
+    ]
+    assert [r['message'] for r in results[3:]] == ['门店不存在: 999', '用户名在文件中重复', '用户名已存在', '密码至少 6 位']
+
+    staff = User.query.filter_by(username='staff190').one()
+    assert staff.user_id == results[0]['user_id']
+    assert staff.role == RoleType.EMPLOYEE and staff.store_id == '190' and staff.real_name == 'Somchai'
+    assert staff.check_password('secret123')
+    assert User.query.filter_by(username='lead190').one().role == RoleType.BRANCH_MANAGER
+
+
+def test_failed_insert_reports_database_error(app):
+    def values(username, password_hash='x'):
+        return {'username': username, 'password_hash': password_hash, 'role': RoleType.EMPLOYEE, 'store_id': '190',
+                'user_status': 1, 'is_primary_contact': False, 'profile_completed': False}
+
+    # 校验之后才出现的同名用户，与其它约束错误分别报告
+    failed = _insert_batch([(2, values('admin')), (3, values('nohash', None)), (4, values('fine'))])
+    assert failed[2] == '用户名已存在'
+    assert failed[3].startswith('写入失败: ') and 'password_hash' in failed[3]
+    assert set(failed) == {2, 3}
+    assert User.query.filter_by(username='fine').count() == 1
+
+
+def test_missing_required_column_rejects_file(app):
+    with pytest.raises(ImportFileError):
+        import_users(io.BytesIO(b'username,role\nstaff190,employee\n'), workers=0)
+
+
+def test_admin_page_returns_result_csv(app, login):
+    client = login('admin', 'admin123')
+    resp = client.post('/admin/users/import', data={'csv_file': (io.BytesIO(CSV_TEXT.encode()), 'staff.csv')},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 200
+    assert resp.headers['X-Import-Created'] == '3'
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True).lstrip('\ufeff'))))
+    assert rows[0]['username'] == 'staff190' and rows[0]['status'] == 'created'
+    assert client.get('/admin/users/import').status_code == 200